@@ -1,10 +1,45 @@
-import google.generativeai as genai
-from config import GOOGLE_API_KEY
+import json
+import logging
+import re
+import threading
 
-if GOOGLE_API_KEY:
-    genai.configure(api_key=GOOGLE_API_KEY)
+from llm_gateway import generate_text
+from intent_analyzer import analyze_intent
+from skill_taxonomy import mentions_skill
+from context_handler import detect_conversation_shift
+from response_cache import context_cache, content_key
+from metrics import inc, timed
+from llm_accounting import note_fallback
+from task_pool import run_blocking, threadsafe_callback
+from logging_setup import get_logger, log_event
+from config import LOCAL_CONFIDENCE_THRESHOLD, GEMINI_MODEL
 
-def analyze_response_context_with_gemini(question, answer, stage):
+log = get_logger(__name__)
+
+_OFF_TOPIC_RE = re.compile(r'"on_topic"\s*:\s*false')
+_GUIDANCE_RE = re.compile(r'"guidance"\s*:\s*"((?:[^"\\]|\\.)*)')
+
+
+def _partial_guidance(analysis_text):
+    """
+    Extract the guidance message from a partially streamed analysis.
+
+    Returns None until the response has said the answer is off topic, since
+    guidance for an on-topic answer is never shown.
+    """
+    if not _OFF_TOPIC_RE.search(analysis_text):
+        return None
+    match = _GUIDANCE_RE.search(analysis_text)
+    if not match:
+        return None
+    try:
+        return json.loads(f'"{match.group(1)}"')
+    except ValueError:
+        # Cut off mid escape sequence; the next chunk will complete it
+        return None
+
+
+def analyze_response_context_with_gemini(question, answer, stage, on_guidance=None):
     """
     Use Gemini to analyze if the user's answer is staying on topic and addressing the question.
     
@@ -12,19 +47,17 @@ def analyze_response_context_with_gemini(question, answer, stage):
         question: The question or prompt given to the user
         answer: The user's response
         stage: The current interview stage ('GATHERING_INFO', 'QA', etc.)
+        on_guidance: Optional callback streamed the guidance text as it arrives,
+            called only once the response is known to be off-topic
         
     Returns:
         dict: Analysis result with 'on_topic', 'guidance', and 'confidence' keys
     """
-    # Print progress message for better visibility
-    print("Analyzing response context...")
+    log_event(log, logging.DEBUG, "context.llm_check", stage=stage, answer_chars=len(answer))
     
     # Skip analysis for very short answers that are likely valid
-    if len(answer.split()) <= 3 and not any(x in answer.lower() for x in ["help", "bye", "quit", "exit"]):
-        print("Short response detected, skipping context analysis")
-        return {"on_topic": True, "confidence": 0.9, "guidance": ""}
-    # Skip analysis for very short answers that are likely valid
-    if len(answer.split()) <= 3 and not any(x in answer.lower() for x in ["help", "bye", "quit", "exit"]):
+    if _is_short_answer(answer):
+        log_event(log, logging.DEBUG, "context.short_answer_skipped", stage=stage)
         return {"on_topic": True, "confidence": 0.9, "guidance": ""}
         
     try:
@@ -56,20 +89,34 @@ Analyze and return a JSON object with:
   "confidence": float between 0.0-1.0
 }}
 """
-        model = genai.GenerativeModel("gemini-1.5-flash-latest")
-        response = model.generate_content([
-            {"role": "user", "parts": [{"text": prompt}]}
-        ])
-        
-        analysis = response.text.strip()
+        # Identical (stage, question, answer) triples produce identical prompts
+        cache_key = content_key(GEMINI_MODEL, prompt)
+        cached = context_cache.get(cache_key)
+        inc("cache_lookups_total", cache="context", result="miss" if cached is None else "hit")
+        if cached is not None:
+            if on_guidance and not cached.get("on_topic", True) and cached.get("guidance"):
+                on_guidance(cached["guidance"])
+            return dict(cached)
+
+        stream_guidance = None
+        if on_guidance:
+            def stream_guidance(text):
+                guidance = _partial_guidance(text)
+                if guidance:
+                    on_guidance(guidance)
+
+        analysis = generate_text(prompt, purpose="context_check", on_text=stream_guidance)
         
         # Basic fallback in case of JSON parsing issues
         try:
-            import json
             result = json.loads(analysis)
+            if isinstance(result, dict):
+                context_cache.put(cache_key, result)
             return result
         except:
             # Default response if JSON parsing fails
+            inc("fallbacks_total", kind="context_check")
+            note_fallback("context_check")
             return {
                 "on_topic": True,  # Default to assuming on-topic to avoid disrupting flow
                 "guidance": "Let's stay focused on the interview questions.",
@@ -77,10 +124,190 @@ Analyze and return a JSON object with:
             }
             
     except Exception as e:
-        print(f"LLM Context Analysis Error: {str(e)}")
+        log_event(log, logging.WARNING, "context.llm_error", "LLM context analysis failed", error=str(e))
         # Fallback response if LLM call fails
+        inc("fallbacks_total", kind="context_check")
+        note_fallback("context_check")
         return {
             "on_topic": True,  # Default to assuming on-topic to avoid disrupting flow
             "guidance": "Let's stay focused on the interview questions.",
             "confidence": 0.5
         }
+
+
+# Confidence assigned to an explicit exit/help/irrelevant pattern match
+LOCAL_SHIFT_CONFIDENCE = 0.9
+
+# Confidence for an answer backed by field-specific evidence, and for one without
+LOCAL_EVIDENCE_CONFIDENCE = 0.9
+LOCAL_UNCONFIRMED_CONFIDENCE = 0.5
+
+# Terse answers containing these are always left to Gemini to judge
+ESCALATION_WORDS = ["help", "bye", "quit", "exit"]
+
+# Answers of at most this many words (without escalation words) are accepted as-is
+SHORT_ANSWER_MAX_WORDS = 3
+
+# A technical answer needs this many words before the local tier vouches for it
+QA_MIN_WORDS = 8
+
+# Locations are short: "Bangalore, India", "Remote", "open to relocating to Berlin"
+LOCATION_MAX_WORDS = 6
+REMOTE_WORDS = frozenset(["remote", "anywhere", "relocate", "relocating", "hybrid", "onsite"])
+
+# Words that make an answer to "desired positions" look like a job title
+ROLE_WORDS = frozenset("""
+    administrator analyst architect consultant designer developer devops dev engineer engineering
+    intern lead manager programmer researcher scientist sde sre specialist tester qa
+""".split())
+
+# Words too common to show that an answer takes up the question's topic
+_COMMON_WORDS = frozenset("""
+    about after also been being between could describe difference does each explain from give have
+    into just like more most much other please should some such than that their them then there
+    these they this those used using what when where which while with would your
+""".split())
+_WORD_RE = re.compile(r"[a-z][a-z0-9+#]*")
+
+_cascade_lock = threading.Lock()
+_cascade_stats = {"turns": 0, "resolved_locally": 0, "escalated": 0}
+
+
+def _is_short_answer(answer):
+    """Terse answers are taken as valid unless they mention help or leaving."""
+    return len(answer.split()) <= SHORT_ANSWER_MAX_WORDS and not any(x in answer.lower() for x in ESCALATION_WORDS)
+
+
+def _content_words(text):
+    return {word for word in _WORD_RE.findall(text.lower()) if len(word) > 3 and word not in _COMMON_WORDS}
+
+
+def _has_evidence(answer, expected_field, question):
+    """True if something in `answer` positively shows it addresses the question or field."""
+    if expected_field == "tech_stack":
+        # analyze_intent only calls it relevant if it names a known skill
+        return True
+    if expected_field == "experience_years":
+        return any(c.isdigit() for c in answer)
+    if expected_field == "desired_positions":
+        return bool(ROLE_WORDS & set(_WORD_RE.findall(answer.lower()))) or mentions_skill(answer)
+    if expected_field == "location":
+        words = answer.split()
+        return len(words) <= LOCATION_MAX_WORDS and (
+            any(word[0].isupper() for word in words) or bool(REMOTE_WORDS & set(_WORD_RE.findall(answer.lower())))
+        )
+    if expected_field is None and question:
+        # A technical answer: long enough, and on the question's terms or naming a known skill
+        if len(answer.split()) < QA_MIN_WORDS:
+            return False
+        return bool(_content_words(answer) & _content_words(question)) or mentions_skill(answer)
+    return False
+
+
+def local_context_analysis(answer, stage, expected_field=None, question=None):
+    """
+    Classify an answer with the cheap local analyzers only.
+
+    Returns a result dict in the same shape as the Gemini analysis. Its
+    confidence reflects how sure the heuristics are. Explicit conversation
+    shifts, terse answers and answers with positive evidence score high:
+    a known skill for the tech stack, a number for experience, a job title
+    for desired positions, a short place name for location, and for
+    technical questions a substantial answer that shares terms with
+    `question` or names a known skill. Other statements, questions and
+    unrecognised tech stacks score low.
+    """
+    is_shift, guidance = detect_conversation_shift(answer, stage)
+    if is_shift:
+        return {"on_topic": False, "guidance": guidance, "confidence": LOCAL_SHIFT_CONFIDENCE}
+
+    if len(answer.split()) <= SHORT_ANSWER_MAX_WORDS:
+        if _is_short_answer(answer):
+            # The Gemini analysis would accept it without a call
+            return {"on_topic": True, "guidance": "", "confidence": LOCAL_EVIDENCE_CONFIDENCE}
+        return {"on_topic": True, "guidance": "", "confidence": 0.0}
+
+    intent = analyze_intent(answer, expected_field)
+    if not intent["is_relevant"] or intent["intent_type"] == "question":
+        # Maybe a clarifying question or an attempt to change topic
+        return {"on_topic": True, "guidance": "", "confidence": 1 - intent["confidence"]}
+
+    if _has_evidence(answer, expected_field, question):
+        # Commands and meta talk ("let me explain...") count too when the content is on topic
+        return {"on_topic": True, "guidance": "", "confidence": LOCAL_EVIDENCE_CONFIDENCE}
+    if intent["intent_type"] == "answer":
+        # Looks like a statement, but nothing shows it answers the question
+        return {"on_topic": True, "guidance": "", "confidence": LOCAL_UNCONFIRMED_CONFIDENCE}
+    return {"on_topic": True, "guidance": "", "confidence": 1 - intent["confidence"]}
+
+
+def _local_first(question, answer, stage, expected_field, threshold):
+    """Run the local analyzers and count the turn; returns (result, resolved_locally)."""
+    threshold = LOCAL_CONFIDENCE_THRESHOLD if threshold is None else threshold
+    result = local_context_analysis(answer, stage, expected_field, question)
+    resolved_locally = result["confidence"] >= threshold
+    with _cascade_lock:
+        _cascade_stats["turns"] += 1
+        _cascade_stats["resolved_locally" if resolved_locally else "escalated"] += 1
+    inc("context_checks_total", resolved="local" if resolved_locally else "llm")
+    return result, resolved_locally
+
+
+@timed("context_analysis")
+def analyze_response_context(question, answer, stage, expected_field=None, on_guidance=None,
+                             on_escalate=None, threshold=None):
+    """
+    Confidence-gated cascade in front of analyze_response_context_with_gemini.
+
+    The local analyzers run first; Gemini is only consulted when their
+    confidence is below `threshold` (LOCAL_CONFIDENCE_THRESHOLD by default).
+
+    Args:
+        question: The question or prompt given to the user
+        answer: The user's response
+        stage: The current interview stage
+        expected_field: Profile field being collected, if any
+        on_guidance: Streaming callback forwarded to the Gemini analysis
+        on_escalate: Called just before escalating to Gemini, so callers can
+            start speculative work that only pays off on the slow path
+        threshold: Override the local confidence threshold
+
+    Returns:
+        dict: Analysis result with 'on_topic', 'guidance', and 'confidence' keys
+    """
+    result, resolved_locally = _local_first(question, answer, stage, expected_field, threshold)
+    if resolved_locally:
+        return result
+
+    if on_escalate:
+        on_escalate()
+    return analyze_response_context_with_gemini(question, answer, stage, on_guidance=on_guidance)
+
+
+@timed("context_analysis")
+async def analyze_response_context_async(question, answer, stage, expected_field=None, on_guidance=None,
+                                         on_escalate=None, threshold=None):
+    """
+    analyze_response_context for asyncio front ends.
+
+    The local analyzers run inline (they are pure CPU and fast); an
+    escalated Gemini check, cache lookup included, is awaited on a worker
+    thread. `on_guidance` and `on_escalate` are called on the event loop.
+    """
+    result, resolved_locally = _local_first(question, answer, stage, expected_field, threshold)
+    if resolved_locally:
+        return result
+
+    if on_escalate:
+        on_escalate()
+    return await run_blocking(
+        analyze_response_context_with_gemini, question, answer, stage, on_guidance=threadsafe_callback(on_guidance)
+    )
+
+
+def get_cascade_stats():
+    """Turn counts for the context cascade and the fraction resolved locally."""
+    with _cascade_lock:
+        stats = dict(_cascade_stats)
+    stats["local_fraction"] = round(stats["resolved_locally"] / stats["turns"], 4) if stats["turns"] else 0.0
+    return stats
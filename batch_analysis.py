@@ -0,0 +1,232 @@
+"""
+Batch versions of the local analyzers for transcript corpora.
+
+detect_conversation_shift and analyze_intent look at one message per call.
+For tuning their thresholds against tens of thousands of historical answers,
+this module computes the same features for a whole batch as NumPy arrays and
+classifies the batch at once. Results are identical to calling the scalar
+functions on each message.
+
+Messages are lowercased, padded and split on spaces as text_matcher does
+(in one split of the whole batch), and every token is replaced by its index
+in the batch vocabulary. Keyword hits are then resolved once per distinct
+token and spread over the batch with array indexing:
+
+- a keyword without spaces occurs in a message exactly when it occurs in
+  one of its tokens, so the per-message flags are an OR over the message's
+  token bitmasks (np.bitwise_or.reduceat)
+- a keyword "w1 w2 ... wk" occurs exactly when some token ends with w1,
+  the next ones equal w2 ... w(k-1) and the k-th starts with wk, all in the
+  same message; only positions matching one of those words are checked
+
+Word counts (str.split semantics), the question-prefix check and the tech
+stack check (skill taxonomy trie) are still computed per message. The shift
+thresholds default to the values in context_handler and can be overridden
+to try alternatives on the same features.
+
+Requires NumPy 2 (StringDType and the np.strings functions).
+"""
+
+import numpy as np
+
+from context_handler import (
+    SHORT_ANSWER_MAX_WORDS, EXIT_MAX_WORDS, IRRELEVANT_EXTRA_WORDS,
+    END_GUIDANCE, HELP_GUIDANCE, DEFAULT_HELP_GUIDANCE, IRRELEVANT_GUIDANCE,
+)
+from intent_analyzer import INTENT_CONFIDENCE
+from skill_taxonomy import mentions_skill
+from text_matcher import CATEGORIES, token_keywords
+
+# One feature column per distinct keyword
+KEYWORDS = list(dict.fromkeys(keyword for keywords in CATEGORIES.values() for keyword in keywords))
+_COLUMN = {keyword: i for i, keyword in enumerate(KEYWORDS)}
+_CATEGORY_COLUMNS = {
+    category: np.array([_COLUMN[keyword] for keyword in keywords]) for category, keywords in CATEGORIES.items()
+}
+# Keywords without spaces, one bit each in a per-token mask; the extra
+# last bit marks tokens containing "!"
+_SINGLE = [keyword for keyword in KEYWORDS if " " not in keyword]
+_EXCLAMATION_BIT = len(_SINGLE)
+if _EXCLAMATION_BIT >= 64:
+    raise ValueError("batch_analysis packs space-free keywords into 64-bit masks")
+# Keywords containing spaces, as (column, words between the spaces)
+_CHAINS = [(_COLUMN[keyword], keyword.split(" ")) for keyword in KEYWORDS if " " in keyword]
+_QUESTION_PREFIXES = tuple(CATEGORIES["question"])
+
+
+def _token_masks(vocab):
+    """Bitmask per distinct token of the space-free keywords (and "!") it contains."""
+    bit = {keyword: np.uint64(1) << np.uint64(i) for i, keyword in enumerate(_SINGLE)}
+    exclamation = np.uint64(1) << np.uint64(_EXCLAMATION_BIT)
+    masks = np.zeros(len(vocab), dtype=np.uint64)
+    for row, token in enumerate(vocab):
+        mask = np.uint64(0)
+        for keyword in token_keywords(token):
+            mask |= bit[keyword]
+        if "!" in token:
+            mask |= exclamation
+        masks[row] = mask
+    return masks
+
+
+def _chain_word_masks(words, tokens):
+    """Per vocab token, whether it can stand at each position of the chain `words`."""
+    first, *middle, last = words
+    return (
+        [np.strings.endswith(tokens, first)]
+        + [tokens == word for word in middle]
+        + [np.strings.startswith(tokens, last)]
+    )
+
+
+def _chain_hits(words, tokens, ids, message_of):
+    """Message indices where the consecutive tokens described by `words` occur."""
+    masks = _chain_word_masks(words, tokens)
+    # Anchor on the word matching the fewest distinct tokens
+    anchor = min(range(len(words)), key=lambda i: int(masks[i].sum()))
+    positions = np.flatnonzero(masks[anchor][ids]) - anchor
+    positions = positions[(positions >= 0) & (positions + len(words) <= len(ids))]
+    for offset, mask in enumerate(masks):
+        if offset != anchor:
+            positions = positions[mask[ids[positions + offset]]]
+    positions = positions[message_of[positions] == message_of[positions + len(words) - 1]]
+    return message_of[positions]
+
+
+def extract_features(messages, expected_field=None):
+    """
+    Per-message features used by both analyzers, as NumPy arrays.
+
+    Args:
+        messages: List or array of message strings
+        expected_field: Profile field being collected; "tech_stack" adds
+            the `mentions_skill` feature
+
+    Returns:
+        dict: `word_count` (int), `has_shift_punctuation`, `has_question_mark`,
+        `question_prefix`, `keyword_hits` (messages x KEYWORDS), one flag per
+        text_matcher category, `irrelevant_hits` (messages x irrelevant
+        patterns) with `irrelevant_pattern_words`, and for tech stacks
+        `mentions_skill`
+    """
+    messages = [str(message) for message in messages]
+    n = len(messages)
+    lowered = [message.lower() for message in messages]
+
+    # Splitting " m1   m2   ... " on spaces yields exactly the tokens of each
+    # padded " m " in turn; a padded message has (its spaces + 3) tokens, so
+    # none is empty
+    flat = (" " + "   ".join(lowered) + " ").split(" ") if n else []
+    lengths = np.fromiter((text.count(" ") + 3 for text in lowered), dtype=np.int64, count=n)
+    vocab = list(dict.fromkeys(flat))
+    index = {token: i for i, token in enumerate(vocab)}
+    ids = np.fromiter(map(index.__getitem__, flat), dtype=np.int64, count=len(flat))
+    message_of = np.repeat(np.arange(n), lengths)
+    starts = np.cumsum(lengths) - lengths
+
+    masks = np.bitwise_or.reduceat(_token_masks(vocab)[ids], starts) if n else np.zeros(0, dtype=np.uint64)
+    keyword_hits = np.zeros((n, len(KEYWORDS)), dtype=bool)
+    for i, keyword in enumerate(_SINGLE):
+        keyword_hits[:, _COLUMN[keyword]] = (masks >> np.uint64(i)) & np.uint64(1)
+    has_exclamation = ((masks >> np.uint64(_EXCLAMATION_BIT)) & np.uint64(1)).astype(bool)
+    tokens = np.array(vocab, dtype=np.dtypes.StringDType())
+    for column, words in _CHAINS:
+        keyword_hits[_chain_hits(words, tokens, ids, message_of), column] = True
+
+    has_question_mark = keyword_hits[:, _COLUMN["?"]]
+    features = {
+        "word_count": np.fromiter(map(len, map(str.split, messages)), dtype=np.int64, count=n),
+        "has_shift_punctuation": has_question_mark | has_exclamation,
+        "has_question_mark": has_question_mark,
+        # No prefix ends in whitespace, so the leading strip is enough
+        "question_prefix": np.fromiter(
+            (text.lstrip().startswith(_QUESTION_PREFIXES) for text in lowered), dtype=bool, count=n
+        ),
+        "keyword_hits": keyword_hits,
+    }
+    for category, columns in _CATEGORY_COLUMNS.items():
+        features[category] = keyword_hits[:, columns].any(axis=1)
+
+    patterns = CATEGORIES["irrelevant"]
+    features["irrelevant_hits"] = keyword_hits[:, _CATEGORY_COLUMNS["irrelevant"]]
+    features["irrelevant_pattern_words"] = np.array([len(p.split()) for p in patterns], dtype=np.int64)
+
+    if expected_field == "tech_stack":
+        features["mentions_skill"] = np.fromiter(map(mentions_skill, messages), dtype=bool, count=n)
+    return features
+
+
+def detect_conversation_shifts(messages, current_stage, features=None,
+                               short_answer_max_words=SHORT_ANSWER_MAX_WORDS,
+                               exit_max_words=EXIT_MAX_WORDS,
+                               irrelevant_extra_words=IRRELEVANT_EXTRA_WORDS):
+    """
+    detect_conversation_shift for a whole batch.
+
+    Args:
+        messages: List or array of messages
+        current_stage: Interview stage, as for the scalar function
+        features: Output of extract_features, to reuse across calls
+        short_answer_max_words, exit_max_words, irrelevant_extra_words:
+            Thresholds (default: the scalar function's)
+
+    Returns:
+        (is_shift, guidance): bool array and object array of guidance strings
+    """
+    if features is None:
+        features = extract_features(messages)
+    word_count = features["word_count"]
+
+    checked = (word_count > short_answer_max_words) | features["has_shift_punctuation"]
+    end = checked & features["end"] & (word_count <= exit_max_words)
+    help_request = checked & features["help"]
+    limits = features["irrelevant_pattern_words"] + irrelevant_extra_words
+    irrelevant = checked & (features["irrelevant_hits"] & (word_count[:, None] <= limits)).any(axis=1)
+
+    guidance = np.full(len(word_count), "", dtype=object)
+    # Assign in reverse priority so earlier checks win, as in the scalar code
+    guidance[irrelevant] = IRRELEVANT_GUIDANCE
+    guidance[help_request] = HELP_GUIDANCE.get(current_stage, DEFAULT_HELP_GUIDANCE)
+    guidance[end] = END_GUIDANCE
+    return end | help_request | irrelevant, guidance
+
+
+def analyze_intents(messages, expected_field=None, features=None):
+    """
+    analyze_intent for a whole batch.
+
+    Args:
+        messages: List or array of messages
+        expected_field: Profile field being collected, as for the scalar function
+        features: Output of extract_features(messages, expected_field), to reuse
+
+    Returns:
+        dict: `intent_type` (object array), `confidence` (float array) and
+        `is_relevant` (bool array), the scalar result's keys
+    """
+    if features is None:
+        features = extract_features(messages, expected_field)
+    has_question = features["has_question_mark"] | features["question_prefix"]
+    conditions = [has_question, features["command"], features["meta"]]
+
+    intent_type = np.select(conditions, ["question", "command", "meta"], "answer").astype(object)
+    confidence = np.select(
+        conditions,
+        [INTENT_CONFIDENCE["question"], INTENT_CONFIDENCE["command"], INTENT_CONFIDENCE["meta"]],
+        INTENT_CONFIDENCE["answer"],
+    )
+    if expected_field == "tech_stack":
+        is_relevant = features["mentions_skill"].copy()
+    else:
+        is_relevant = np.ones(len(has_question), dtype=bool)
+    return {"intent_type": intent_type, "confidence": confidence, "is_relevant": is_relevant}
+
+
+def analyze_batch(messages, current_stage="QA", expected_field=None):
+    """Shift detection and intent analysis for a batch, sharing one feature pass."""
+    features = extract_features(messages, expected_field)
+    is_shift, guidance = detect_conversation_shifts(messages, current_stage, features)
+    result = analyze_intents(messages, expected_field, features)
+    result["is_shift"] = is_shift
+    result["guidance"] = guidance
+    return result
@@ -0,0 +1 @@
+"""Benchmarks and load simulators for the interview engine. Run from the repo root."""
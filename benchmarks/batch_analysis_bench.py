@@ -0,0 +1,81 @@
+"""
+Benchmark of batch_analysis against a Python loop over the scalar analyzers.
+
+Both sides classify the same corpus of distinct messages (shift detection
+then intent analysis, as on a QA turn); the scalar matcher's caches are
+cleared first so neither side starts warm. The results are compared
+element by element and the report says whether they are identical.
+
+Usage (from the repo root):
+    python -m benchmarks.batch_analysis_bench --messages 50000
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from batch_analysis import analyze_batch
+from benchmarks.text_matcher_bench import make_messages
+from context_handler import detect_conversation_shift
+from intent_analyzer import analyze_intent
+import text_matcher
+
+
+def scalar_loop(messages, stage, expected_field):
+    shifts, intents = [], []
+    for message in messages:
+        shifts.append(detect_conversation_shift(message, stage))
+        intents.append(analyze_intent(message, expected_field))
+    return shifts, intents
+
+
+def same_results(batch, shifts, intents):
+    for i, ((is_shift, guidance), intent) in enumerate(zip(shifts, intents)):
+        if (bool(batch["is_shift"][i]), batch["guidance"][i]) != (is_shift, guidance):
+            return False
+        if intent != {
+            "intent_type": batch["intent_type"][i],
+            "confidence": float(batch["confidence"][i]),
+            "is_relevant": bool(batch["is_relevant"][i]),
+        }:
+            return False
+    return True
+
+
+def run_benchmark(count, repeat, stage="QA", expected_field=None):
+    messages = make_messages(count)
+    loop_s, batch_s = [], []
+    for _ in range(repeat):
+        text_matcher.scan.cache_clear()
+        text_matcher._token_keywords.clear()
+        start = time.perf_counter()
+        shifts, intents = scalar_loop(messages, stage, expected_field)
+        loop_s.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        batch = analyze_batch(messages, stage, expected_field)
+        batch_s.append(time.perf_counter() - start)
+
+    return {
+        "messages": count,
+        "repeat": repeat,
+        "identical": same_results(batch, shifts, intents),
+        "python_loop_ms": round(min(loop_s) * 1000, 1),
+        "batch_ms": round(min(batch_s) * 1000, 1),
+        "python_loop_us_per_message": round(min(loop_s) / count * 1e6, 3),
+        "batch_us_per_message": round(min(batch_s) / count * 1e6, 3),
+        "speedup": round(min(loop_s) / min(batch_s), 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--messages", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+    sys.stdout.write(json.dumps(run_benchmark(args.messages, args.repeat), indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+"""
+End-to-end interview simulator and benchmark for the conversation engine.
+
+Drives complete synthetic interviews through interview_engine, with the LLM
+gateway pointed at the synthetic backend. Reports turn latency percentiles,
+LLM calls per interview for each scenario, and throughput when many
+interviews run concurrently, as JSON. With --async-sessions, that many
+interviews also run at once on one event loop through submit_async, as the
+asyncio server runs them.
+
+Usage (from the repo root):
+    python -m benchmarks.interview_simulator --interviews 50 --concurrency 16 --latency-ms 300
+    python -m benchmarks.interview_simulator --interviews 5 --async-sessions 2000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Offline defaults; must be set before the app modules read config
+os.environ.setdefault("LLM_BACKEND", "synthetic")
+os.environ.setdefault("GEMINI_REQUESTS_PER_MINUTE", "1000000")
+os.environ.setdefault("GEMINI_BURST", "1000")
+os.environ.setdefault("CONTEXT_CACHE_PATH", "")
+
+import llm_gateway  # noqa: E402
+from llm_backends import SyntheticBackend  # noqa: E402
+from interview_engine import InterviewEngine, GATHERING_INFO, QA  # noqa: E402
+from question_cache import question_cache  # noqa: E402
+from response_cache import context_cache  # noqa: E402
+
+STACKS = [
+    "python, django, postgres",
+    "react js, next js",
+    "java, spring, kafka",
+    "go, kubernetes, docker",
+    "typescript, node, express",
+]
+
+GOOD_ANSWER = (
+    "I would start by profiling the code to find the hot path, then use a hash map "
+    "to cache intermediate results and add tests around the edge cases."
+)
+
+# Each scenario maps a QA turn index to a detour message sent before the real answer
+SCENARIOS = {
+    "happy_path": {},
+    "off_topic": {1: "Honestly I would rather talk about the weather and football instead of this."},
+    "short_answer": {0: "not sure", 2: "maybe"},
+    "help_request": {1: "I don't understand what this question is asking, can you help me?"},
+}
+
+MAX_TURNS = 60
+
+
+class CountingBackend:
+    """Wraps a backend and counts calls per purpose."""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self._lock = threading.Lock()
+        self.calls = {}
+
+    def _count(self, purpose):
+        with self._lock:
+            self.calls[purpose] = self.calls.get(purpose, 0) + 1
+
+    def generate(self, prompt, purpose, model_name, timeout):
+        self._count(purpose)
+        return self.inner.generate(prompt, purpose, model_name, timeout)
+
+    def stream(self, prompt, purpose, model_name, timeout):
+        self._count(purpose)
+        return self.inner.stream(prompt, purpose, model_name, timeout)
+
+    def total(self):
+        with self._lock:
+            return sum(self.calls.values())
+
+
+class ReportTimingEngine(InterviewEngine):
+    """Engine without email or storage that times the end-of-interview scoring."""
+
+    def __init__(self):
+        super().__init__()
+        self.report_seconds = 0.0
+        self.report_total = 0.0
+
+    def finish(self, session):
+        start = time.perf_counter()
+        super().finish(session)
+        self.report_seconds = time.perf_counter() - start
+        self.report_total += self.report_seconds
+
+    async def finish_async(self, session):
+        start = time.perf_counter()
+        await super().finish_async(session)
+        self.report_seconds = time.perf_counter() - start
+        self.report_total += self.report_seconds
+
+
+def profile_answers(index):
+    return {
+        "full_name": f"Candidate {index}",
+        "email": f"candidate{index}@example.com",
+        "phone": "9876543210",
+        "experience_years": str(index % 12),
+        "desired_positions": "backend developer",
+        "location": "Bangalore",
+        "tech_stack": STACKS[index % len(STACKS)],
+    }
+
+
+def run_interview(index, scenario):
+    """
+    Run one full interview.
+
+    Returns (turn latencies in seconds, report latency, detours redirected,
+    LLM usage summary), where a detour counts as redirected if the engine
+    repeated the question.
+    """
+    engine = ReportTimingEngine()
+    session = engine.start()
+    answers = profile_answers(index)
+    detours = SCENARIOS[scenario]
+    turns = []
+
+    def timed(message):
+        start = time.perf_counter()
+        engine.submit(session, message)
+        # The wrap-up after the last answer is reported separately
+        turns.append(time.perf_counter() - start - engine.report_seconds)
+        engine.report_seconds = 0.0
+
+    while session.stage == GATHERING_INFO and len(turns) < MAX_TURNS:
+        timed(answers[session.current_field()])
+
+    # Technical questions, with scenario detours before some answers
+    qa_turn = 0
+    redirected = 0
+    while session.stage == QA and len(turns) < MAX_TURNS:
+        detour = detours.get(qa_turn)
+        if detour:
+            asked = session.current_question
+            answered = len(session.qa_pairs)
+            timed(detour)
+            if session.current_question == asked and len(session.qa_pairs) == answered:
+                redirected += 1
+            else:
+                # The engine accepted the detour as an answer; carry on from its next question
+                qa_turn += 1
+                if session.stage != QA:
+                    break
+        timed(GOOD_ANSWER)
+        qa_turn += 1
+    return turns, engine.report_total, redirected, session.llm_ledger.summary()
+
+
+async def run_interview_async(index, scenario):
+    """run_interview through submit_async; several run at once on one event loop."""
+    engine = ReportTimingEngine()
+    session = engine.start()
+    answers = profile_answers(index)
+    detours = SCENARIOS[scenario]
+    turns = []
+
+    async def timed(message):
+        start = time.perf_counter()
+        await engine.submit_async(session, message)
+        turns.append(time.perf_counter() - start - engine.report_seconds)
+        engine.report_seconds = 0.0
+
+    while session.stage == GATHERING_INFO and len(turns) < MAX_TURNS:
+        await timed(answers[session.current_field()])
+
+    qa_turn = 0
+    while session.stage == QA and len(turns) < MAX_TURNS:
+        detour = detours.get(qa_turn)
+        if detour:
+            answered = len(session.qa_pairs)
+            await timed(detour)
+            if len(session.qa_pairs) != answered:
+                qa_turn += 1
+                if session.stage != QA:
+                    break
+        await timed(GOOD_ANSWER)
+        qa_turn += 1
+    return turns, engine.report_total
+
+
+async def run_async_sessions(count):
+    """Run `count` interviews at once; returns (per-interview results, peak thread count)."""
+    names = list(SCENARIOS)
+    peak_threads = threading.active_count()
+
+    async def sample_threads():
+        nonlocal peak_threads
+        while True:
+            peak_threads = max(peak_threads, threading.active_count())
+            await asyncio.sleep(0.05)
+
+    sampler = asyncio.ensure_future(sample_threads())
+    try:
+        results = await asyncio.gather(*(run_interview_async(i, names[i % len(names)]) for i in range(count)))
+    finally:
+        sampler.cancel()
+    return results, peak_threads
+
+
+def percentiles(samples_seconds):
+    if not samples_seconds:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    ordered = sorted(samples_seconds)
+
+    def pick(p):
+        return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 3)
+
+    return {"p50_ms": pick(0.50), "p95_ms": pick(0.95), "p99_ms": pick(0.99), "max_ms": pick(1.0)}
+
+
+def reset_caches():
+    question_cache.clear()
+    context_cache.clear()
+
+
+def run_benchmark(interviews, concurrency, latency_ms, jitter_ms, cold_caches, async_sessions=0):
+    backend = CountingBackend(SyntheticBackend(latency_ms, jitter_ms))
+    previous = llm_gateway.set_backend(backend)
+    report = {
+        "config": {
+            "interviews_per_scenario": interviews,
+            "concurrency": concurrency,
+            "llm_latency_ms": latency_ms,
+            "llm_jitter_ms": jitter_ms,
+            "cold_caches": cold_caches,
+            "async_sessions": async_sessions,
+        },
+        "scenarios": {},
+    }
+    try:
+        # Sequential runs give clean per-interview turn latency and call counts
+        for scenario in SCENARIOS:
+            turns, reports, calls, usages = [], [], [], []
+            redirected = 0
+            for i in range(interviews):
+                if cold_caches:
+                    reset_caches()
+                before = backend.total()
+                interview_turns, report_latency, interview_redirected, usage = run_interview(i, scenario)
+                calls.append(backend.total() - before)
+                turns.extend(interview_turns)
+                reports.append(report_latency)
+                redirected += interview_redirected
+                usages.append(usage)
+            report["scenarios"][scenario] = {
+                "turns": len(turns),
+                "turn_latency": percentiles(turns),
+                "report_latency": percentiles(reports),
+                "llm_calls_per_interview": round(sum(calls) / len(calls), 3),
+                "est_tokens_per_interview": round(sum(u["est_tokens"] for u in usages) / len(usages), 1),
+                "llm_wait_ms_per_interview": round(sum(u["wait_ms"] for u in usages) / len(usages), 1),
+                "detours": len(SCENARIOS[scenario]) * interviews,
+                "detours_redirected": redirected,
+            }
+
+        # Concurrent runs measure throughput under load across the scenario mix
+        if cold_caches:
+            reset_caches()
+        names = list(SCENARIOS)
+        total = interviews * len(names)
+        before = backend.total()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            results = list(pool.map(lambda i: run_interview(i, names[i % len(names)]), range(total)))
+        elapsed = time.perf_counter() - start
+        turns = [t for interview_turns, _, _, _ in results for t in interview_turns]
+        report["concurrent"] = {
+            "interviews": total,
+            "elapsed_s": round(elapsed, 3),
+            "interviews_per_s": round(total / elapsed, 3),
+            "turns_per_s": round(len(turns) / elapsed, 3),
+            "turn_latency": percentiles(turns),
+            "report_latency": percentiles([r for _, r, _, _ in results]),
+            "llm_calls_per_interview": round((backend.total() - before) / total, 3),
+        }
+
+        # Many interviews at once on one event loop, as interview_server runs them
+        if async_sessions:
+            if cold_caches:
+                reset_caches()
+            before = backend.total()
+            start = time.perf_counter()
+            results, peak_threads = asyncio.run(run_async_sessions(async_sessions))
+            elapsed = time.perf_counter() - start
+            turns = [t for interview_turns, _ in results for t in interview_turns]
+            report["async"] = {
+                "interviews": async_sessions,
+                "elapsed_s": round(elapsed, 3),
+                "interviews_per_s": round(async_sessions / elapsed, 3),
+                "turns_per_s": round(len(turns) / elapsed, 3),
+                "turn_latency": percentiles(turns),
+                "report_latency": percentiles([r for _, r in results]),
+                "llm_calls_per_interview": round((backend.total() - before) / async_sessions, 3),
+                "peak_threads": peak_threads,
+            }
+        report["llm_calls_by_purpose"] = dict(backend.calls)
+        report["gateway"] = llm_gateway.get_gateway_stats()
+    finally:
+        llm_gateway.set_backend(previous)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--interviews", type=int, default=20, help="Interviews per scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="Threads in the concurrent phase")
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Synthetic LLM latency")
+    parser.add_argument("--jitter-ms", type=float, default=50.0, help="Synthetic LLM latency jitter")
+    parser.add_argument("--async-sessions", type=int, default=0,
+                        help="Interviews to run at once on one event loop (0 to skip)")
+    parser.add_argument("--cold-caches", action="store_true", help="Clear question/context caches per interview")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(
+        args.interviews, args.concurrency, args.latency_ms, args.jitter_ms, args.cold_caches, args.async_sessions
+    )
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        sys.stdout.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
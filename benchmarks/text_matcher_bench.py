@@ -0,0 +1,165 @@
+"""
+Micro-benchmark for the shared single-pass keyword matcher.
+
+Times the per-message cost of running both local analyzers
+(detect_conversation_shift then analyze_intent, as the context cascade
+does) against the previous implementation's separate any()/next() scans,
+reproduced below as the baseline. Every message is distinct, so the
+per-message memo only helps the second analyzer, as it would in production.
+Messages are built from a fixed vocabulary, like real answers, so the
+per-token memo is warm after the first few; the cold figure clears it
+before every round.
+
+The analyzers are timed as on a QA turn (no expected profile field). The
+tech-stack relevance check, which only runs on the tech stack answer, is
+timed separately: the old fixed substring list against skill_taxonomy.
+
+Usage (from the repo root):
+    python -m benchmarks.text_matcher_bench --messages 20000
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+
+from context_handler import detect_conversation_shift
+from intent_analyzer import analyze_intent
+import skill_taxonomy
+import text_matcher
+from text_matcher import (
+    scan, QUESTION_INDICATORS, COMMAND_INDICATORS, META_INDICATORS,
+    END_KEYWORDS, HELP_KEYWORDS, IRRELEVANT_PATTERNS,
+)
+
+SAMPLES = [
+    "I have worked with python, django and postgres for about five years",
+    "Can you tell me a joke before we continue?",
+    "I don't understand what this question is asking",
+    "react js, next js, typescript",
+    "Honestly I would rather talk about the weather today",
+    "I would use a hash map to cache the intermediate results and profile first",
+    "What's your name?",
+    "bye",
+    "Please show me the next question",
+    "We scaled the service by sharding the database and adding read replicas",
+]
+
+# Words appended to the samples to make every message distinct
+FILLER = (
+    "also the team then with our service api tests latency cache queue worker database index "
+    "deploy release review design memory threads async docker cloud metrics logging users data "
+    "model scale error retry timeout backend frontend mobile build pipeline schema query"
+).split()
+
+
+# The fixed tech-term list analyze_intent used before skill_taxonomy
+TECH_TERMS = [
+    "javascript", "python", "java", "html", "css", "react", "angular",
+    "node", "express", "django", "flask", "ruby", "c++", "c#", "php",
+    "typescript", "sql", "nosql", "mongo", "mysql", "postgres",
+]
+
+
+def legacy_shift(user_input, current_stage):
+    """Keyword scans of detect_conversation_shift before text_matcher."""
+    if len(user_input.split()) <= 5 and not any(char in user_input for char in "?!"):
+        return False, ""
+    user_input_lower = " " + user_input.lower() + " "
+    if any(keyword in user_input_lower for keyword in END_KEYWORDS):
+        exit_word = next((kw for kw in END_KEYWORDS if kw in user_input_lower), "").strip()
+        if exit_word and len(user_input.split()) <= 3:
+            return True, "end"
+    if any(keyword in user_input_lower for keyword in HELP_KEYWORDS):
+        return True, "help"
+    if any(pattern in user_input_lower for pattern in IRRELEVANT_PATTERNS):
+        for pattern in IRRELEVANT_PATTERNS:
+            if pattern in user_input_lower and len(user_input.split()) <= len(pattern.split()) + 3:
+                return True, "irrelevant"
+    return False, ""
+
+
+def legacy_intent(user_input, expected_field=None):
+    """Keyword scans of analyze_intent before text_matcher."""
+    text = user_input.strip().lower()
+    has_question = "?" in text or any(text.startswith(q) for q in QUESTION_INDICATORS)
+    has_command = any(c in text for c in COMMAND_INDICATORS)
+    is_meta = any(m in text for m in META_INDICATORS)
+    is_relevant = True
+    if expected_field == "tech_stack":
+        is_relevant = any(term in text for term in TECH_TERMS)
+    return has_question, has_command, is_meta, is_relevant
+
+
+def make_messages(count, seed=0):
+    rng = random.Random(seed)
+    n = len(FILLER)
+    return [
+        f"{rng.choice(SAMPLES)} {FILLER[i % n]} {FILLER[i // n % n]} {FILLER[i // (n * n) % n]}"
+        for i in range(count)
+    ]
+
+
+def _time(fn, messages):
+    start = time.perf_counter()
+    for message in messages:
+        fn(message)
+    return (time.perf_counter() - start) / len(messages) * 1e6
+
+
+def run_benchmark(count, repeat):
+    messages = make_messages(count)
+
+    def legacy(message):
+        legacy_shift(message, "QA")
+        legacy_intent(message)
+
+    def matcher(message):
+        detect_conversation_shift(message, "QA")
+        analyze_intent(message)
+
+    def legacy_tech(message):
+        text = message.strip().lower()
+        return any(term in text for term in TECH_TERMS)
+
+    legacy_us, matcher_us, cold_us, scan_us, legacy_tech_us, taxonomy_tech_us = [], [], [], [], [], []
+    for i in range(repeat):
+        # Fresh messages per round so scan() never starts warm
+        round_messages = [f"{m} {FILLER[i % len(FILLER)]}" for m in messages]
+        legacy_us.append(_time(legacy, round_messages))
+        scan.cache_clear()
+        text_matcher._token_keywords.clear()
+        cold_us.append(_time(matcher, round_messages))
+        scan.cache_clear()
+        matcher_us.append(_time(matcher, round_messages))
+        scan.cache_clear()
+        scan_us.append(_time(scan, round_messages))
+        legacy_tech_us.append(_time(legacy_tech, round_messages))
+        skill_taxonomy.mentions_skill.cache_clear()
+        taxonomy_tech_us.append(_time(skill_taxonomy.mentions_skill, round_messages))
+
+    best_legacy, best_matcher = min(legacy_us), min(matcher_us)
+    return {
+        "messages": count,
+        "repeat": repeat,
+        "legacy_scans_us_per_message": round(best_legacy, 3),
+        "matcher_analyzers_us_per_message": round(best_matcher, 3),
+        "matcher_analyzers_cold_tokens_us_per_message": round(min(cold_us), 3),
+        "matcher_scan_only_us_per_message": round(min(scan_us), 3),
+        "speedup": round(best_legacy / best_matcher, 2),
+        "legacy_tech_check_us_per_message": round(min(legacy_tech_us), 3),
+        "taxonomy_tech_check_us_per_message": round(min(taxonomy_tech_us), 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+    sys.stdout.write(json.dumps(run_benchmark(args.messages, args.repeat), indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
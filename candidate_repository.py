@@ -0,0 +1,259 @@
+"""
+SQLite-backed candidate repository.
+
+Candidates are normalized into a `candidates` table (one row per email) and a
+`candidate_skills` table (one row per tech stack entry, as a canonical skill
+ID from skill_taxonomy), with indexes on the columns recruiters filter by so
+lookups stay fast on large candidate pools.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+
+from skill_taxonomy import canonical_skill
+
+DB_PATH = "candidates.db"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS candidates (
+    id INTEGER PRIMARY KEY,
+    email TEXT UNIQUE COLLATE NOCASE,
+    full_name TEXT,
+    phone TEXT,
+    experience_years INTEGER,
+    desired_positions TEXT COLLATE NOCASE,
+    location TEXT COLLATE NOCASE,
+    data TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS candidate_skills (
+    candidate_id INTEGER NOT NULL REFERENCES candidates(id) ON DELETE CASCADE,
+    skill TEXT NOT NULL,
+    PRIMARY KEY (candidate_id, skill)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_candidates_position ON candidates(desired_positions, updated_at);
+CREATE INDEX IF NOT EXISTS idx_candidates_experience ON candidates(experience_years, updated_at DESC);
+CREATE INDEX IF NOT EXISTS idx_candidates_updated ON candidates(updated_at);
+CREATE INDEX IF NOT EXISTS idx_candidate_skills_skill ON candidate_skills(skill, candidate_id);
+"""
+
+_local = threading.local()
+
+
+def _connect(path=None):
+    """Return this thread's connection, creating the schema on first use."""
+    path = path or DB_PATH
+    conn = getattr(_local, "conn", None)
+    if conn is not None and getattr(_local, "path", None) == path:
+        return conn
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(SCHEMA)
+    _local.conn = conn
+    _local.path = path
+    return conn
+
+
+def _normalize_skill(skill):
+    return canonical_skill(str(skill))
+
+
+def _skill_keys(skill):
+    """Index values to look up for `skill`: its canonical ID and, for rows indexed before IDs, its plain spelling."""
+    plain = " ".join(str(skill).lower().split())
+    return _normalize_skill(skill), plain
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _upsert(conn, data, now):
+    email = (data.get("email") or "").strip() or None
+    if email:
+        existing = conn.execute(
+            "SELECT id, updated_at FROM candidates WHERE email = ?", (email,)
+        ).fetchone()
+        if existing is not None and existing["updated_at"] > now:
+            # A newer save of this candidate already landed (e.g. before a replay)
+            return existing["id"]
+    row = (
+        email,
+        data.get("full_name"),
+        data.get("phone"),
+        _to_int(data.get("experience_years")),
+        data.get("desired_positions"),
+        data.get("location"),
+        json.dumps(data, ensure_ascii=False),
+        now,
+        now,
+    )
+    if email:
+        conn.execute(
+            """
+            INSERT INTO candidates (email, full_name, phone, experience_years,
+                desired_positions, location, data, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(email) DO UPDATE SET
+                full_name = excluded.full_name,
+                phone = excluded.phone,
+                experience_years = excluded.experience_years,
+                desired_positions = excluded.desired_positions,
+                location = excluded.location,
+                data = excluded.data,
+                updated_at = excluded.updated_at
+            """,
+            row,
+        )
+        candidate_id = conn.execute(
+            "SELECT id FROM candidates WHERE email = ?", (email,)
+        ).fetchone()[0]
+    else:
+        candidate_id = conn.execute(
+            """
+            INSERT INTO candidates (email, full_name, phone, experience_years,
+                desired_positions, location, data, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            row,
+        ).lastrowid
+
+    skills = data.get("tech_stack") or []
+    if isinstance(skills, str):
+        skills = skills.split(",")
+    skills = {_normalize_skill(s) for s in skills if str(s).strip()}
+    conn.execute("DELETE FROM candidate_skills WHERE candidate_id = ?", (candidate_id,))
+    conn.executemany(
+        "INSERT INTO candidate_skills (candidate_id, skill) VALUES (?, ?)",
+        [(candidate_id, skill) for skill in skills],
+    )
+    return candidate_id
+
+
+def save_candidates(records, path=None, saved_at=None):
+    """
+    Upsert several candidates (deduplicated by email) in one transaction.
+
+    `saved_at` optionally gives each record's save time (default: now); a
+    record older than the stored row for its email is skipped.
+    """
+    conn = _connect(path)
+    now = time.time()
+    times = saved_at if saved_at is not None else [now] * len(records)
+    with conn:
+        return [_upsert(conn, data, saved) for data, saved in zip(records, times)]
+
+
+def save_candidate(data, path=None):
+    """Upsert a single candidate by email and return its row id."""
+    return save_candidates([data], path)[0]
+
+
+def _rows_to_candidates(rows):
+    return [json.loads(row["data"]) for row in rows]
+
+
+def find_by_skill(skill, limit=100, path=None):
+    """Candidates whose tech stack contains `skill` (any alias, case-insensitive), newest first."""
+    rows = _connect(path).execute(
+        """
+        SELECT c.data FROM candidates c
+        WHERE c.id IN (SELECT candidate_id FROM candidate_skills WHERE skill IN (?, ?))
+        ORDER BY c.updated_at DESC
+        LIMIT ?
+        """,
+        (*_skill_keys(skill), limit),
+    ).fetchall()
+    return _rows_to_candidates(rows)
+
+
+def find_by_position(position, limit=100, path=None):
+    """Candidates whose desired position matches `position` (case-insensitive)."""
+    rows = _connect(path).execute(
+        "SELECT data FROM candidates WHERE desired_positions = ? "
+        "ORDER BY updated_at DESC LIMIT ?",
+        (position.strip(), limit),
+    ).fetchall()
+    return _rows_to_candidates(rows)
+
+
+def find_by_experience(min_years=None, max_years=None, limit=100, path=None):
+    """Candidates whose years of experience fall in [min_years, max_years]."""
+    rows = _connect(path).execute(
+        """
+        SELECT data FROM candidates
+        WHERE experience_years BETWEEN ? AND ?
+        ORDER BY experience_years, updated_at DESC
+        LIMIT ?
+        """,
+        (
+            min_years if min_years is not None else -1,
+            max_years if max_years is not None else 1 << 31,
+            limit,
+        ),
+    ).fetchall()
+    return _rows_to_candidates(rows)
+
+
+def most_recent(n=10, path=None):
+    """The `n` most recently saved or updated candidates, newest first."""
+    rows = _connect(path).execute(
+        "SELECT data FROM candidates ORDER BY updated_at DESC LIMIT ?", (n,)
+    ).fetchall()
+    return _rows_to_candidates(rows)
+
+
+def count_candidates(path=None):
+    return _connect(path).execute("SELECT COUNT(*) FROM candidates").fetchone()[0]
+
+
+def all_candidates(path=None):
+    """Every stored candidate, in insertion order."""
+    rows = _connect(path).execute("SELECT data FROM candidates ORDER BY id").fetchall()
+    return _rows_to_candidates(rows)
+
+
+def iter_candidates(skill=None, min_experience=None, max_experience=None, location=None, path=None):
+    """Stream candidates in insertion order with every filter evaluated in SQL."""
+    clauses, params = [], []
+    if skill is not None:
+        clauses.append("id IN (SELECT candidate_id FROM candidate_skills WHERE skill IN (?, ?))")
+        params.extend(_skill_keys(skill))
+    if min_experience is not None:
+        clauses.append("experience_years >= ?")
+        params.append(min_experience)
+    if max_experience is not None:
+        clauses.append("experience_years <= ?")
+        params.append(max_experience)
+    if location is not None:
+        clauses.append("location = ?")
+        params.append(location.strip())
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    # A dedicated cursor streams rows instead of materializing the result
+    cursor = _connect(path).execute(f"SELECT data FROM candidates {where} ORDER BY id", params)
+    try:
+        for row in cursor:
+            yield json.loads(row["data"])
+    finally:
+        cursor.close()
+
+
+def get_candidate(position, path=None):
+    """The candidate at `position` (0-based, insertion order). Raises IndexError."""
+    if position < 0:
+        raise IndexError(position)
+    row = _connect(path).execute(
+        "SELECT data FROM candidates ORDER BY id LIMIT 1 OFFSET ?", (position,)
+    ).fetchone()
+    if row is None:
+        raise IndexError(position)
+    return json.loads(row["data"])
@@ -0,0 +1,77 @@
+"""
+Circuit breaker for the Gemini provider.
+
+After `failure_threshold` consecutive failed or slow calls the circuit opens
+and callers are rejected immediately (so they go straight to their existing
+fallbacks) for `cooldown_seconds`. After the cool-down a single trial call is
+let through: success closes the circuit, failure re-opens it.
+"""
+
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=5, slow_call_seconds=8.0, cooldown_seconds=30.0):
+        self.failure_threshold = failure_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.cooldown_seconds = cooldown_seconds
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self.rejected = 0
+        self.trips = 0
+
+    def allow(self):
+        """Return True if a call may go to the provider right now."""
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.cooldown_seconds:
+                self._state = HALF_OPEN
+                self._trial_in_flight = False
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self, duration):
+        """Record a completed call; calls slower than slow_call_seconds count as failures."""
+        if duration > self.slow_call_seconds:
+            self.record_failure()
+            return
+        with self._lock:
+            self._state = CLOSED
+            self._consecutive_failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._state == HALF_OPEN or self._consecutive_failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    self.trips += 1
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+    def release(self):
+        """End a call without a verdict on the provider (it never reached it, or was abandoned)."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self._state,
+                "consecutive_failures": self._consecutive_failures,
+                "trips": self.trips,
+                "rejected": self.rejected,
+            }
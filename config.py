@@ -5,3 +5,94 @@ load_dotenv()
 
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY", "")
 MAX_TECH_QUESTIONS = 5
+
+# Candidate persistence backend: "jsonl" (append-only log) or "sqlite"
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "jsonl").lower()
+
+# Save candidates from a background write-behind worker instead of inline
+WRITE_BEHIND = os.getenv("WRITE_BEHIND", "1").lower() not in ("0", "false", "no")
+
+# Gemini gateway settings (see llm_gateway.py)
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-1.5-flash-latest")
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "30"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+
+# Generated question cache (see question_cache.py)
+QUESTION_CACHE_SIZE = int(os.getenv("QUESTION_CACHE_SIZE", "256"))
+QUESTION_CACHE_TTL_SECONDS = int(os.getenv("QUESTION_CACHE_TTL_SECONDS", str(6 * 3600)))
+QUESTION_CACHE_POOL_SIZE = int(os.getenv("QUESTION_CACHE_POOL_SIZE", "3"))
+
+# Threads in the shared background pool (see task_pool.py)
+BACKGROUND_WORKERS = int(os.getenv("BACKGROUND_WORKERS", "16"))
+# Threads that run blocking calls awaited from asyncio code (see task_pool.run_blocking)
+ASYNC_BLOCKING_WORKERS = int(os.getenv("ASYNC_BLOCKING_WORKERS", "64"))
+
+# Score each QA answer in the background as soon as it is submitted
+INCREMENTAL_SCORING = os.getenv("INCREMENTAL_SCORING", "1").lower() not in ("0", "false", "no")
+
+# Stream Gemini responses to the chat as tokens arrive
+LLM_STREAMING = os.getenv("LLM_STREAMING", "1").lower() not in ("0", "false", "no")
+
+# Local analyzer confidence needed to skip the Gemini context check
+LOCAL_CONFIDENCE_THRESHOLD = float(os.getenv("LOCAL_CONFIDENCE_THRESHOLD", "0.75"))
+
+# Context analysis result cache (see response_cache.py); set CONTEXT_CACHE_PATH
+# to a SQLite file to persist it and share it across worker processes
+CONTEXT_CACHE_SIZE = int(os.getenv("CONTEXT_CACHE_SIZE", "2048"))
+CONTEXT_CACHE_PATH = os.getenv("CONTEXT_CACHE_PATH", "")
+CONTEXT_CACHE_DISK_SIZE = int(os.getenv("CONTEXT_CACHE_DISK_SIZE", "100000"))
+CONTEXT_CACHE_TTL_SECONDS = int(os.getenv("CONTEXT_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# Shared Gemini quota enforced by the gateway's rate limiter
+GEMINI_REQUESTS_PER_MINUTE = float(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "60"))
+GEMINI_BURST = int(os.getenv("GEMINI_BURST", "1"))
+
+# Hard per-call deadlines (queueing and retries included), optional hedged
+# requests after the recent p95 latency, and the provider circuit breaker
+LLM_INTERACTIVE_DEADLINE_SECONDS = float(os.getenv("LLM_INTERACTIVE_DEADLINE_SECONDS", "12"))
+LLM_BATCH_DEADLINE_SECONDS = float(os.getenv("LLM_BATCH_DEADLINE_SECONDS", "90"))
+LLM_HEDGING = os.getenv("LLM_HEDGING", "0").lower() in ("1", "true", "yes")
+LLM_HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95"))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_SLOW_CALL_SECONDS = float(os.getenv("CIRCUIT_SLOW_CALL_SECONDS", "10"))
+CIRCUIT_COOLDOWN_SECONDS = float(os.getenv("CIRCUIT_COOLDOWN_SECONDS", "30"))
+
+# Transcripts larger than this many characters are scored in parallel chunks
+SCORING_CHUNK_CHARS = int(os.getenv("SCORING_CHUNK_CHARS", "6000"))
+SCORING_CHUNK_ATTEMPTS = int(os.getenv("SCORING_CHUNK_ATTEMPTS", "3"))
+
+# Logging (see logging_setup.py). DEBUG_MODE turns on per-rerun debug events;
+# LOG_SAMPLE_RATES keeps a fraction of chatty events, e.g. "turn.step=0.1"
+DEBUG_MODE = os.getenv("DEBUG_MODE", "0").lower() in ("1", "true", "yes")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG" if DEBUG_MODE else "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
+LOG_REDACT_PII = os.getenv("LOG_REDACT_PII", "1").lower() not in ("0", "false", "no")
+
+# Prometheus metrics (see metrics.py); served on METRICS_HOST:METRICS_PORT
+# and/or rewritten to METRICS_PATH every METRICS_WRITE_SECONDS
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0").lower() in ("1", "true", "yes")
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_PATH = os.getenv("METRICS_PATH", "")
+METRICS_WRITE_SECONDS = float(os.getenv("METRICS_WRITE_SECONDS", "15"))
+
+# LLM backend: "gemini" (live), "record" (live + cassette), "replay" (serve
+# the cassette) or "synthetic" (fabricated responses); see llm_backends.py
+LLM_BACKEND = os.getenv("LLM_BACKEND", "gemini")
+LLM_CASSETTE_PATH = os.getenv("LLM_CASSETTE_PATH", "llm_cassette.jsonl")
+LLM_SYNTHETIC_LATENCY_MS = float(os.getenv("LLM_SYNTHETIC_LATENCY_MS", "0"))
+LLM_SYNTHETIC_JITTER_MS = float(os.getenv("LLM_SYNTHETIC_JITTER_MS", "0"))
+
+# Bundled skill taxonomy used to normalize tech stacks; see skill_taxonomy.py
+SKILL_TAXONOMY_PATH = os.getenv(
+    "SKILL_TAXONOMY_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "skill_taxonomy.json")
+)
+
+# Asyncio HTTP/WebSocket interview server (see interview_server.py)
+SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "8080"))
+SERVER_MAX_SESSIONS = int(os.getenv("SERVER_MAX_SESSIONS", "10000"))
+SERVER_SESSION_TTL_SECONDS = float(os.getenv("SERVER_SESSION_TTL_SECONDS", str(2 * 3600)))
+SERVER_MAX_BODY_BYTES = int(os.getenv("SERVER_MAX_BODY_BYTES", "65536"))
@@ -5,6 +5,23 @@ Context handling utilities for maintaining conversation flow and handling edge c
 from typing import Dict, List, Tuple, Optional
 import re
 
+from text_matcher import scan
+
+# Messages this short without "?" or "!" are taken as direct answers
+SHORT_ANSWER_MAX_WORDS = 5
+# An exit keyword only ends the interview in a message this short
+EXIT_MAX_WORDS = 3
+# Words allowed beyond an irrelevant pattern for the message to count as off topic
+IRRELEVANT_EXTRA_WORDS = 3
+
+END_GUIDANCE = "It seems like you want to end the conversation. If you'd like to continue the interview, please answer the current question."
+HELP_GUIDANCE = {
+    "GATHERING_INFO": "I'm collecting basic information for your candidate profile. Please provide the requested information so we can proceed to the technical questions.",
+    "QA": "This is a technical interview. Please answer the question to the best of your abilities.",
+}
+DEFAULT_HELP_GUIDANCE = "This is an automated interview process. Please answer the questions as they come."
+IRRELEVANT_GUIDANCE = "I'm an interview assistant focused on conducting your technical screening. Let's stay focused on the current question."
+
 def detect_conversation_shift(user_input: str, current_stage: str) -> Tuple[bool, str]:
     """
     Detect if user is trying to shift the conversation away from the intended flow.
@@ -16,43 +33,34 @@ def detect_conversation_shift(user_input: str, current_stage: str) -> Tuple[bool
     Returns:
         (is_shift, guidance): Whether conversation shift detected and guidance message
     """
+    # Keywords suggesting conversation drift (end, help and irrelevant
+    # categories in text_matcher) are padded with spaces so they only match
+    # standalone words; the matcher pads the input to match
+    matches = scan(user_input)
+    word_count = matches.word_count
+
     # Only analyze longer messages or those with specific patterns
     # Skip short responses which are likely direct answers
-    if len(user_input.split()) <= 5 and not any(char in user_input for char in "?!"):
+    if word_count <= SHORT_ANSWER_MAX_WORDS and not any(char in user_input for char in "?!"):
         return False, ""
-        
-    # Keywords suggesting conversation drift - must be standalone words
-    end_keywords = [" quit ", " exit ", " stop ", " end ", " terminate ", " bye ", " goodbye "]
-    help_keywords = [" help ", " confused ", " don't understand ", " what is this ", " what's this "]
-    irrelevant_patterns = [
-        " weather ", " joke ", " tell me a joke ", " who are you ", " what can you do ",
-        " what's your name ", " how are you ", " what is your "
-    ]
-    
-    # Add spaces to make sure we're matching whole words or phrases
-    user_input_lower = " " + user_input.lower() + " "
     
     # Check for exit intent - must be explicit phrases
-    if any(keyword in user_input_lower for keyword in end_keywords):
+    if matches.has("end"):
         # Skip responses like "I want to end my career in frontend development"
         # by checking if it's mostly just the exit keyword
-        exit_word = next((kw for kw in end_keywords if kw in user_input_lower), "").strip()
-        if exit_word and len(user_input.split()) <= 3:
-            return True, "It seems like you want to end the conversation. If you'd like to continue the interview, please answer the current question."
+        exit_word = matches.first("end").strip()
+        if exit_word and word_count <= EXIT_MAX_WORDS:
+            return True, END_GUIDANCE
     
     # Check for help request - must be explicit help requests
-    if any(keyword in user_input_lower for keyword in help_keywords):
-        if current_stage == "GATHERING_INFO":
-            return True, "I'm collecting basic information for your candidate profile. Please provide the requested information so we can proceed to the technical questions."
-        elif current_stage == "QA":
-            return True, "This is a technical interview. Please answer the question to the best of your abilities."
-        return True, "This is an automated interview process. Please answer the questions as they come."
+    if matches.has("help"):
+        return True, HELP_GUIDANCE.get(current_stage, DEFAULT_HELP_GUIDANCE)
     
     # Check for irrelevant queries - must be predominantly about irrelevant topics
-    if any(pattern in user_input_lower for pattern in irrelevant_patterns):
-        for pattern in irrelevant_patterns:
-            if pattern in user_input_lower and len(user_input.split()) <= len(pattern.split()) + 3:
-                return True, "I'm an interview assistant focused on conducting your technical screening. Let's stay focused on the current question."
+    if matches.has("irrelevant"):
+        for pattern in matches.keywords("irrelevant"):
+            if word_count <= len(pattern.split()) + IRRELEVANT_EXTRA_WORDS:
+                return True, IRRELEVANT_GUIDANCE
     
     return False, ""
 
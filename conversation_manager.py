@@ -1,7 +1,21 @@
-from llm import generate_question_with_gemini
+import asyncio
+import logging
+import re
+import threading
+from concurrent.futures import TimeoutError as FutureTimeout
+
+from llm import generate_question_with_gemini, generate_question_async
 from context_handler import detect_conversation_shift, format_next_steps
 from intent_analyzer import analyze_intent
-from ai_context import analyze_response_context_with_gemini
+from ai_context import analyze_response_context, analyze_response_context_async
+from task_pool import submit
+from scoring import score_answer_in_background
+from metrics import timed
+from skill_taxonomy import normalize_stack, skill_names, mentions_skill
+from logging_setup import get_logger, log_event
+from config import INCREMENTAL_SCORING
+
+log = get_logger(__name__)
 
 FIELDS = [
     "full_name",
@@ -22,164 +36,336 @@ FALLBACK_RESPONSES = [
     "I'm here to help with your technical screening. Could you please answer the question?"
 ]
 
-def handle_profile_answer(session_state, user_input):
+def _profile_for_prompt(candidate_info, techs):
+    """Candidate profile fields used to prompt Gemini for questions."""
+    return {
+        "experience_years": candidate_info.get("experience_years", 0),
+        "desired_position": candidate_info.get("desired_positions", ""),
+        "tech_stack": skill_names(techs)
+    }
+
+
+def _split_tech_stack(user_input):
+    """Canonical skill IDs for a tech stack answer; unrecognised entries are kept as typed."""
+    return normalize_stack(user_input)
+
+
+def _first_question_preview(on_text):
+    """Adapt a streaming callback so it only shows the first generated question."""
+    if on_text is None:
+        return None
+    return lambda text: on_text(text.lstrip().split("\n", 1)[0])
+
+
+# How often a caller waiting on speculative questions refreshes their preview
+PREVIEW_POLL_SECONDS = 0.1
+
+
+class _LatestText:
+    """Keeps the latest text streamed by speculative work until the caller shows it."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._text = None
+
+    def __call__(self, text):
+        with self._lock:
+            self._text = text
+
+    def take(self):
+        with self._lock:
+            text, self._text = self._text, None
+        return text
+
+
+def _should_speculate(current_field, user_input):
     """
-    Collect candidate info sequentially.
-    When tech_stack is provided, generate 5 tech questions via Gemini.
+    Start question generation during an escalated context check?
+
+    Only for a tech stack that names a known skill, i.e. one the check will
+    most likely accept: a running generation cannot be cancelled, so for a
+    likely off-topic answer it would be paid for and thrown away.
     """
-    # Get the current field being asked for
-    current_field = None
-    for field in FIELDS:
-        if field not in session_state.candidate_info:
-            current_field = field
+    return current_field == "tech_stack" and mentions_skill(user_input)
+
+
+def _speculative_result(future, latest, on_text):
+    """Wait for speculative questions, showing their first-question preview on this thread."""
+    preview = _first_question_preview(on_text)
+    while True:
+        try:
+            questions_text = future.result(timeout=PREVIEW_POLL_SECONDS)
             break
-            
-    # Skip context checking for short, simple answers that are clearly valid
+        except FutureTimeout:
+            text = latest.take()
+            if preview and text:
+                preview(text)
+    if preview:
+        preview(questions_text)
+    return questions_text
+
+
+async def _speculative_result_async(task, latest, on_text):
+    """_speculative_result for an asyncio task."""
+    preview = _first_question_preview(on_text)
+    while not task.done():
+        await asyncio.wait({task}, timeout=PREVIEW_POLL_SECONDS)
+        text = latest.take()
+        if preview and text and not task.done():
+            preview(text)
+    questions_text = task.result()
+    if preview:
+        preview(questions_text)
+    return questions_text
+
+
+def _needs_context_check(current_field, user_input):
+    """False for short, simple answers that are clearly valid for the field."""
     if current_field == "full_name" and 1 <= len(user_input.split()) <= 5:
         # Skip context check for names (1-5 words)
-        pass
-    elif current_field == "email" and "@" in user_input and "." in user_input:
+        return False
+    if current_field == "email" and "@" in user_input and "." in user_input:
         # Skip context check for valid-looking emails
-        pass
-    elif current_field == "phone" and any(c.isdigit() for c in user_input) and len(user_input) <= 15:
+        return False
+    if current_field == "phone" and any(c.isdigit() for c in user_input) and len(user_input) <= 15:
         # Skip context check for phone numbers
-        pass
+        return False
+    # For more complex fields or longer inputs, use AI-powered context analysis
+    return True
+
+
+def _profile_guidance(ai_context_analysis, current_field):
+    """Guidance to send instead of storing the answer, or None if it is on topic."""
+    # If the AI detects the response is off-topic with high confidence, provide guidance
+    if not ai_context_analysis.get("on_topic", True) and ai_context_analysis.get("confidence", 0) > 0.6:
+        guidance = ai_context_analysis.get("guidance", "Let's stay focused on the interview.")
+        field_name = current_field.replace('_', ' ') if current_field else "information"
+        return f"{guidance}\n\nPlease provide your {field_name}."
+    return None
+
+
+def _store_profile_answer(session_state, field, user_input):
+    """Validate and store the answer for `field`; returns an error message if it is invalid."""
+    if field == "experience_years":
+        try:
+            # Attempt to convert to int
+            session_state.candidate_info[field] = int(user_input)
+        except ValueError:
+            # Try to extract numbers if user provided text like "5 years"
+            numbers = re.findall(r'\d+', user_input)
+            session_state.candidate_info[field] = int(numbers[0]) if numbers else 0
+
+    elif field == "email":
+        # Simple email validation
+        if "@" in user_input and "." in user_input:
+            session_state.candidate_info[field] = user_input.strip()
+        else:
+            return "That doesn't look like a valid email address. Please provide a valid email."
+
+    elif field == "tech_stack":
+        # Store canonical skill IDs so spelling variants match
+        session_state.candidate_info[field] = _split_tech_stack(user_input)
+
     else:
-        # For more complex fields or longer inputs, use AI-powered context analysis
-        
-        # Create prompt specific to the field being asked
-        prompt = f"Please provide your {current_field.replace('_', ' ')}"
-        
-        # Use AI to check if the response is appropriate for the current field
-        ai_context_analysis = analyze_response_context_with_gemini(
-            question=prompt,
-            answer=user_input,
-            stage="GATHERING_INFO"
-        )
-        
-        # If the AI detects the response is off-topic with high confidence, provide guidance
-        if not ai_context_analysis.get("on_topic", True) and ai_context_analysis.get("confidence", 0) > 0.6:
-            guidance = ai_context_analysis.get("guidance", "Let's stay focused on the interview.")
-            field_name = current_field.replace('_', ' ') if current_field else "information"
-            return f"{guidance}\n\nPlease provide your {field_name}."
-    
-    # Normal profile collection flow
-    for field in FIELDS:
-        if field not in session_state.candidate_info:
-            # Validate input based on field type
-            if field == "experience_years":
-                try:
-                    # Attempt to convert to int
-                    session_state.candidate_info[field] = int(user_input)
-                except ValueError:
-                    # Try to extract numbers if user provided text like "5 years"
-                    import re
-                    numbers = re.findall(r'\d+', user_input)
-                    if numbers:
-                        session_state.candidate_info[field] = int(numbers[0])
-                    else:
-                        session_state.candidate_info[field] = 0
-
-            elif field == "email":
-                # Simple email validation
-                if "@" in user_input and "." in user_input:
-                    session_state.candidate_info[field] = user_input.strip()
-                else:
-                    return "That doesn't look like a valid email address. Please provide a valid email."
-
-            elif field == "desired_positions":
-                # Simple validation to avoid false positives in context handling
-                # Accept any reasonable text as a position
-                session_state.candidate_info[field] = user_input.strip()
-
-            elif field == "tech_stack":
-                # Split tech stack by comma
-                techs = [t.strip() for t in user_input.split(",")]
-                session_state.candidate_info[field] = techs
-
-                # --- Prepare candidate info for Gemini ---
-                profile_for_prompt = {
-                    "experience_years": session_state.candidate_info.get("experience_years", 0),
-                    "desired_position": session_state.candidate_info.get("desired_positions", ""),
-                    "tech_stack": techs
-                }
-
-                # Generate 5 tech questions with a progress indicator in app.py
-                print("Generating interview questions...")
-                questions_text = generate_question_with_gemini(profile_for_prompt)
-                print("Questions generated successfully")
-
-                # Split into list assuming one question per line
-                questions = [q.strip() for q in questions_text.split("\n") if q.strip()]
-
-                # Initialize queues
-                session_state.qa_queue = questions
-                session_state.qa_history = []
-                session_state.qa_pairs = []  # Store Q&A pairs for context
-
-            else:
-                session_state.candidate_info[field] = user_input.strip()
-
-            return field  # Return the field just filled
-
-
-def handle_qa(session_state, user_answer):
+        # Any reasonable text is accepted, e.g. as a position or location
+        session_state.candidate_info[field] = user_input.strip()
+    return None
+
+
+def _set_questions(session_state, questions_text):
+    """Queue generated questions (one per line) and reset the Q&A history."""
+    questions = [q.strip() for q in questions_text.split("\n") if q.strip()]
+    log_event(log, logging.INFO, "questions.generated", count=len(questions))
+    session_state.qa_queue = questions
+    session_state.qa_history = []
+    session_state.qa_pairs = []  # Store Q&A pairs for context
+
+
+@timed("profile")
+def handle_profile_answer(session_state, user_input, on_text=None):
     """
-    Pop next question from queue, return follow-up and next question.
+    Collect candidate info sequentially into an interview_engine.InterviewSession.
+    When tech_stack is provided, generate 5 tech questions via Gemini.
+    If `on_text` is given, guidance and the first question are streamed to it.
+    Returns the field just filled, or a guidance/validation message.
     """
-    # Get the current question if available
-    current_question = session_state.current_question if hasattr(session_state, "current_question") else "interview question"
-    
-    # Use AI-powered context analyzer to check if response is on-topic
-    ai_context_analysis = analyze_response_context_with_gemini(
-        question=current_question,
-        answer=user_answer,
-        stage=session_state.stage
-    )
-    
+    current_field = session_state.current_field()
+    if current_field is None:
+        return None
+
+    # If the tech stack needs an AI context check, questions are generated
+    # while it runs and only used if the answer turns out to be on topic.
+    # Their preview is held back until then, so it never mixes with guidance.
+    speculative_questions = None
+    speculative_preview = _LatestText()
+
+    if _needs_context_check(current_field, user_input):
+        def start_speculative_questions():
+            nonlocal speculative_questions
+            if _should_speculate(current_field, user_input):
+                speculative_questions = submit(
+                    generate_question_with_gemini,
+                    _profile_for_prompt(session_state.candidate_info, _split_tech_stack(user_input)),
+                    on_text=speculative_preview
+                )
+
+        # Check locally first; escalate to AI analysis only when unsure
+        ai_context_analysis = analyze_response_context(
+            question=f"Please provide your {current_field.replace('_', ' ')}",
+            answer=user_input,
+            stage="GATHERING_INFO",
+            expected_field=current_field,
+            on_guidance=on_text,
+            on_escalate=start_speculative_questions
+        )
+        guidance = _profile_guidance(ai_context_analysis, current_field)
+        if guidance:
+            if speculative_questions:
+                # Only stops a call still queued; a running one finishes and is discarded
+                speculative_questions.cancel()
+            return guidance
+
+    error = _store_profile_answer(session_state, current_field, user_input)
+    if error:
+        return error
+
+    if current_field == "tech_stack":
+        log_event(log, logging.INFO, "questions.generating", speculative=speculative_questions is not None)
+        if speculative_questions:
+            questions_text = _speculative_result(speculative_questions, speculative_preview, on_text)
+        else:
+            questions_text = generate_question_with_gemini(
+                _profile_for_prompt(session_state.candidate_info, session_state.candidate_info[current_field]),
+                on_text=_first_question_preview(on_text)
+            )
+        _set_questions(session_state, questions_text)
+
+    return current_field  # Return the field just filled
+
+
+@timed("profile")
+async def handle_profile_answer_async(session_state, user_input, on_text=None):
+    """handle_profile_answer for asyncio front ends; LLM calls are awaited."""
+    current_field = session_state.current_field()
+    if current_field is None:
+        return None
+
+    speculative_questions = None
+    speculative_preview = _LatestText()
+
+    if _needs_context_check(current_field, user_input):
+        def start_speculative_questions():
+            nonlocal speculative_questions
+            if _should_speculate(current_field, user_input):
+                speculative_questions = asyncio.ensure_future(generate_question_async(
+                    _profile_for_prompt(session_state.candidate_info, _split_tech_stack(user_input)),
+                    on_text=speculative_preview
+                ))
+
+        ai_context_analysis = await analyze_response_context_async(
+            question=f"Please provide your {current_field.replace('_', ' ')}",
+            answer=user_input,
+            stage="GATHERING_INFO",
+            expected_field=current_field,
+            on_guidance=on_text,
+            on_escalate=start_speculative_questions
+        )
+        guidance = _profile_guidance(ai_context_analysis, current_field)
+        if guidance:
+            if speculative_questions:
+                speculative_questions.cancel()
+            return guidance
+
+    error = _store_profile_answer(session_state, current_field, user_input)
+    if error:
+        return error
+
+    if current_field == "tech_stack":
+        log_event(log, logging.INFO, "questions.generating", speculative=speculative_questions is not None)
+        if speculative_questions:
+            questions_text = await _speculative_result_async(speculative_questions, speculative_preview, on_text)
+        else:
+            questions_text = await generate_question_async(
+                _profile_for_prompt(session_state.candidate_info, session_state.candidate_info[current_field]),
+                on_text=_first_question_preview(on_text)
+            )
+        _set_questions(session_state, questions_text)
+
+    return current_field
+
+
+def _qa_redirect(ai_context_analysis, current_question, user_answer):
+    """Message asking the candidate to retry the current question, or None to accept the answer."""
     # If the AI detects the response is off-topic with high confidence, provide guidance
     if not ai_context_analysis.get("on_topic", True) and ai_context_analysis.get("confidence", 0) > 0.7:
-        guidance = ai_context_analysis.get("guidance", "Let's stay focused on the interview. Please answer the current question.")
-        return guidance, session_state.current_question  # Return guidance + repeat current question
-    
+        return ai_context_analysis.get("guidance", "Let's stay focused on the interview. Please answer the current question.")
+
     # Fall back to rule-based analysis for very short answers
     if len(user_answer.split()) < 3:
         # Very short answers might not be proper responses to technical questions
         # But avoid flagging simple answers to yes/no questions
-        if current_question and not any(q in current_question.lower() for q in ["yes or no", "have you", "do you", "did you"]):
-            return "Could you please elaborate on your answer? Technical questions typically require more detailed responses.", session_state.current_question
-            
-    # Store the answer if everything is valid
-    if hasattr(session_state, "current_question") and session_state.current_question:
-        # Add the Q&A pair to history if not already there
+        if not any(q in current_question.lower() for q in ["yes or no", "have you", "do you", "did you"]):
+            return "Could you please elaborate on your answer? Technical questions typically require more detailed responses."
+    return None
+
+
+def _accept_answer(session_state, user_answer):
+    """Store the answer, start scoring it and pop the next question; returns (followup, next_question)."""
+    if session_state.current_question:
         qa_pair = {
             "question": session_state.current_question,
             "answer": user_answer
         }
-        if hasattr(session_state, "qa_pairs"):
-            session_state.qa_pairs.append(qa_pair)
-        else:
-            session_state.qa_pairs = [qa_pair]
-    
-    # We've already stored the answer above, so no need to repeat that
-    followup = "Thanks for your answer!"
-    next_question = None
-
-    # Ensure queue exists
-    if not hasattr(session_state, "qa_queue"):
-        session_state.qa_queue = []
+        session_state.qa_pairs.append(qa_pair)
 
-    if not hasattr(session_state, "qa_history"):
-        session_state.qa_history = []
+        # Score this answer in the background while the next one is written
+        if INCREMENTAL_SCORING:
+            session_state.score_futures.append(score_answer_in_background(qa_pair["question"], qa_pair["answer"]))
 
     if session_state.qa_queue:
         next_question = session_state.qa_queue.pop(0)
         session_state.qa_history.append(next_question)
-    else:
-        session_state.stage = "CONCLUDED"
-        next_question = None
-        # Don't add the full closing message here, just a simple acknowledgment
-        # The app.py will handle the detailed closing message
-        followup = "Thank you for completing the interview!"
+        return "Thanks for your answer!", next_question
+
+    # Don't add the full closing message here, just a simple acknowledgment;
+    # the interview engine handles the stage change and closing message
+    return "Thank you for completing the interview!", None
+
 
-    return followup, next_question
+@timed("qa")
+def handle_qa(session_state, user_answer, on_text=None):
+    """
+    Pop next question from queue, return follow-up and next question.
+    If `on_text` is given, off-topic guidance is streamed to it.
+    Returns a None next question once the queue is exhausted; the caller
+    concludes the interview.
+    """
+    current_question = session_state.current_question or "interview question"
+
+    # Check locally first; escalate to AI analysis only when unsure
+    ai_context_analysis = analyze_response_context(
+        question=current_question,
+        answer=user_answer,
+        stage=session_state.stage,
+        on_guidance=on_text
+    )
+    redirect = _qa_redirect(ai_context_analysis, current_question, user_answer)
+    if redirect:
+        return redirect, session_state.current_question  # Repeat the current question
+    return _accept_answer(session_state, user_answer)
+
+
+@timed("qa")
+async def handle_qa_async(session_state, user_answer, on_text=None):
+    """handle_qa for asyncio front ends; an escalated context check is awaited."""
+    current_question = session_state.current_question or "interview question"
+    ai_context_analysis = await analyze_response_context_async(
+        question=current_question,
+        answer=user_answer,
+        stage=session_state.stage,
+        on_guidance=on_text
+    )
+    redirect = _qa_redirect(ai_context_analysis, current_question, user_answer)
+    if redirect:
+        return redirect, session_state.current_question
+    return _accept_answer(session_state, user_answer)
@@ -2,13 +2,20 @@
 Enhanced AI context analysis to better understand user intent
 """
 
+from text_matcher import scan
+from skill_taxonomy import mentions_skill
+
+# Confidence reported for each intent type
+INTENT_CONFIDENCE = {"question": 0.9, "command": 0.8, "meta": 0.7, "answer": 0.8}
+
 def analyze_intent(user_input: str, expected_field: str = None) -> dict:
     """
     A more intelligent analyzer to determine the user's intent from their input.
     
     Args:
         user_input: The user's input text
-        expected_field: What kind of answer we're expecting (e.g., "name", "email", "tech_stack")
+        expected_field: Profile field being collected, as named in conversation_manager.FIELDS
+            (e.g., "full_name", "email", "tech_stack")
         
     Returns:
         Dict with analysis results including:
@@ -19,29 +26,27 @@ def analyze_intent(user_input: str, expected_field: str = None) -> dict:
     # Default response
     result = {
         "intent_type": "answer",
-        "confidence": 0.8,
+        "confidence": INTENT_CONFIDENCE["answer"],
         "is_relevant": True
     }
     
-    # Clean the input
-    text = user_input.strip().lower()
+    # Lowercase and match every keyword category in one pass (see text_matcher)
+    matches = scan(user_input)
+    text = matches.text
     
     # Check for question patterns
-    question_indicators = ["?", "what", "how", "why", "where", "when", "who", "can you", "could you"]
-    has_question = "?" in text or any(text.startswith(q) for q in question_indicators)
+    has_question = "?" in text or matches.starts_with("question")
     
     # Check for command patterns
-    command_indicators = ["tell me", "show me", "give me", "i want", "please"]
-    has_command = any(c in text for c in command_indicators)
+    has_command = matches.has("command")
     
     # Check for meta-conversation patterns (talking about the conversation)
-    meta_indicators = ["this interview", "this conversation", "talking", "chat", "ask", "question"]
-    is_meta = any(m in text for m in meta_indicators)
+    is_meta = matches.has("meta")
     
     # Simple relevance check if we know the expected field
     is_relevant = True
     if expected_field:
-        if expected_field == "name" and len(text.split()) <= 3:
+        if expected_field == "full_name" and matches.word_count <= 3:
             # Names are typically 1-3 words
             is_relevant = True
         elif expected_field == "email" and ("@" in text and "." in text):
@@ -51,24 +56,19 @@ def analyze_intent(user_input: str, expected_field: str = None) -> dict:
             # Phone should have digits
             is_relevant = True
         elif expected_field == "tech_stack":
-            # Check for common tech terms
-            tech_terms = ["javascript", "python", "java", "html", "css", "react", "angular", 
-                         "node", "express", "django", "flask", "ruby", "c++", "c#", "php", 
-                         "typescript", "sql", "nosql", "mongo", "mysql", "postgres"]
-            is_relevant = any(term in text for term in tech_terms)
+            # Check for a known skill or one of its aliases
+            is_relevant = mentions_skill(user_input)
     
     # Determine intent type
     if has_question:
         result["intent_type"] = "question"
-        result["confidence"] = 0.9
     elif has_command:
         result["intent_type"] = "command"
-        result["confidence"] = 0.8
     elif is_meta:
         result["intent_type"] = "meta"
-        result["confidence"] = 0.7
     else:
         result["intent_type"] = "answer"
+    result["confidence"] = INTENT_CONFIDENCE[result["intent_type"]]
     
     # Update relevance
     result["is_relevant"] = is_relevant
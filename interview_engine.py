@@ -0,0 +1,329 @@
+"""
+Headless interview engine.
+
+An InterviewSession holds everything one interview needs (transcript,
+profile, question queue, Q/A pairs, background scoring futures, LLM usage
+ledger) in a compact __slots__ object, and moves through an explicit stage
+machine:
+
+    GATHERING_INFO -> QA -> CONCLUDED
+    GATHERING_INFO -> CONCLUDED        (no questions could be generated)
+
+InterviewEngine drives a session one candidate message at a time:
+submit() records the message, runs the profile or QA handler, applies the
+stage transition and returns the assistant messages for the turn. When the
+QA stage ends it sends the thank-you email, scores the answers and saves the
+candidate. Nothing here depends on Streamlit, so app.py, the benchmarks and
+any other front end share the same flow. submit_async() is the same turn
+for asyncio front ends (interview_server.py): LLM calls, the email and the
+save are awaited on worker threads instead of blocking the event loop.
+
+A session must not be submitted to from two threads at once; different
+sessions can run concurrently.
+"""
+
+import json
+import logging
+import time
+
+from conversation_manager import (
+    handle_profile_answer, handle_qa, handle_profile_answer_async, handle_qa_async, FIELDS,
+)
+from fallbacks import get_fallback_questions
+from scoring import score_answers, collect_scores, score_answers_async, collect_scores_async
+from task_pool import run_blocking
+from skill_taxonomy import skill_names
+from llm_accounting import LLMUsageLedger, bind_ledger, unbind_ledger
+from logging_setup import get_logger, log_event
+
+log = get_logger(__name__)
+
+GATHERING_INFO = "GATHERING_INFO"
+QA = "QA"
+CONCLUDED = "CONCLUDED"
+
+# Allowed stage transitions
+TRANSITIONS = {
+    GATHERING_INFO: frozenset([QA, CONCLUDED]),
+    QA: frozenset([CONCLUDED]),
+    CONCLUDED: frozenset(),
+}
+
+WELCOME_MESSAGE = (
+    "Hi there! 👋 I'm your AI hiring assistant. I'll be conducting your initial screening interview today. "
+    "Let's start with some basic information.\n\nPlease provide your full name."
+)
+
+NO_QUESTIONS_MESSAGE = "Sorry, no technical questions could be generated. The interview is now concluded."
+
+CONCLUSION_MESSAGE = """
+### Thank you for completing your technical screening interview! 🎉
+
+Your responses have been recorded and will be evaluated by our team. Here's what happens next:
+
+1. Our team will review your technical answers
+2. If your profile matches our requirements, we'll contact you for the next round
+3. You should hear back from us within 5 business days
+
+If you have any questions about the process, please contact our HR team at careers@example.com.
+
+Best of luck with your application!
+                """
+
+
+class InvalidTransition(ValueError):
+    """Raised when a session is moved to a stage its current stage cannot reach."""
+
+
+class InterviewSession:
+    """State of one interview."""
+
+    __slots__ = (
+        "messages", "candidate_info", "stage", "current_question",
+        "qa_queue", "qa_history", "qa_pairs", "score_futures",
+        "llm_ledger", "started_at", "report", "email_sent", "email_error",
+    )
+
+    def __init__(self, greeting=WELCOME_MESSAGE):
+        self.messages = [{"role": "assistant", "content": greeting}] if greeting else []
+        self.candidate_info = {}
+        self.stage = GATHERING_INFO
+        self.current_question = None
+        self.qa_queue = []
+        self.qa_history = []
+        self.qa_pairs = []
+        self.score_futures = []
+        self.llm_ledger = LLMUsageLedger()
+        self.started_at = time.time()
+        # Parsed scoring report (list of dicts, or the raw text if it didn't parse)
+        self.report = None
+        # Thank-you email outcome: None until attempted
+        self.email_sent = None
+        self.email_error = None
+
+    def advance(self, stage):
+        """Move to `stage`, enforcing TRANSITIONS."""
+        if stage not in TRANSITIONS[self.stage]:
+            raise InvalidTransition(f"cannot move from {self.stage} to {stage}")
+        self.stage = stage
+
+    @property
+    def concluded(self):
+        return self.stage == CONCLUDED
+
+    def current_field(self):
+        """Next profile field to collect, or None once the profile is complete."""
+        for field in FIELDS:
+            if field not in self.candidate_info:
+                return field
+        return None
+
+    def progress(self):
+        """Interview progress in percent: profile fields are the first half, questions the second."""
+        if self.stage == GATHERING_INFO:
+            completed_fields = sum(1 for field in FIELDS if field in self.candidate_info)
+            return int((completed_fields / len(FIELDS)) * 50)
+        if self.stage == QA:
+            total_questions = len(self.qa_queue) + len(self.qa_history)
+            if total_questions > 0:
+                return 50 + int((len(self.qa_history) / total_questions) * 50)
+            return 50
+        return 100
+
+    def _say(self, content, responses):
+        self.messages.append({"role": "assistant", "content": content})
+        responses.append(content)
+
+
+class InterviewEngine:
+    """
+    Runs interviews on InterviewSession objects.
+
+    Args:
+        send_email: Callable (email, name) -> bool sending the thank-you
+            email, or None to skip it
+        save: Callable taking the candidate record to persist, or None
+    """
+
+    def __init__(self, send_email=None, save=None):
+        self.send_email = send_email
+        self.save = save
+
+    def start(self, greeting=WELCOME_MESSAGE):
+        """A new session, opened with `greeting`."""
+        return InterviewSession(greeting)
+
+    def submit(self, session, message, on_text=None):
+        """
+        Process one candidate message.
+
+        The message and the assistant's replies are appended to
+        session.messages. If `on_text` is given, guidance and the first
+        question are streamed to it as they are generated.
+
+        Returns:
+            list: Assistant messages for this turn (empty once concluded)
+        """
+        token = self._begin_turn(session, message)
+        try:
+            responses = []
+            if session.stage == GATHERING_INFO:
+                field_or_message = handle_profile_answer(session, message, on_text=on_text)
+                self._after_profile(session, field_or_message, responses)
+            elif session.stage == QA:
+                followup, next_question = handle_qa(session, message, on_text=on_text)
+                if self._after_qa(session, followup, next_question, responses):
+                    self.finish(session)
+            return responses
+        finally:
+            unbind_ledger(token)
+
+    async def submit_async(self, session, message, on_text=None):
+        """submit() for asyncio front ends; `on_text` is called on the event loop."""
+        token = self._begin_turn(session, message)
+        try:
+            responses = []
+            if session.stage == GATHERING_INFO:
+                field_or_message = await handle_profile_answer_async(session, message, on_text=on_text)
+                self._after_profile(session, field_or_message, responses)
+            elif session.stage == QA:
+                followup, next_question = await handle_qa_async(session, message, on_text=on_text)
+                if self._after_qa(session, followup, next_question, responses):
+                    await self.finish_async(session)
+            return responses
+        finally:
+            unbind_ledger(token)
+
+    @staticmethod
+    def _begin_turn(session, message):
+        """Bind the session's ledger, start a turn and record the message; returns the bind token."""
+        token = bind_ledger(session.llm_ledger)
+        log_event(log, logging.DEBUG, "turn.start", stage=session.stage, input_chars=len(message))
+        session.llm_ledger.begin_turn()
+        session.messages.append({"role": "user", "content": message})
+        return token
+
+    @staticmethod
+    def _after_profile(session, field_or_message, responses):
+        if field_or_message not in FIELDS:
+            # Guidance from context handling; the same field is asked again
+            if field_or_message:
+                session._say(field_or_message, responses)
+            return
+
+        next_field = session.current_field()
+        if next_field:
+            session._say(f"Got it! Now please provide your {next_field.replace('_', ' ')}.", responses)
+            return
+
+        # Tech stack collected → start QA, with fallback questions if generation failed
+        if not session.qa_queue:
+            session.qa_queue = list(get_fallback_questions())
+        if not session.qa_queue:
+            session.advance(CONCLUDED)
+            session._say(NO_QUESTIONS_MESSAGE, responses)
+            return
+        first_question = session.qa_queue.pop(0)
+        session.current_question = first_question
+        session.qa_history.append(first_question)
+        session.advance(QA)
+        session._say(
+            "Great! Now I'll ask you a series of technical questions based on your profile. "
+            f"Please answer each question thoroughly.\n\nLet's start:\n\n{first_question}",
+            responses,
+        )
+
+    def _after_qa(self, session, followup, next_question, responses):
+        """Apply handle_qa's result; returns True if the interview just concluded."""
+        session._say(followup, responses)
+
+        if next_question:
+            session.current_question = next_question
+            # A repeated question (after guidance) is already in the transcript
+            if next_question not in [msg["content"] for msg in session.messages]:
+                session._say(next_question, responses)
+            return False
+
+        session.advance(CONCLUDED)
+        # handle_qa's own acknowledgement may already have closed the interview
+        last_messages = [msg["content"] for msg in session.messages[-3:]]
+        if not any("completing" in msg.lower() for msg in last_messages):
+            session._say(self.conclusion(session), responses)
+        return True
+
+    def conclusion(self, session):
+        """Closing message with the candidate's submitted information."""
+        text = CONCLUSION_MESSAGE + "\n\n#### Your Submitted Information\n"
+        for field, value in session.candidate_info.items():
+            if field == "tech_stack" and isinstance(value, list):
+                value = ", ".join(skill_names(value))
+            text += f"**{field.replace('_', ' ').title()}:** {value}  \n"
+        return text
+
+    def finish(self, session):
+        """Send the thank-you email, score the answers and save the candidate."""
+        candidate_email = session.candidate_info.get("email")
+        if candidate_email and self.send_email is not None:
+            try:
+                session.email_sent = bool(self.send_email(candidate_email, session.candidate_info.get("full_name")))
+            except Exception as e:
+                session.email_sent = False
+                session.email_error = str(e)
+
+        questions, answers = self._transcript(session)
+        if questions and answers and len(questions) == len(answers):
+            # Answers were scored in the background as they came in
+            if session.score_futures and len(session.score_futures) == len(questions):
+                scoring_json = collect_scores(session.score_futures, questions, answers)
+            else:
+                scoring_json = score_answers(questions, answers)
+            session.report = _parse_report(scoring_json)
+
+        # Save once scoring is done so the record carries the interview's full LLM usage
+        if self.save is not None:
+            self.save(self._record(session))
+
+    async def finish_async(self, session):
+        """finish() with the email, scoring and save awaited on worker threads."""
+        candidate_email = session.candidate_info.get("email")
+        if candidate_email and self.send_email is not None:
+            try:
+                sent = await run_blocking(self.send_email, candidate_email, session.candidate_info.get("full_name"))
+                session.email_sent = bool(sent)
+            except Exception as e:
+                session.email_sent = False
+                session.email_error = str(e)
+
+        questions, answers = self._transcript(session)
+        if questions and answers and len(questions) == len(answers):
+            if session.score_futures and len(session.score_futures) == len(questions):
+                scoring_json = await collect_scores_async(session.score_futures, questions, answers)
+            else:
+                scoring_json = await score_answers_async(questions, answers)
+            session.report = _parse_report(scoring_json)
+
+        if self.save is not None:
+            await run_blocking(self.save, self._record(session))
+
+    @staticmethod
+    def _record(session):
+        """Candidate record to save: the profile plus the interview's LLM usage."""
+        return {**session.candidate_info, "llm_usage": session.llm_ledger.summary()}
+
+    @staticmethod
+    def _transcript(session):
+        """(questions, answers) to score, from the Q/A pairs or else the message history."""
+        if session.qa_pairs:
+            return ([pair["question"] for pair in session.qa_pairs],
+                    [pair["answer"] for pair in session.qa_pairs])
+        questions = session.qa_history
+        answers = [msg["content"] for msg in session.messages if msg["role"] == "user"]
+        return questions, answers[-len(questions):] if questions else []
+
+
+def _parse_report(scoring_json):
+    """Scoring JSON as a list of dicts, or the raw text if it didn't parse."""
+    try:
+        return json.loads(scoring_json)
+    except Exception:
+        return scoring_json
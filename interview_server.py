@@ -0,0 +1,496 @@
+"""
+Asyncio HTTP + WebSocket server for the interview flow.
+
+Runs interviews through InterviewEngine.submit_async on a single event loop,
+so one process holds thousands of concurrent sessions: an idle interview is
+just an InterviewSession in a dict, and a running turn awaits its LLM calls,
+email and save on worker threads (task_pool.run_blocking) instead of
+holding a thread of its own. Built on asyncio streams only, like the
+metrics exporter on http.server.
+
+Routes (JSON bodies and responses):
+
+    POST   /sessions                  start an interview -> session_id, messages
+    GET    /sessions/{id}             transcript, stage and progress
+    POST   /sessions/{id}/messages    {"message": "..."} -> assistant responses
+    GET    /sessions/{id}/report      scoring report once concluded (409 before)
+    DELETE /sessions/{id}             drop the session
+    GET    /sessions/{id}/stream      WebSocket of session events
+    GET    /health                    live session count
+
+The stream first replays the transcript, then pushes events as they happen:
+{"type": "message", "role", "content"} for every message,
+{"type": "partial", "text"} while an assistant reply is being streamed, and
+{"type": "turn", "stage", "progress"} when a turn ends, and
+{"type": "error", "status", "error"} when a turn submitted over the socket
+fails. Clients may also send {"message": "..."} text frames over the socket
+to submit answers.
+
+One turn runs at a time per session; a second submit while one is running
+gets 409. Sessions idle for SERVER_SESSION_TTL_SECONDS are dropped, open
+streams included: they get {"type": "expired"} and are closed.
+
+Usage (from the repo root):
+    python interview_server.py --host 127.0.0.1 --port 8080
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import re
+import secrets
+import struct
+import time
+
+from interview_engine import InterviewEngine
+from storage import save_candidate
+from mail_service import send_thank_you_email_mailjet
+from skill_taxonomy import get_taxonomy
+from task_pool import run_blocking
+from metrics import start_exporter
+from logging_setup import get_logger, log_event
+from config import (
+    SERVER_HOST,
+    SERVER_PORT,
+    SERVER_MAX_SESSIONS,
+    SERVER_SESSION_TTL_SECONDS,
+    SERVER_MAX_BODY_BYTES,
+)
+
+log = get_logger(__name__)
+
+# Seconds a keep-alive connection may sit idle between requests
+KEEPALIVE_SECONDS = 30
+MAX_HEADERS = 100
+# Partial-text events queued per stream subscriber before new ones are dropped;
+# each partial carries the full text so far, so skipping some loses nothing
+MAX_QUEUED_PARTIALS = 32
+SWEEP_SECONDS = 60
+# Queued for a stream subscriber to close its socket
+_CLOSE_STREAM = None
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+_WS_CONTINUATION, _WS_TEXT, _WS_BINARY, _WS_CLOSE, _WS_PING, _WS_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+_SESSION_ROUTE = re.compile(r"^/sessions/([A-Za-z0-9_-]+)(/messages|/report|/stream)?$")
+
+_REASONS = {
+    200: "OK", 201: "Created", 204: "No Content", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large", 426: "Upgrade Required",
+    500: "Internal Server Error", 501: "Not Implemented", 503: "Service Unavailable",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class _LiveSession:
+    """An InterviewSession plus what the server needs to run and stream it."""
+
+    __slots__ = ("session", "lock", "subscribers", "last_seen")
+
+    def __init__(self, session):
+        self.session = session
+        self.lock = asyncio.Lock()
+        self.subscribers = set()
+        self.last_seen = time.monotonic()
+
+    def publish(self, event):
+        for queue in self.subscribers:
+            if event["type"] != "partial" or queue.qsize() < MAX_QUEUED_PARTIALS:
+                queue.put_nowait(event)
+
+    def close_streams(self):
+        """Tell every stream subscriber the session expired and close its socket."""
+        self.publish({"type": "expired"})
+        for queue in self.subscribers:
+            queue.put_nowait(_CLOSE_STREAM)
+
+
+class InterviewServer:
+    """
+    Session registry and request handling.
+
+    Args:
+        engine: InterviewEngine to run turns with (default: email and storage enabled)
+        max_sessions: Live sessions allowed before new ones get 503
+        session_ttl: Idle seconds before a session is dropped
+    """
+
+    def __init__(self, engine=None, max_sessions=SERVER_MAX_SESSIONS, session_ttl=SERVER_SESSION_TTL_SECONDS):
+        self.engine = engine or InterviewEngine(send_email=send_thank_you_email_mailjet, save=save_candidate)
+        self.max_sessions = max_sessions
+        self.session_ttl = session_ttl
+        self.sessions = {}
+
+    # --- Interview operations ---
+
+    def create_session(self):
+        if len(self.sessions) >= self.max_sessions:
+            raise HTTPError(503, "too many live sessions")
+        session_id = secrets.token_urlsafe(16)
+        self.sessions[session_id] = _LiveSession(self.engine.start())
+        log_event(log, logging.INFO, "server.session_started", sessions=len(self.sessions))
+        return session_id
+
+    def get(self, session_id):
+        live = self.sessions.get(session_id)
+        if live is None:
+            raise HTTPError(404, "unknown session")
+        live.last_seen = time.monotonic()
+        return live
+
+    async def submit(self, live, message):
+        """Run one turn and publish its events; returns the assistant responses."""
+        if not isinstance(message, str) or not message.strip():
+            raise HTTPError(400, "message must be a non-empty string")
+        if live.lock.locked():
+            raise HTTPError(409, "a turn is already in progress for this session")
+        async with live.lock:
+            live.publish({"type": "message", "role": "user", "content": message})
+            responses = await self.engine.submit_async(
+                live.session, message, on_text=lambda text: live.publish({"type": "partial", "text": text})
+            )
+            for content in responses:
+                live.publish({"type": "message", "role": "assistant", "content": content})
+            live.publish({"type": "turn", "stage": live.session.stage, "progress": live.session.progress()})
+            live.last_seen = time.monotonic()
+        return responses
+
+    @staticmethod
+    def state(session_id, live):
+        session = live.session
+        return {
+            "session_id": session_id,
+            "stage": session.stage,
+            "progress": session.progress(),
+            "messages": session.messages,
+        }
+
+    @staticmethod
+    def report(session_id, live):
+        session = live.session
+        if not session.concluded:
+            raise HTTPError(409, "the interview has not concluded yet")
+        return {
+            "session_id": session_id,
+            "stage": session.stage,
+            "report": session.report,
+            "email_sent": session.email_sent,
+            "llm_usage": session.llm_ledger.summary(),
+        }
+
+    async def sweep(self):
+        """Drop idle sessions every SWEEP_SECONDS."""
+        while True:
+            await asyncio.sleep(SWEEP_SECONDS)
+            self.expire_idle()
+
+    def expire_idle(self):
+        """Drop sessions idle for session_ttl, closing their streams; returns how many."""
+        cutoff = time.monotonic() - self.session_ttl
+        expired = [
+            session_id for session_id, live in self.sessions.items()
+            if live.last_seen < cutoff and not live.lock.locked()
+        ]
+        for session_id in expired:
+            self.sessions.pop(session_id).close_streams()
+        if expired:
+            log_event(log, logging.INFO, "server.sessions_expired", count=len(expired), sessions=len(self.sessions))
+        return len(expired)
+
+    # --- HTTP ---
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(_read_request(reader), KEEPALIVE_SECONDS)
+                except HTTPError as e:
+                    await _write_json(writer, e.status, {"error": e.message}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, path, headers, body, keep_alive = request
+                if headers.get("upgrade", "").lower() == "websocket":
+                    await self.handle_websocket(path, headers, reader, writer)
+                    break
+                status, payload = await self.route(method, path, body)
+                await _write_json(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def route(self, method, path, body):
+        """(status, JSON payload) for one HTTP request."""
+        try:
+            path = path.split("?", 1)[0]
+            if path == "/health":
+                _allow(method, "GET")
+                return 200, {"status": "ok", "sessions": len(self.sessions)}
+            if path == "/sessions":
+                _allow(method, "POST")
+                session_id = self.create_session()
+                return 201, self.state(session_id, self.sessions[session_id])
+            match = _SESSION_ROUTE.match(path)
+            if not match:
+                raise HTTPError(404, "not found")
+            session_id, action = match.groups()
+            live = self.get(session_id)
+            if action is None:
+                _allow(method, "GET", "DELETE")
+                if method == "DELETE":
+                    del self.sessions[session_id]
+                    return 204, None
+                return 200, self.state(session_id, live)
+            if action == "/messages":
+                _allow(method, "POST")
+                responses = await self.submit(live, _json_body(body).get("message"))
+                session = live.session
+                return 200, {"responses": responses, "stage": session.stage, "progress": session.progress()}
+            if action == "/report":
+                _allow(method, "GET")
+                return 200, self.report(session_id, live)
+            raise HTTPError(426, "the stream endpoint requires a WebSocket upgrade")
+        except HTTPError as e:
+            return e.status, {"error": e.message}
+        except Exception as e:
+            log_event(log, logging.ERROR, "server.request_failed", "Request failed", path=path, error=str(e))
+            return 500, {"error": "internal error"}
+
+    # --- WebSocket ---
+
+    async def handle_websocket(self, path, headers, reader, writer):
+        match = _SESSION_ROUTE.match(path.split("?", 1)[0])
+        key = headers.get("sec-websocket-key")
+        if not match or match.group(2) != "/stream" or not key:
+            await _write_json(writer, 404, {"error": "not found"}, keep_alive=False)
+            return
+        live = self.sessions.get(match.group(1))
+        if live is None:
+            await _write_json(writer, 404, {"error": "unknown session"}, keep_alive=False)
+            return
+
+        accept = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode("ascii")).digest()).decode("ascii")
+        writer.write(
+            "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n".encode("ascii")
+        )
+        queue = asyncio.Queue()
+        for message in live.session.messages:
+            queue.put_nowait({"type": "message", **message})
+        live.subscribers.add(queue)
+        sender = asyncio.ensure_future(_send_events(queue, writer))
+        turns = set()
+        try:
+            while True:
+                opcode, payload = await _read_frame(reader, writer)
+                if opcode == _WS_CLOSE:
+                    break
+                live.last_seen = time.monotonic()
+                if opcode != _WS_TEXT:
+                    continue
+                # Turns run alongside the reader so pings and closes are still handled
+                turn = asyncio.ensure_future(self._submit_from_socket(live, payload, queue))
+                turns.add(turn)
+                turn.add_done_callback(turns.discard)
+        except (asyncio.IncompleteReadError, ConnectionError, HTTPError):
+            pass
+        finally:
+            live.subscribers.discard(queue)
+            live.last_seen = time.monotonic()
+            sender.cancel()
+            if not writer.is_closing():
+                try:
+                    writer.write(_frame(_WS_CLOSE, b""))
+                    await writer.drain()
+                except ConnectionError:
+                    pass
+
+    async def _submit_from_socket(self, live, payload, queue):
+        try:
+            message = json.loads(payload.decode("utf-8")).get("message")
+            await self.submit(live, message)
+        except HTTPError as e:
+            queue.put_nowait({"type": "error", "status": e.status, "error": e.message})
+        except (ValueError, AttributeError):
+            queue.put_nowait({"type": "error", "status": 400, "error": "expected a JSON object with a message"})
+        except Exception as e:
+            log_event(log, logging.ERROR, "server.turn_failed", "WebSocket turn failed", error=str(e))
+            queue.put_nowait({"type": "error", "status": 500, "error": "internal error"})
+
+
+def _allow(method, *allowed):
+    if method not in allowed:
+        raise HTTPError(405, f"use {' or '.join(allowed)}")
+
+
+def _json_body(body):
+    try:
+        data = json.loads(body.decode("utf-8")) if body else {}
+    except ValueError:
+        raise HTTPError(400, "body must be JSON")
+    if not isinstance(data, dict):
+        raise HTTPError(400, "body must be a JSON object")
+    return data
+
+
+async def _read_request(reader):
+    """(method, path, headers, body, keep_alive) for the next request, or None at end of stream."""
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, path, version = line.decode("latin-1").split()
+    except ValueError:
+        raise HTTPError(400, "malformed request line")
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        if len(headers) >= MAX_HEADERS:
+            raise HTTPError(400, "too many headers")
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        raise HTTPError(501, "chunked request bodies are not supported")
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise HTTPError(400, "invalid Content-Length")
+    if length > SERVER_MAX_BODY_BYTES:
+        raise HTTPError(413, "request body too large")
+    body = await reader.readexactly(length) if length > 0 else b""
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+    return method.upper(), path, headers, body, keep_alive
+
+
+async def _write_json(writer, status, payload, keep_alive):
+    body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+    head = [f"HTTP/1.1 {status} {_REASONS.get(status, 'Unknown')}", f"Content-Length: {len(body)}"]
+    if body:
+        head.append("Content-Type: application/json")
+    head.append("Connection: keep-alive" if keep_alive else "Connection: close")
+    writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+
+
+def _frame(opcode, payload):
+    """One unmasked, final server frame."""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+async def _read_frame(reader, writer):
+    """
+    Next data or close message as (opcode, payload).
+
+    Reassembles fragmented messages and answers pings on the way.
+    """
+    message_opcode, parts, size = None, [], 0
+    while True:
+        first, second = await reader.readexactly(2)
+        fin, opcode = first & 0x80, first & 0x0F
+        if not second & 0x80:
+            raise HTTPError(400, "client frames must be masked")
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", await reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", await reader.readexactly(8))[0]
+        if size + length > SERVER_MAX_BODY_BYTES:
+            raise HTTPError(413, "message too large")
+        mask = await reader.readexactly(4)
+        payload = _unmask(await reader.readexactly(length), mask)
+
+        if opcode == _WS_PING:
+            writer.write(_frame(_WS_PONG, payload))
+            await writer.drain()
+            continue
+        if opcode == _WS_PONG:
+            continue
+        if opcode == _WS_CLOSE:
+            return opcode, payload
+        # Control frames may arrive between the fragments of a message
+        if opcode != _WS_CONTINUATION:
+            message_opcode, parts, size = opcode, [], 0
+        parts.append(payload)
+        size += length
+        if fin:
+            return message_opcode, b"".join(parts)
+
+
+def _unmask(data, mask):
+    if not data:
+        return data
+    key = (mask * (len(data) // 4 + 1))[:len(data)]
+    return (int.from_bytes(data, "big") ^ int.from_bytes(key, "big")).to_bytes(len(data), "big")
+
+
+async def _send_events(queue, writer):
+    try:
+        while True:
+            event = await queue.get()
+            if event is _CLOSE_STREAM:
+                # Closing the transport also ends the handler's frame reader
+                writer.write(_frame(_WS_CLOSE, b""))
+                await writer.drain()
+                writer.close()
+                return
+            writer.write(_frame(_WS_TEXT, json.dumps(event).encode("utf-8")))
+            await writer.drain()
+    except ConnectionError:
+        pass
+
+
+async def serve(host=SERVER_HOST, port=SERVER_PORT, server=None):
+    """Run the interview server until cancelled."""
+    server = server or InterviewServer()
+    start_exporter()
+    # Load the skill taxonomy before the first tech stack answer needs it
+    await run_blocking(get_taxonomy)
+    listener = await asyncio.start_server(server.handle_connection, host, port)
+    sweeper = asyncio.ensure_future(server.sweep())
+    log_event(log, logging.INFO, "server.started", host=host, port=port)
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        sweeper.cancel()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,32 @@
-import google.generativeai as genai
-from config import GOOGLE_API_KEY
+import logging
 
-if GOOGLE_API_KEY:
-    genai.configure(api_key=GOOGLE_API_KEY)
+from llm_gateway import generate_text
+from question_cache import question_cache, make_key
+from metrics import inc, timed
+from llm_accounting import note_fallback
+from task_pool import run_blocking, threadsafe_callback
+from logging_setup import get_logger, log_event
 
-def generate_question_with_gemini(candidate_info):
+log = get_logger(__name__)
+
+@timed("question_generation")
+def generate_question_with_gemini(candidate_info, on_text=None):
     """
     Generate technical questions based on candidate's tech stack & experience.
     Returns a string with questions separated by newlines.
+    Question sets are served from the shared question cache when a pool of
+    sets already exists for the same stack and experience band.
+    If `on_text` is given, it receives the accumulated text as it streams in.
     """
     tech_stack = ", ".join(candidate_info.get("tech_stack", ["Python"]))
     experience = candidate_info.get("experience_years", 0)
+    cache_key = make_key(candidate_info.get("tech_stack", ["Python"]), experience)
+    cached = question_cache.get(cache_key)
+    inc("cache_lookups_total", cache="question", result="hit" if cached else "miss")
+    if cached:
+        if on_text:
+            on_text(cached)
+        return cached
     prompt = (
         f"Generate FIVE short, conversational technical interview questions "
         f"for a candidate with {experience} years experience in {tech_stack}. "
@@ -18,25 +34,38 @@ def generate_question_with_gemini(candidate_info):
     )
 
     try:
-        model = genai.GenerativeModel("gemini-1.5-flash-latest")
-        response = model.generate_content([
-            {"role": "user", "parts": [{"text": prompt}]}
-        ])
-        questions = response.text.strip()
+        questions = generate_text(prompt, purpose="question_generation", on_text=on_text)
         
         # Validate response
         if not questions or "[LLM_ERROR]" in questions:
             from fallbacks import get_fallback_questions
+            inc("fallbacks_total", kind="questions")
+            note_fallback("question_generation")
             return "\n".join(get_fallback_questions())
             
         # Check if we got at least a reasonable number of lines
         lines = [line for line in questions.split("\n") if line.strip()]
         if len(lines) < 2:  # We should have at least a couple of questions
             from fallbacks import get_fallback_questions
+            inc("fallbacks_total", kind="questions")
+            note_fallback("question_generation")
             return "\n".join(get_fallback_questions())
-            
+
+        question_cache.put(cache_key, questions)
         return questions
     except Exception as e:
         from fallbacks import get_fallback_questions
-        print(f"LLM Error: {str(e)}")
+        log_event(log, logging.WARNING, "questions.llm_error", "Question generation failed", error=str(e))
+        inc("fallbacks_total", kind="questions")
+        note_fallback("question_generation")
         return "\n".join(get_fallback_questions())
+
+
+async def generate_question_async(candidate_info, on_text=None):
+    """
+    Awaitable generate_question_with_gemini for asyncio front ends.
+
+    The cache lookup and gateway call run on a worker thread; `on_text` is
+    called on the event loop.
+    """
+    return await run_blocking(generate_question_with_gemini, candidate_info, on_text=threadsafe_callback(on_text))
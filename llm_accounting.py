@@ -0,0 +1,135 @@
+"""
+Per-interview LLM cost and latency accounting.
+
+Each interview owns an LLMUsageLedger, bound to the running context with
+bind_ledger(). While it is bound, the gateway records every call's purpose,
+prompt/response size, duration and outcome in it. The shared task pool runs
+work in a copy of the submitter's context, so background scoring and
+speculative question generation are charged to the interview that started
+them.
+
+Token counts are estimated from character counts; the gateway only sees
+text, not the provider's usage metadata.
+"""
+
+import contextvars
+import threading
+
+from rate_limiter import PRIORITY_NAMES
+
+# Rough characters per token for English prompts and responses
+CHARS_PER_TOKEN = 4
+
+SUCCESS = "success"
+FALLBACK = "fallback"
+ERROR = "error"
+# Answered by another caller's identical in-flight request: no provider call, no cost
+COALESCED = "coalesced"
+
+_current = contextvars.ContextVar("llm_usage_ledger", default=None)
+
+
+def estimate_tokens(chars):
+    return (chars + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+class LLMUsageLedger:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = []
+        self._turn = 0
+
+    def begin_turn(self):
+        """Start attributing calls to the next candidate turn."""
+        with self._lock:
+            self._turn += 1
+
+    def record(self, purpose, priority, prompt_chars, response_chars, seconds, outcome):
+        with self._lock:
+            self._calls.append({
+                "turn": self._turn,
+                "purpose": purpose,
+                "priority": PRIORITY_NAMES.get(priority, str(priority)),
+                "prompt_chars": prompt_chars,
+                "response_chars": response_chars,
+                "ms": round(seconds * 1000, 1),
+                "outcome": outcome,
+            })
+
+    def mark_fallback(self, purpose):
+        """Mark the latest `purpose` call as replaced by a fallback, or record a fallback without a call."""
+        with self._lock:
+            for call in reversed(self._calls):
+                if call["purpose"] == purpose and call["outcome"] != FALLBACK:
+                    call["outcome"] = FALLBACK
+                    return
+            self._calls.append({
+                "turn": self._turn, "purpose": purpose, "priority": None,
+                "prompt_chars": 0, "response_chars": 0, "ms": 0.0, "outcome": FALLBACK,
+            })
+
+    def summary(self):
+        """
+        Aggregate usage for the interview.
+
+        `wait_ms` covers interactive calls only, i.e. time the candidate spent
+        waiting on the model; batch calls (scoring) run in the background.
+        Coalesced calls count towards `wait_ms` and `outcomes` but not towards
+        `calls`, since another request paid for them.
+        `calls_detail` keeps every call so slow or expensive turns can be found.
+        """
+        with self._lock:
+            calls = [dict(call) for call in self._calls]
+
+        def totals(entries):
+            prompt_chars = sum(c["prompt_chars"] for c in entries)
+            response_chars = sum(c["response_chars"] for c in entries)
+            outcomes = {}
+            for c in entries:
+                outcomes[c["outcome"]] = outcomes.get(c["outcome"], 0) + 1
+            return {
+                "calls": sum(1 for c in entries if c["outcome"] != COALESCED),
+                "prompt_chars": prompt_chars,
+                "response_chars": response_chars,
+                "est_tokens": estimate_tokens(prompt_chars) + estimate_tokens(response_chars),
+                "total_ms": round(sum(c["ms"] for c in entries), 1),
+                "max_ms": max((c["ms"] for c in entries), default=0.0),
+                "outcomes": outcomes,
+            }
+
+        by_purpose = {}
+        for call in calls:
+            by_purpose.setdefault(call["purpose"], []).append(call)
+        result = totals(calls)
+        result["wait_ms"] = round(sum(c["ms"] for c in calls if c["priority"] == "interactive"), 1)
+        result["by_purpose"] = {purpose: totals(entries) for purpose, entries in by_purpose.items()}
+        result["calls_detail"] = calls
+        return result
+
+
+def bind_ledger(ledger):
+    """Charge LLM calls made in the current context (and work it submits) to `ledger`."""
+    return _current.set(ledger)
+
+
+def unbind_ledger(token):
+    """Restore the ledger bound before the bind_ledger() call that returned `token`."""
+    _current.reset(token)
+
+
+def current_ledger():
+    return _current.get()
+
+
+def record_call(purpose, priority, prompt_chars, response_chars, seconds, outcome):
+    """Record a call in the bound ledger, if any."""
+    ledger = _current.get()
+    if ledger is not None:
+        ledger.record(purpose, priority, prompt_chars, response_chars, seconds, outcome)
+
+
+def note_fallback(purpose):
+    """Record that a fallback replaced the result of a `purpose` call, if a ledger is bound."""
+    ledger = _current.get()
+    if ledger is not None:
+        ledger.mark_fallback(purpose)
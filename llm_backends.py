@@ -0,0 +1,252 @@
+"""
+Pluggable backends behind llm_gateway.
+
+- GeminiBackend talks to the live Gemini API.
+- RecordingBackend wraps another backend and appends every prompt/response
+  pair to a JSON Lines cassette file.
+- ReplayBackend serves responses from a cassette with synthetic latency.
+- SyntheticBackend fabricates plausible responses for each call purpose.
+
+The non-Gemini backends never touch the network, which lets the interview
+flow be benchmarked and load-tested on isolated machines and separates the
+app's own overhead from provider latency.
+"""
+
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+
+from config import (
+    GOOGLE_API_KEY,
+    GEMINI_MODEL,
+    LLM_BACKEND,
+    LLM_CASSETTE_PATH,
+    LLM_SYNTHETIC_LATENCY_MS,
+    LLM_SYNTHETIC_JITTER_MS,
+)
+
+# Characters per chunk when replaying or fabricating a streamed response
+STREAM_CHUNK_CHARS = 24
+
+
+class GeminiBackend:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._configured = False
+        self._models = {}
+
+    def get_model(self, model_name=None):
+        """Return the shared GenerativeModel for `model_name`, configuring the client once."""
+        model_name = model_name or GEMINI_MODEL
+        model = self._models.get(model_name)
+        if model is not None:
+            return model
+        import google.generativeai as genai
+
+        with self._lock:
+            if not self._configured:
+                if GOOGLE_API_KEY:
+                    genai.configure(api_key=GOOGLE_API_KEY)
+                self._configured = True
+            if model_name not in self._models:
+                self._models[model_name] = genai.GenerativeModel(model_name)
+            return self._models[model_name]
+
+    @staticmethod
+    def _contents(prompt):
+        return [{"role": "user", "parts": [{"text": prompt}]}]
+
+    def generate(self, prompt, purpose, model_name, timeout):
+        response = self.get_model(model_name).generate_content(
+            self._contents(prompt), request_options={"timeout": timeout}
+        )
+        return response.text
+
+    def stream(self, prompt, purpose, model_name, timeout):
+        response = self.get_model(model_name).generate_content(
+            self._contents(prompt), stream=True, request_options={"timeout": timeout}
+        )
+        for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                # Chunk carried no text parts (e.g. only finish metadata)
+                continue
+            if text:
+                yield text
+
+
+def _cassette_key(model_name, prompt):
+    return hashlib.sha256(f"{model_name or GEMINI_MODEL}\n{prompt}".encode("utf-8")).hexdigest()
+
+
+class RecordingBackend:
+    def __init__(self, inner, path):
+        self.inner = inner
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _record(self, prompt, purpose, model_name, response, latency):
+        entry = {
+            "key": _cassette_key(model_name, prompt),
+            "model": model_name or GEMINI_MODEL,
+            "purpose": purpose,
+            "prompt": prompt,
+            "response": response,
+            "latency_ms": round(latency * 1000, 1),
+        }
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def generate(self, prompt, purpose, model_name, timeout):
+        start = time.perf_counter()
+        response = self.inner.generate(prompt, purpose, model_name, timeout)
+        self._record(prompt, purpose, model_name, response, time.perf_counter() - start)
+        return response
+
+    def stream(self, prompt, purpose, model_name, timeout):
+        start = time.perf_counter()
+        chunks = []
+        for chunk in self.inner.stream(prompt, purpose, model_name, timeout):
+            chunks.append(chunk)
+            yield chunk
+        self._record(prompt, purpose, model_name, "".join(chunks), time.perf_counter() - start)
+
+
+def _sleep_ms(rng, latency_ms, jitter_ms):
+    delay = latency_ms + rng.uniform(-jitter_ms, jitter_ms)
+    if delay > 0:
+        time.sleep(delay / 1000)
+
+
+def _chunks(text):
+    return [text[i:i + STREAM_CHUNK_CHARS] for i in range(0, len(text), STREAM_CHUNK_CHARS)]
+
+
+class SyntheticBackend:
+    """Deterministic fake responses shaped like real ones for each purpose."""
+
+    OFF_TOPIC_MARKERS = ["something else", "weather", "joke", "movie", "football", "cricket", "don't want"]
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+
+    def _rng(self, prompt):
+        return random.Random(hashlib.sha256(prompt.encode("utf-8")).digest())
+
+    def respond(self, prompt, purpose):
+        rng = self._rng(prompt)
+        if purpose == "question_generation":
+            match = re.search(r"experience in (.*?)\. ", prompt)
+            stack = match.group(1) if match else "your stack"
+            return "\n".join(
+                f"Question {i} for {stack}: how would you approach topic {rng.randint(1, 999)}?"
+                for i in range(1, 6)
+            )
+        if purpose == "context_check":
+            match = re.search(r'USER RESPONSE: "(.*?)"\n', prompt, re.S)
+            answer = (match.group(1) if match else "").lower()
+            off_topic = any(marker in answer for marker in self.OFF_TOPIC_MARKERS)
+            return json.dumps({
+                "on_topic": not off_topic,
+                "guidance": "Let's get back to the interview question." if off_topic else "",
+                "confidence": 0.9,
+            })
+        if purpose == "scoring":
+            pairs = re.findall(r"\nQ\d+: (.*)\nA\d+: (.*)", prompt)
+            return json.dumps([
+                {
+                    "question": q,
+                    "answer": a,
+                    "technical_depth": rng.randint(4, 9),
+                    "clarity": rng.randint(4, 9),
+                    "relevance": rng.randint(4, 9),
+                    "overall": rng.randint(4, 9),
+                    "feedback": "Synthetic feedback.",
+                }
+                for q, a in pairs
+            ])
+        return "OK"
+
+    def generate(self, prompt, purpose, model_name, timeout):
+        _sleep_ms(self._rng(prompt + "latency"), self.latency_ms, self.jitter_ms)
+        return self.respond(prompt, purpose)
+
+    def stream(self, prompt, purpose, model_name, timeout):
+        chunks = _chunks(self.respond(prompt, purpose))
+        rng = self._rng(prompt + "latency")
+        for chunk in chunks:
+            _sleep_ms(rng, self.latency_ms / max(1, len(chunks)), self.jitter_ms / max(1, len(chunks)))
+            yield chunk
+
+
+class ReplayBackend:
+    """
+    Serve recorded responses from a cassette.
+
+    Prompts missing from the cassette raise LookupError in strict mode, and
+    are answered by the synthetic backend otherwise. When a prompt was
+    recorded several times, its responses are replayed in rotation.
+    """
+
+    def __init__(self, path, latency_ms=0.0, jitter_ms=0.0, strict=False):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.strict = strict
+        self._fallback = SyntheticBackend(latency_ms, jitter_ms)
+        self._responses = {}
+        self._positions = {}
+        self._lock = threading.Lock()
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._responses.setdefault(entry["key"], []).append(entry["response"])
+
+    def _lookup(self, prompt, purpose, model_name):
+        key = _cassette_key(model_name, prompt)
+        responses = self._responses.get(key)
+        if not responses:
+            if self.strict:
+                raise LookupError(f"No recorded {purpose} response for prompt {key[:12]}")
+            return None
+        with self._lock:
+            position = self._positions.get(key, 0)
+            self._positions[key] = position + 1
+        return responses[position % len(responses)]
+
+    def generate(self, prompt, purpose, model_name, timeout):
+        response = self._lookup(prompt, purpose, model_name)
+        if response is None:
+            return self._fallback.generate(prompt, purpose, model_name, timeout)
+        _sleep_ms(random, self.latency_ms, self.jitter_ms)
+        return response
+
+    def stream(self, prompt, purpose, model_name, timeout):
+        response = self._lookup(prompt, purpose, model_name)
+        if response is None:
+            yield from self._fallback.stream(prompt, purpose, model_name, timeout)
+            return
+        chunks = _chunks(response)
+        for chunk in chunks:
+            _sleep_ms(random, self.latency_ms / max(1, len(chunks)), self.jitter_ms / max(1, len(chunks)))
+            yield chunk
+
+
+def create_backend(kind=None):
+    """Build the backend named by `kind` (defaults to the LLM_BACKEND setting)."""
+    kind = (kind or LLM_BACKEND).lower()
+    if kind == "gemini":
+        return GeminiBackend()
+    if kind == "record":
+        return RecordingBackend(GeminiBackend(), LLM_CASSETTE_PATH)
+    if kind == "replay":
+        return ReplayBackend(LLM_CASSETTE_PATH, LLM_SYNTHETIC_LATENCY_MS, LLM_SYNTHETIC_JITTER_MS)
+    if kind == "synthetic":
+        return SyntheticBackend(LLM_SYNTHETIC_LATENCY_MS, LLM_SYNTHETIC_JITTER_MS)
+    raise ValueError(f"Unknown LLM backend: {kind}")
@@ -0,0 +1,421 @@
+"""
+Single gateway for every Gemini call made by the app.
+
+Owns the one configured backend (the live Gemini client by default, see
+llm_backends.py), reuses its model instances and transport connections, and applies per-call timeouts, bounded
+retries with jittered exponential backoff, and a process-wide concurrency cap.
+Responses can be streamed chunk by chunk or collected into the full text.
+Identical prompts issued concurrently share a single in-flight request, and
+every request to the provider first takes a token from the shared,
+priority-aware rate limiter.
+
+Each call also runs against a hard deadline, can optionally send a hedged
+second request once it has run longer than the recent p95 latency, and is
+short-circuited by a circuit breaker while the provider is failing or slow,
+so callers drop to their fallbacks without waiting.
+"""
+
+import queue
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from llm_backends import create_backend
+from single_flight import SingleFlight
+from rate_limiter import PriorityRateLimiter, INTERACTIVE
+from circuit_breaker import CircuitBreaker
+import metrics
+from llm_accounting import record_call, SUCCESS, ERROR, COALESCED
+from config import (
+    GEMINI_MODEL,
+    LLM_TIMEOUT_SECONDS,
+    LLM_MAX_RETRIES,
+    LLM_MAX_CONCURRENCY,
+    LLM_STREAMING,
+    GEMINI_REQUESTS_PER_MINUTE,
+    GEMINI_BURST,
+    LLM_INTERACTIVE_DEADLINE_SECONDS,
+    LLM_BATCH_DEADLINE_SECONDS,
+    LLM_HEDGING,
+    LLM_HEDGE_PERCENTILE,
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_SLOW_CALL_SECONDS,
+    CIRCUIT_COOLDOWN_SECONDS,
+)
+
+try:
+    from google.api_core import exceptions as google_exceptions
+
+    RETRYABLE_ERRORS = (
+        google_exceptions.ResourceExhausted,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.DeadlineExceeded,
+        google_exceptions.InternalServerError,
+        google_exceptions.TooManyRequests,
+        TimeoutError,
+        ConnectionError,
+    )
+except ImportError:
+    RETRYABLE_ERRORS = (TimeoutError, ConnectionError)
+
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_CAP_SECONDS = 8.0
+
+# Latency samples kept per purpose, and needed before hedging kicks in
+LATENCY_WINDOW = 200
+HEDGE_MIN_SAMPLES = 20
+
+
+class LLMError(Exception):
+    """Raised when a Gemini call fails after all retries."""
+
+
+class LLMTimeout(LLMError):
+    """Raised when a Gemini call misses its deadline."""
+
+
+class QuotaTimeout(LLMTimeout):
+    """Raised when the deadline passes while waiting for local rate-limiter quota."""
+
+
+class CircuitOpenError(LLMError):
+    """Raised without calling Gemini while the circuit breaker is open."""
+
+
+_backend = create_backend()
+_slots = threading.BoundedSemaphore(LLM_MAX_CONCURRENCY)
+_in_flight = SingleFlight()
+_limiter = PriorityRateLimiter(GEMINI_REQUESTS_PER_MINUTE, burst=GEMINI_BURST)
+_breaker = CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_SLOW_CALL_SECONDS, CIRCUIT_COOLDOWN_SECONDS)
+# Runs provider attempts so the caller can stop waiting at its deadline;
+# only attempts that already hold a quota token are submitted
+_call_executor = ThreadPoolExecutor(max_workers=LLM_MAX_CONCURRENCY * 2, thread_name_prefix="gemini-call")
+# Marks the end of a streamed response on a _read_stream queue
+_STREAM_END = object()
+_latency_lock = threading.Lock()
+_latencies = {}
+_hedges = {"sent": 0, "won": 0}
+
+
+def set_backend(backend):
+    """Swap the LLM backend (e.g. a synthetic one for benchmarks). Returns the previous one."""
+    global _backend
+    previous, _backend = _backend, backend
+    return previous
+
+
+def _backoff_delay(attempt):
+    """Full-jitter exponential backoff for the given 0-based retry attempt."""
+    return random.uniform(0, min(BACKOFF_CAP_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+def _record_latency(purpose, seconds):
+    with _latency_lock:
+        _latencies.setdefault(purpose, deque(maxlen=LATENCY_WINDOW)).append(seconds)
+
+
+def latency_percentile(purpose, percentile=0.95):
+    """Recent latency percentile (seconds) for `purpose`, or None without enough samples."""
+    with _latency_lock:
+        samples = sorted(_latencies.get(purpose, ()))
+    if len(samples) < HEDGE_MIN_SAMPLES:
+        return None
+    return samples[min(len(samples) - 1, int(percentile * len(samples)))]
+
+
+def generate_text(prompt, purpose="generic", timeout=None, max_retries=None, model_name=None, on_text=None,
+                  priority=INTERACTIVE, deadline=None):
+    """
+    Send a single-turn prompt to Gemini and return the stripped response text.
+
+    Args:
+        prompt: The user prompt text
+        purpose: Short label for the call site, used in errors and latency tracking
+        timeout: Per-attempt timeout in seconds (defaults to LLM_TIMEOUT_SECONDS)
+        max_retries: Retries after the first attempt for transient errors
+        model_name: Override the configured Gemini model
+        on_text: Optional callback streamed the accumulated text as tokens arrive
+        priority: rate_limiter.INTERACTIVE for turns a candidate is waiting on,
+            rate_limiter.BATCH for background work such as scoring
+        deadline: Total seconds the caller will wait, including queueing and
+            retries (defaults to the interactive or batch deadline)
+
+    Concurrent calls with the same model and prompt are coalesced: one
+    request goes out and every waiter gets its result. Waiters that asked
+    for streaming receive the complete text in a single on_text call.
+
+    Raises:
+        CircuitOpenError: Immediately, while the circuit breaker is open
+        LLMTimeout: If the deadline passes before a response arrives
+        LLMError: If the call still fails after the allowed retries
+    """
+    key = (model_name or GEMINI_MODEL, prompt)
+    start = time.monotonic()
+    try:
+        text, shared = _in_flight.do(
+            key, lambda: _generate(prompt, purpose, timeout, max_retries, model_name, on_text, priority, deadline)
+        )
+    except Exception:
+        record_call(purpose, priority, len(prompt), 0, time.monotonic() - start, ERROR)
+        raise
+    if shared:
+        # The leader's interview is charged for the request; this one only waited
+        record_call(purpose, priority, 0, 0, time.monotonic() - start, COALESCED)
+        metrics.inc("llm_calls_total", purpose=purpose, outcome="coalesced")
+        if on_text is not None:
+            on_text(text)
+        return text
+    record_call(purpose, priority, len(prompt), len(text), time.monotonic() - start, SUCCESS)
+    return text
+
+
+def _outcome(error):
+    """Metrics label for how a provider call ended."""
+    if isinstance(error, CircuitOpenError):
+        return "circuit_open"
+    if isinstance(error, QuotaTimeout):
+        return "quota_timeout"
+    if isinstance(error, LLMTimeout):
+        return "timeout"
+    return "error"
+
+
+def _acquire_slot(priority, deadline_at, purpose):
+    """Wait for a rate limiter token, but no longer than the call's deadline."""
+    if not _limiter.acquire(priority, timeout=max(0.0, deadline_at - time.monotonic())):
+        raise QuotaTimeout(f"{purpose} timed out waiting for Gemini quota")
+
+
+def _record_error(error):
+    """Count a failed call against the circuit breaker if the provider was at fault."""
+    if isinstance(error, (QuotaTimeout, CircuitOpenError)):
+        # Queued behind our own rate limit, not failed by Gemini
+        _breaker.release()
+    else:
+        _breaker.record_failure()
+
+
+def _generate(prompt, purpose, timeout, max_retries, model_name, on_text, priority, deadline):
+    if not _breaker.allow():
+        metrics.inc("llm_calls_total", purpose=purpose, outcome="circuit_open")
+        raise CircuitOpenError(f"{purpose} skipped: Gemini circuit is open")
+    if deadline is None:
+        deadline = LLM_INTERACTIVE_DEADLINE_SECONDS if priority == INTERACTIVE else LLM_BATCH_DEADLINE_SECONDS
+    timeout = LLM_TIMEOUT_SECONDS if timeout is None else timeout
+    max_retries = LLM_MAX_RETRIES if max_retries is None else max_retries
+    start = time.monotonic()
+    deadline_at = start + deadline
+
+    try:
+        if on_text is not None and LLM_STREAMING:
+            text = ""
+            for chunk in _stream(prompt, purpose, timeout, max_retries, model_name, priority, deadline_at):
+                text += chunk
+                on_text(text)
+            text = text.strip()
+        else:
+            text = _hedged_call(prompt, purpose, timeout, max_retries, model_name, priority, deadline_at)
+    except Exception as e:
+        _record_error(e)
+        metrics.inc("llm_calls_total", purpose=purpose, outcome=_outcome(e))
+        raise
+
+    elapsed = time.monotonic() - start
+    # Long batch calls (scoring) are expected and shouldn't trip the breaker
+    _breaker.record_success(elapsed if priority == INTERACTIVE else 0.0)
+    _record_latency(purpose, elapsed)
+    metrics.inc("llm_calls_total", purpose=purpose, outcome="success")
+    metrics.observe("llm_request_seconds", elapsed, purpose=purpose)
+    return text
+
+
+def _hedged_call(prompt, purpose, timeout, max_retries, model_name, priority, deadline_at):
+    """
+    Run the call's attempts on the gateway pool and wait no longer than the deadline.
+
+    The quota token for each attempt is taken on the caller's thread before
+    the attempt is handed to the pool, so calls waiting for quota never
+    occupy pool workers and the limiter's priority order alone decides which
+    call goes out next. Transient errors are retried with backoff.
+    """
+    for attempt in range(max_retries + 1):
+        _acquire_slot(priority, deadline_at, purpose)
+        try:
+            return _hedged_attempt(prompt, purpose, timeout, model_name, priority, deadline_at)
+        except RETRYABLE_ERRORS as e:
+            delay = _backoff_delay(attempt)
+            if attempt == max_retries or time.monotonic() + delay >= deadline_at:
+                raise LLMError(f"{purpose} failed after {attempt + 1} attempts: {e}") from e
+            time.sleep(delay)
+
+
+def _hedged_attempt(prompt, purpose, timeout, model_name, priority, deadline_at):
+    """
+    One attempt, whose quota token the caller already holds.
+
+    With hedging on, a second request is sent if the first hasn't answered
+    after the recent p95 latency, provided a token is free right away (a
+    hedge never queues for quota); whichever answers first wins.
+    """
+    futures = [_call_executor.submit(_call_once, prompt, purpose, timeout, model_name, deadline_at)]
+    hedge = None
+    hedge_delay = latency_percentile(purpose, LLM_HEDGE_PERCENTILE) if LLM_HEDGING else None
+    if hedge_delay is not None:
+        remaining = deadline_at - time.monotonic()
+        done, _ = wait(futures, timeout=max(0.0, min(hedge_delay, remaining)))
+        if not done and time.monotonic() < deadline_at and _limiter.acquire(priority, timeout=0):
+            hedge = _call_executor.submit(_call_once, prompt, purpose, timeout, model_name, deadline_at)
+            futures.append(hedge)
+            with _latency_lock:
+                _hedges["sent"] += 1
+
+    last_error = None
+    while futures:
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            break
+        done, _ = wait(futures, timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            futures.remove(future)
+            if future.exception() is None:
+                if future is hedge:
+                    with _latency_lock:
+                        _hedges["won"] += 1
+                return future.result()
+            last_error = future.exception()
+    if last_error is not None and not futures:
+        raise last_error
+    # Requests still running finish in the background and are discarded
+    raise LLMTimeout(f"{purpose} missed its deadline")
+
+
+def _call_once(prompt, purpose, timeout, model_name, deadline_at):
+    """A single provider request; retryable errors propagate for the caller to retry."""
+    backend = _backend
+    attempt_timeout = max(0.1, min(timeout, deadline_at - time.monotonic()))
+    try:
+        with _slots:
+            response = backend.generate(prompt, purpose, model_name, attempt_timeout)
+        return response.strip()
+    except RETRYABLE_ERRORS:
+        raise
+    except Exception as e:
+        raise LLMError(f"{purpose} failed: {e}") from e
+
+
+def stream_text(prompt, purpose="generic", timeout=None, max_retries=None, model_name=None,
+                priority=INTERACTIVE, deadline=None):
+    """
+    Stream a single-turn Gemini response, yielding text chunks as they arrive.
+
+    Transient errors are retried only until the first chunk has been yielded;
+    after that a failure raises LLMError so callers never see duplicated text.
+    Raises CircuitOpenError while the circuit breaker is open.
+    """
+    if not _breaker.allow():
+        metrics.inc("llm_calls_total", purpose=purpose, outcome="circuit_open")
+        record_call(purpose, priority, len(prompt), 0, 0.0, ERROR)
+        raise CircuitOpenError(f"{purpose} skipped: Gemini circuit is open")
+    if deadline is None:
+        deadline = LLM_INTERACTIVE_DEADLINE_SECONDS if priority == INTERACTIVE else LLM_BATCH_DEADLINE_SECONDS
+    timeout = LLM_TIMEOUT_SECONDS if timeout is None else timeout
+    max_retries = LLM_MAX_RETRIES if max_retries is None else max_retries
+    start = time.monotonic()
+    response_chars = 0
+    try:
+        for text in _stream(prompt, purpose, timeout, max_retries, model_name, priority, start + deadline):
+            response_chars += len(text)
+            yield text
+    except Exception as e:
+        _record_error(e)
+        metrics.inc("llm_calls_total", purpose=purpose, outcome=_outcome(e))
+        record_call(purpose, priority, len(prompt), response_chars, time.monotonic() - start, ERROR)
+        raise
+    except GeneratorExit:
+        # The consumer stopped reading: no verdict, but a half-open trial must be freed
+        _breaker.release()
+        metrics.inc("llm_calls_total", purpose=purpose, outcome="abandoned")
+        record_call(purpose, priority, len(prompt), response_chars, time.monotonic() - start, SUCCESS)
+        raise
+    elapsed = time.monotonic() - start
+    record_call(purpose, priority, len(prompt), response_chars, elapsed, SUCCESS)
+    _breaker.record_success(elapsed if priority == INTERACTIVE else 0.0)
+    metrics.inc("llm_calls_total", purpose=purpose, outcome="success")
+    metrics.observe("llm_request_seconds", elapsed, purpose=purpose)
+
+
+def _stream(prompt, purpose, timeout, max_retries, model_name, priority, deadline_at):
+    """
+    Yield a response's chunks, retrying transient errors until the first one.
+
+    The backend stream is read on a pool worker (see _read_stream), so the
+    wait for every chunk is capped by the deadline, and the concurrency slot
+    is not held while the consumer handles a chunk.
+    """
+    for attempt in range(max_retries + 1):
+        started = False
+        _acquire_slot(priority, deadline_at, purpose)
+        attempt_timeout = max(0.1, min(timeout, deadline_at - time.monotonic()))
+        chunks = queue.SimpleQueue()
+        cancelled = threading.Event()
+        _call_executor.submit(_read_stream, prompt, purpose, model_name, attempt_timeout, chunks, cancelled)
+        try:
+            while True:
+                try:
+                    item = chunks.get(timeout=max(0.0, deadline_at - time.monotonic()))
+                except queue.Empty:
+                    raise LLMTimeout(f"{purpose} stream missed its deadline") from None
+                if item is _STREAM_END:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                started = True
+                yield item
+        except LLMTimeout:
+            raise
+        except RETRYABLE_ERRORS as e:
+            delay = _backoff_delay(attempt)
+            if started or attempt == max_retries or time.monotonic() + delay >= deadline_at:
+                raise LLMError(f"{purpose} stream failed after {attempt + 1} attempts: {e}") from e
+            time.sleep(delay)
+        except Exception as e:
+            raise LLMError(f"{purpose} stream failed: {e}") from e
+        finally:
+            # Stop the reader on a timeout, an error or an abandoned stream
+            cancelled.set()
+
+
+def _read_stream(prompt, purpose, model_name, timeout, chunks, cancelled):
+    """
+    Pool worker: put the backend's chunks on `chunks`, then _STREAM_END or the error.
+
+    A concurrency slot is held only while the backend is being read.
+    """
+    backend = _backend
+    try:
+        with _slots:
+            stream = backend.stream(prompt, purpose, model_name, timeout)
+            try:
+                for text in stream:
+                    if cancelled.is_set():
+                        break
+                    chunks.put(text)
+            finally:
+                close = getattr(stream, "close", None)
+                if close is not None:
+                    close()
+        chunks.put(_STREAM_END)
+    except Exception as e:
+        chunks.put(e)
+
+
+def get_gateway_stats():
+    """Coalescing, rate limiter, hedging and circuit breaker counters."""
+    stats = _in_flight.stats()
+    stats["rate_limiter"] = _limiter.stats()
+    stats["circuit_breaker"] = _breaker.stats()
+    with _latency_lock:
+        stats["hedges"] = dict(_hedges)
+    return stats
@@ -0,0 +1,168 @@
+"""
+Structured, non-blocking application logging.
+
+Log calls only enqueue a record: a QueueHandler hands it to a QueueListener
+thread, which does the formatting and stream I/O, so a slow terminal or log
+collector never stalls a Streamlit rerun or a gateway worker.
+
+Records pass two filters before they are queued:
+- sampling: events listed in LOG_SAMPLE_RATES (e.g. "turn.step=0.1") are
+  kept with that probability; warnings and errors are never dropped
+- redaction: e-mail addresses and phone numbers in the message are masked,
+  and structured fields named like candidate PII are replaced outright
+
+Use get_logger(__name__) and log_event(logger, level, event, **fields).
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import re
+import threading
+import time
+
+from config import LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_RATES, LOG_REDACT_PII
+
+ROOT_LOGGER = "talentscout"
+
+# Structured fields whose values are always replaced
+PII_FIELDS = {"full_name", "email", "phone", "location", "candidate_name", "to_email", "name"}
+
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_PHONE_RE = re.compile(r"(?<!\w)\+?\d[\d\s().-]{7,}\d(?!\w)")
+REDACTED = "[redacted]"
+
+_configure_lock = threading.Lock()
+_listener = None
+
+
+def redact_text(text):
+    """Mask e-mail addresses and phone numbers in free text."""
+    return _PHONE_RE.sub("[phone]", _EMAIL_RE.sub("[email]", text))
+
+
+def redact_value(key, value):
+    """Redact a structured field, recursing into dicts and lists."""
+    if key in PII_FIELDS:
+        return REDACTED
+    if isinstance(value, dict):
+        return {k: redact_value(k, v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact_value(None, v) for v in value]
+    if isinstance(value, str):
+        return redact_text(value)
+    return value
+
+
+def _parse_sample_rates(spec):
+    rates = {}
+    for item in spec.split(","):
+        event, sep, rate = item.partition("=")
+        if sep and event.strip():
+            rates[event.strip()] = float(rate)
+    return rates
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a configured fraction of each sampled event below WARNING."""
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(getattr(record, "event", None))
+        return rate is None or random.random() < rate
+
+
+class RedactionFilter(logging.Filter):
+    """Mask PII in the rendered message and in structured fields."""
+
+    def filter(self, record):
+        message = record.getMessage()
+        record.msg = redact_text(message)
+        record.args = None
+        fields = getattr(record, "fields", None)
+        if fields:
+            record.fields = {k: redact_value(k, v) for k, v in fields.items()}
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, event, message and fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+            + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "event": getattr(record, "event", None),
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return line
+
+
+def configure_logging():
+    """Install the queue handler and start the listener thread once per process."""
+    global _listener
+    with _configure_lock:
+        if _listener is not None:
+            return
+        stream = logging.StreamHandler()
+        stream.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else TextFormatter())
+
+        log_queue = queue.SimpleQueue()
+        handler = logging.handlers.QueueHandler(log_queue)
+        handler.addFilter(SamplingFilter(_parse_sample_rates(LOG_SAMPLE_RATES)))
+        if LOG_REDACT_PII:
+            handler.addFilter(RedactionFilter())
+
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel(LOG_LEVEL)
+        root.addHandler(handler)
+        root.propagate = False
+
+        _listener = logging.handlers.QueueListener(log_queue, stream, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+
+def get_logger(name):
+    """Logger under the application root, configuring logging on first use."""
+    configure_logging()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def log_event(logger, level, event, message=None, **fields):
+    """
+    Log a structured event.
+
+    Args:
+        logger: Logger from get_logger
+        level: logging level, e.g. logging.INFO
+        event: Dotted event name, used for sampling and filtering
+        message: Human-readable message (defaults to the event name)
+        **fields: Structured context; PII fields are redacted before output
+    """
+    if logger.isEnabledFor(level):
+        logger.log(level, message or event, extra={"event": event, "fields": fields})
@@ -2,8 +2,11 @@ from mailjet_rest import Client
 import os
 import dotenv
 
+from metrics import timed
+
 dotenv.load_dotenv()
 
+@timed("email")
 def send_thank_you_email_mailjet(to_email, candidate_name=None):
     api_key = os.environ.get("MAILJET_API_KEY")
     api_secret = os.environ.get("MAILJET_API_SECRET")
@@ -0,0 +1,258 @@
+"""
+In-process metrics with Prometheus text export.
+
+Stages are timed with the `timed` decorator or the `span` context manager,
+and events are counted with `inc`. Everything is kept in process memory and
+rendered on demand in the Prometheus text format, either from a local HTTP
+endpoint (METRICS_PORT) or by periodically rewriting a file (METRICS_PATH)
+for node_exporter's textfile collector.
+
+With METRICS_ENABLED off, `timed` returns the function unchanged, `span`
+returns a shared no-op context manager and `inc` returns immediately, so
+the instrumentation costs next to nothing.
+"""
+
+import atexit
+import functools
+import inspect
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from logging_setup import get_logger, log_event
+from config import METRICS_ENABLED, METRICS_HOST, METRICS_PORT, METRICS_PATH, METRICS_WRITE_SECONDS
+
+PREFIX = "talentscout_"
+
+# Upper bounds in seconds for latency histogram buckets
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+HELP = {
+    "stage_seconds": "Time spent in each interview stage.",
+    "llm_request_seconds": "Time from gateway entry to response for LLM calls sent to the provider.",
+    "llm_calls_total": "LLM calls by purpose and outcome.",
+    "fallbacks_total": "Times a canned fallback replaced an LLM result.",
+    "cache_lookups_total": "Cache lookups by cache and result.",
+    "context_checks_total": "Context checks by where they were resolved (local heuristics or LLM).",
+}
+
+log = get_logger(__name__)
+
+_lock = threading.Lock()
+_counters = {}    # (name, labels) -> value
+_histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum]
+_exporter_started = False
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def inc(name, amount=1, **labels):
+    """Add `amount` to the counter `name` with the given labels."""
+    if not METRICS_ENABLED:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def observe(name, seconds, **labels):
+    """Record one duration in the histogram `name`."""
+    if not METRICS_ENABLED:
+        return
+    key = (name, _labels(labels))
+    with _lock:
+        series = _histograms.get(key)
+        if series is None:
+            series = _histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                series[i] += 1
+                break
+        else:
+            series[len(BUCKETS)] += 1
+        series[-1] += seconds
+
+
+class _Span:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe("stage_seconds", time.perf_counter() - self.start, stage=self.stage)
+        return False
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(stage):
+    """Context manager timing a block as `stage` in stage_seconds."""
+    return _Span(stage) if METRICS_ENABLED else _NOOP_SPAN
+
+
+def timed(stage):
+    """Decorator timing every call of the function (or coroutine function) as `stage` in stage_seconds."""
+    def decorate(fn):
+        if not METRICS_ENABLED:
+            return fn
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    observe("stage_seconds", time.perf_counter() - start, stage=stage)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe("stage_seconds", time.perf_counter() - start, stage=stage)
+        return wrapper
+    return decorate
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in pairs
+    )
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+def _header(lines, name, kind):
+    if name in HELP:
+        lines.append(f"# HELP {PREFIX}{name} {HELP[name]}")
+    lines.append(f"# TYPE {PREFIX}{name} {kind}")
+
+
+def render():
+    """All metrics in the Prometheus text exposition format."""
+    with _lock:
+        counters = sorted(_counters.items())
+        histograms = sorted((key, list(series)) for key, series in _histograms.items())
+
+    lines = []
+    current = None
+    for (name, labels), value in counters:
+        if name != current:
+            _header(lines, name, "counter")
+            current = name
+        lines.append(f"{PREFIX}{name}{_format_labels(labels)} {value}")
+
+    current = None
+    for (name, labels), series in histograms:
+        if name != current:
+            _header(lines, name, "histogram")
+            current = name
+        cumulative = 0
+        for bound, count in zip(BUCKETS, series):
+            cumulative += count
+            lines.append(f"{PREFIX}{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+        cumulative += series[len(BUCKETS)]
+        lines.append(f"{PREFIX}{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {cumulative}")
+        lines.append(f"{PREFIX}{name}_sum{_format_labels(labels)} {series[-1]:.6f}")
+        lines.append(f"{PREFIX}{name}_count{_format_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    """Drop every recorded value."""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+
+def write_metrics(path=None):
+    """Atomically write the rendered metrics to `path` (defaults to METRICS_PATH)."""
+    path = path or METRICS_PATH
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render())
+    os.replace(tmp_path, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes are frequent; keep them out of the app's output
+        pass
+
+
+def _write_periodically():
+    while True:
+        time.sleep(METRICS_WRITE_SECONDS)
+        try:
+            write_metrics()
+        except OSError as e:
+            log_event(log, logging.WARNING, "metrics.write_failed", "Metrics file write failed", error=str(e))
+
+
+def start_exporter():
+    """
+    Start the configured exporters once per process.
+
+    Safe to call on every Streamlit rerun. Does nothing when metrics are
+    disabled or neither METRICS_PORT nor METRICS_PATH is set.
+    """
+    global _exporter_started
+    if not METRICS_ENABLED:
+        return
+    with _lock:
+        if _exporter_started:
+            return
+        _exporter_started = True
+
+    if METRICS_PORT:
+        try:
+            server = ThreadingHTTPServer((METRICS_HOST, METRICS_PORT), _MetricsHandler)
+        except OSError as e:
+            # Another worker process already serves this port
+            log_event(
+                log, logging.WARNING, "metrics.endpoint_failed", "Metrics endpoint not started",
+                host=METRICS_HOST, port=METRICS_PORT, error=str(e)
+            )
+        else:
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+
+    if METRICS_PATH:
+        threading.Thread(target=_write_periodically, name="metrics-file", daemon=True).start()
+        atexit.register(write_metrics)
@@ -0,0 +1,112 @@
+"""
+LRU + TTL cache of generated interview question sets.
+
+Keys are the sorted canonical skill IDs of the tech stack (see
+skill_taxonomy) plus an experience band, so candidates with the same
+profile, however they spelled it, can start their interview without an LLM
+round trip. Each key holds a small pool of question sets; once the pool is
+full, hits are sampled from it at random so candidates don't all see
+identical questions.
+"""
+
+import random
+import threading
+import time
+from collections import OrderedDict
+
+from skill_taxonomy import canonical_skill
+from config import QUESTION_CACHE_SIZE, QUESTION_CACHE_TTL_SECONDS, QUESTION_CACHE_POOL_SIZE
+
+# Upper bounds (inclusive, in years) of each experience band
+EXPERIENCE_BANDS = [(1, "entry"), (4, "mid"), (9, "senior")]
+
+
+def experience_band(years):
+    try:
+        years = int(years)
+    except (TypeError, ValueError):
+        years = 0
+    for upper, band in EXPERIENCE_BANDS:
+        if years <= upper:
+            return band
+    return "staff"
+
+
+def make_key(tech_stack, experience_years):
+    """Cache key for a candidate profile: (sorted canonical stack, experience band)."""
+    if isinstance(tech_stack, str):
+        tech_stack = tech_stack.split(",")
+    stack = sorted({canonical_skill(str(t)) for t in tech_stack if str(t).strip()})
+    return tuple(stack), experience_band(experience_years)
+
+
+class QuestionCache:
+    def __init__(self, max_entries=256, ttl_seconds=6 * 3600, pool_size=3):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.pool_size = pool_size
+        self._entries = OrderedDict()  # key -> list of (stored_at, questions_text)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """
+        Return a random cached question set for `key`, or None on a miss.
+
+        Keys whose pool is not yet full count as misses so the pool keeps
+        filling with fresh question sets before it starts serving hits.
+        """
+        now = time.monotonic()
+        with self._lock:
+            pool = self._entries.get(key)
+            if pool:
+                fresh = [entry for entry in pool if now - entry[0] < self.ttl_seconds]
+                self.expirations += len(pool) - len(fresh)
+                if fresh:
+                    self._entries[key] = pool = fresh
+                    self._entries.move_to_end(key)
+                else:
+                    del self._entries[key]
+                    pool = None
+            if pool and len(pool) >= self.pool_size:
+                self.hits += 1
+                return random.choice(pool)[1]
+            self.misses += 1
+            return None
+
+    def put(self, key, questions_text):
+        """Add a freshly generated question set to the pool for `key`."""
+        with self._lock:
+            pool = self._entries.setdefault(key, [])
+            pool.append((time.monotonic(), questions_text))
+            del pool[:-self.pool_size]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+question_cache = QuestionCache(
+    max_entries=QUESTION_CACHE_SIZE,
+    ttl_seconds=QUESTION_CACHE_TTL_SECONDS,
+    pool_size=QUESTION_CACHE_POOL_SIZE,
+)
@@ -0,0 +1,100 @@
+"""
+Process-wide, priority-aware token bucket for the shared Gemini quota.
+
+Every request to the provider takes one token. Tokens refill continuously at
+the configured requests/minute; when callers are queued, the next token
+always goes to the highest-priority (lowest number) waiter, FIFO within a
+priority, so interactive turns jump ahead of batch scoring.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+
+INTERACTIVE = 0
+BATCH = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BATCH: "batch"}
+
+
+class PriorityRateLimiter:
+    def __init__(self, requests_per_minute, burst=1):
+        """
+        Args:
+            requests_per_minute: Sustained request rate allowed by the quota
+            burst: Bucket capacity, i.e. requests allowed back to back after idling
+        """
+        self.rate = requests_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._cond = threading.Condition()
+        self._waiters = []  # heap of (priority, sequence)
+        self._sequence = itertools.count()
+        self._stats = {}
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, priority=INTERACTIVE, timeout=None):
+        """
+        Block until a token is granted to this caller.
+
+        Returns True once acquired, or False if `timeout` seconds pass first.
+        """
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        with self._cond:
+            ticket = (priority, next(self._sequence))
+            heapq.heappush(self._waiters, ticket)
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                at_head = self._waiters[0] == ticket
+                if at_head and self._tokens >= 1:
+                    heapq.heappop(self._waiters)
+                    self._tokens -= 1
+                    self._record(priority, now - start)
+                    # Let the next waiter re-evaluate its position
+                    self._cond.notify_all()
+                    return True
+                if deadline is not None and now >= deadline:
+                    self._waiters.remove(ticket)
+                    heapq.heapify(self._waiters)
+                    self._record(priority, now - start, timed_out=True)
+                    self._cond.notify_all()
+                    return False
+                # The head sleeps until its token refills; everyone else is woken by notify
+                wait = (1 - self._tokens) / self.rate if at_head else None
+                if deadline is not None:
+                    wait = deadline - now if wait is None else min(wait, deadline - now)
+                self._cond.wait(wait)
+
+    def _record(self, priority, waited, timed_out=False):
+        stats = self._stats.setdefault(priority, {
+            "acquired": 0, "timed_out": 0, "total_wait_ms": 0.0, "max_wait_ms": 0.0,
+        })
+        stats["timed_out" if timed_out else "acquired"] += 1
+        waited_ms = waited * 1000
+        stats["total_wait_ms"] += waited_ms
+        stats["max_wait_ms"] = max(stats["max_wait_ms"], waited_ms)
+
+    def stats(self):
+        """Queue length and wait times per priority class."""
+        with self._cond:
+            queued = {}
+            for priority, _ in self._waiters:
+                queued[priority] = queued.get(priority, 0) + 1
+            result = {}
+            for priority in sorted(set(self._stats) | set(queued)):
+                stats = self._stats.get(priority, {})
+                calls = stats.get("acquired", 0) + stats.get("timed_out", 0)
+                result[PRIORITY_NAMES.get(priority, str(priority))] = {
+                    "queued": queued.get(priority, 0),
+                    "acquired": stats.get("acquired", 0),
+                    "timed_out": stats.get("timed_out", 0),
+                    "avg_wait_ms": round(stats.get("total_wait_ms", 0.0) / calls, 3) if calls else 0.0,
+                    "max_wait_ms": round(stats.get("max_wait_ms", 0.0), 3),
+                }
+            return result
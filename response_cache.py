@@ -0,0 +1,155 @@
+"""
+Content-addressed cache for deterministic LLM analysis results.
+
+Entries are keyed by a SHA-256 digest of everything that determines the
+result (model and full prompt), so a changed prompt template can never serve
+a stale answer. A bounded in-memory LRU sits in front of an optional SQLite
+file, which survives restarts and is shared by every Streamlit worker
+process pointing at the same path.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from logging_setup import get_logger, log_event
+from config import CONTEXT_CACHE_SIZE, CONTEXT_CACHE_PATH, CONTEXT_CACHE_DISK_SIZE, CONTEXT_CACHE_TTL_SECONDS
+
+log = get_logger(__name__)
+
+# Prune the disk cache back to its size bound after this many writes
+_PRUNE_EVERY = 100
+
+
+def content_key(*parts):
+    """Stable SHA-256 hex digest of the given strings."""
+    digest = hashlib.sha256()
+    for part in parts:
+        data = str(part).encode("utf-8")
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, max_entries=2048, path=None, max_disk_entries=100000, ttl_seconds=7 * 24 * 3600):
+        """
+        Args:
+            max_entries: Entries kept in the in-memory LRU
+            path: Optional SQLite file backing the cache across processes
+            max_disk_entries: Entries kept on disk before the oldest are pruned
+            ttl_seconds: Age after which entries are ignored and replaced
+        """
+        self.max_entries = max_entries
+        self.path = path
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+        self._memory = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._writes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _disk(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_response_cache_stored ON response_cache(stored_at)")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key):
+        """Return the cached value for `key`, or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry and now - entry[0] < self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry[1]
+        if self.path:
+            try:
+                row = self._disk().execute(
+                    "SELECT value, stored_at FROM response_cache WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error:
+                row = None
+            if row and now - row[1] < self.ttl_seconds:
+                value = json.loads(row[0])
+                with self._lock:
+                    self.disk_hits += 1
+                    self._remember(key, row[1], value)
+                return value
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, value):
+        """Store a JSON-serializable value under `key`."""
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+            self._writes += 1
+            prune = self._writes % _PRUNE_EVERY == 0
+        if self.path:
+            try:
+                with self._disk() as conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO response_cache (key, value, stored_at) VALUES (?, ?, ?)",
+                        (key, json.dumps(value), now),
+                    )
+                    if prune:
+                        conn.execute(
+                            "DELETE FROM response_cache WHERE key IN (SELECT key FROM response_cache "
+                            "ORDER BY stored_at DESC LIMIT -1 OFFSET ?)",
+                            (self.max_disk_entries,),
+                        )
+            except sqlite3.Error as e:
+                # The disk tier is best-effort; the memory tier still holds the entry
+                log_event(log, logging.WARNING, "response_cache.write_failed", "Response cache write failed", error=str(e))
+
+    def _remember(self, key, stored_at, value):
+        self._memory[key] = (stored_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """Drop the in-memory tier; the disk tier, if any, is left in place."""
+        with self._lock:
+            self._memory.clear()
+
+    def stats(self):
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "entries": len(self._memory),
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+
+context_cache = ResponseCache(
+    max_entries=CONTEXT_CACHE_SIZE,
+    path=CONTEXT_CACHE_PATH or None,
+    max_disk_entries=CONTEXT_CACHE_DISK_SIZE,
+    ttl_seconds=CONTEXT_CACHE_TTL_SECONDS,
+)
@@ -1,9 +1,14 @@
-import google.generativeai as genai
-from config import GOOGLE_API_KEY
+import asyncio
+import json
 
-if GOOGLE_API_KEY:
-    genai.configure(api_key=GOOGLE_API_KEY)
+from llm_gateway import generate_text
+from rate_limiter import BATCH
+from task_pool import submit, run_blocking
+from metrics import inc, timed
+from llm_accounting import note_fallback
+from config import SCORING_CHUNK_CHARS, SCORING_CHUNK_ATTEMPTS
 
+@timed("scoring")
 def score_answers_with_gemini(questions, answers):
     """
     Given a list of questions and answers, return a list of scores and feedback for each answer.
@@ -18,10 +23,162 @@ Questions and Answers:
     prompt += "\n\nReturn only the JSON list."
 
     try:
-        model = genai.GenerativeModel("gemini-1.5-flash-latest")
-        response = model.generate_content([
-            {"role": "user", "parts": [{"text": prompt}]}
-        ])
-        return response.text.strip()
+        return generate_text(prompt, purpose="scoring", priority=BATCH)
     except Exception as e:
         return f"[LLM_ERROR] Could not score answers: {e}"
+
+
+SCORE_KEYS = ["question", "answer", "technical_depth", "clarity", "relevance", "overall", "feedback"]
+
+
+def parse_scores(scoring_text, expected_count=None):
+    """
+    Parse a scoring response into a list of score dicts.
+
+    Tolerates Markdown code fences around the JSON. Returns None if the text
+    is not a JSON list of objects that each carry an overall score (or has
+    the wrong number of entries).
+    """
+    text = scoring_text.strip()
+    if text.startswith("```"):
+        text = text.strip("`")
+        if text.lower().startswith("json"):
+            text = text[4:]
+    try:
+        scores = json.loads(text)
+    except ValueError:
+        return None
+    if isinstance(scores, dict):
+        scores = [scores]
+    if not isinstance(scores, list) or not all(isinstance(s, dict) and "overall" in s for s in scores):
+        return None
+    if expected_count is not None and len(scores) != expected_count:
+        return None
+    return scores
+
+
+def _unscored(question, answer):
+    """Placeholder report entry for an answer that couldn't be scored."""
+    entry = dict.fromkeys(SCORE_KEYS)
+    entry.update(question=question, answer=answer, feedback="This answer could not be scored automatically.")
+    return entry
+
+
+def _chunk_pairs(questions, answers, max_chunk_chars):
+    """Group Q/A indexes into consecutive chunks of at most max_chunk_chars each."""
+    chunks, current, size = [], [], 0
+    for i, (q, a) in enumerate(zip(questions, answers)):
+        pair_size = len(q) + len(a)
+        if current and size + pair_size > max_chunk_chars:
+            chunks.append(current)
+            current, size = [], 0
+        current.append(i)
+        size += pair_size
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _score_chunks(questions, answers, max_chunk_chars=None, max_attempts=None):
+    """
+    Score Q/A pairs in size-bounded chunks, all chunks concurrently.
+
+    Each chunk's JSON is validated on its own, and only chunks that failed
+    are re-requested. Returns one score dict per pair, in the original order.
+    """
+    max_chunk_chars = max_chunk_chars or SCORING_CHUNK_CHARS
+    max_attempts = max_attempts or SCORING_CHUNK_ATTEMPTS
+    results = [None] * min(len(questions), len(answers))
+    pending = _chunk_pairs(questions, answers, max_chunk_chars)
+
+    for _ in range(max_attempts):
+        if not pending:
+            break
+        futures = [
+            (chunk, submit(score_answers_with_gemini, [questions[i] for i in chunk], [answers[i] for i in chunk]))
+            for chunk in pending
+        ]
+        pending = []
+        for chunk, future in futures:
+            scores = parse_scores(future.result(), expected_count=len(chunk))
+            if scores:
+                for i, score in zip(chunk, scores):
+                    results[i] = score
+            else:
+                pending.append(chunk)
+
+    for chunk in pending:
+        inc("fallbacks_total", len(chunk), kind="scoring")
+        note_fallback("scoring")
+        for i in chunk:
+            results[i] = _unscored(questions[i], answers[i])
+    return results
+
+
+def score_answers_chunked(questions, answers, max_chunk_chars=None):
+    """
+    Chunked, parallel alternative to score_answers_with_gemini for long interviews.
+
+    Returns the same JSON list text, so one malformed response only costs
+    a retry of its own chunk instead of the whole report.
+    """
+    return json.dumps(_score_chunks(questions, answers, max_chunk_chars))
+
+
+def score_answers(questions, answers):
+    """Score answers in one call, or in parallel chunks once the transcript is large."""
+    if sum(len(q) + len(a) for q, a in zip(questions, answers)) > SCORING_CHUNK_CHARS:
+        return score_answers_chunked(questions, answers)
+    return score_answers_with_gemini(questions, answers)
+
+
+def score_answer_in_background(question, answer):
+    """Start scoring a single Q/A pair on the shared pool and return its Future."""
+    return submit(score_answers_with_gemini, [question], [answer])
+
+
+def collect_scores(futures, questions, answers, timeout=None):
+    """
+    Merge per-answer background scoring results into one report.
+
+    Answers whose background result failed or didn't parse are re-scored
+    together through the chunked scorer. Returns the same JSON list text as
+    score_answers_with_gemini, in question order.
+    """
+    results = []
+    retry = []
+    for i, (future, question, answer) in enumerate(zip(futures, questions, answers)):
+        try:
+            scores = parse_scores(future.result(timeout=timeout), expected_count=1)
+        except Exception:
+            scores = None
+        if scores:
+            results.append(scores[0])
+        else:
+            results.append(None)
+            retry.append(i)
+
+    if retry:
+        rescored = _score_chunks([questions[i] for i in retry], [answers[i] for i in retry])
+        for i, score in zip(retry, rescored):
+            results[i] = score
+
+    return json.dumps(results)
+
+
+async def score_answers_async(questions, answers):
+    """Awaitable score_answers; the blocking calls run on a worker thread."""
+    return await run_blocking(score_answers, questions, answers)
+
+
+async def collect_scores_async(futures, questions, answers, timeout=None):
+    """
+    Awaitable collect_scores.
+
+    Waits for the background results without holding a thread, then merges
+    them (re-scoring failures) on a worker thread. Results not in by
+    `timeout` are re-scored like failed ones.
+    """
+    if futures:
+        await asyncio.wait([asyncio.wrap_future(future) for future in futures], timeout=timeout)
+    return await run_blocking(collect_scores, futures, questions, answers, 0 if timeout is not None else None)
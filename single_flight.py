@@ -0,0 +1,55 @@
+"""
+Single-flight request coalescing.
+
+Concurrent calls that share a key wait on the one call already in flight
+and all receive its result (or its exception), instead of each repeating it.
+"""
+
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.executed = 0
+        self.deduplicated = 0
+
+    def do(self, key, fn):
+        """
+        Run fn() once per concurrent `key`.
+
+        Returns (result, shared) where `shared` is True if this caller waited
+        on another caller's in-flight call rather than running fn itself.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+                self.executed += 1
+            else:
+                self.deduplicated += 1
+        if not leader:
+            return call.result(), True
+
+        try:
+            result = fn()
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        else:
+            call.set_result(result)
+            return result, False
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "executed": self.executed,
+                "deduplicated": self.deduplicated,
+            }
@@ -0,0 +1,307 @@
+"""
+Skill taxonomy: canonical IDs for free-text tech stacks.
+
+skill_taxonomy.json lists each skill once with a canonical ID, a display
+name and its aliases, so "ReactJS", "React.js" and "react js" all become
+"react". Names and aliases are tokenized exactly like candidate input and
+stored in a token trie; normalizing a stack is a single left-to-right walk
+over its tokens that takes the longest alias starting at each position.
+That is linear in the input whatever the size of the taxonomy, and commas
+are optional ("python django postgres" works too).
+
+Tokens are folded before lookup: lowercased, with "." "-" "_" between
+letters or digits dropped, so "Node.js", "nodejs" and "NODE-JS" share a
+key. A leading dot is kept (".net"). A one-word "...js" alias also matches
+as two words ("vuejs" covers "vue js").
+
+Some names and aliases are also everyday words ("go", "express", "spring").
+skill_taxonomy.json lists them under "ambiguous", and they only count as
+skills when the text reads like a list: it has entry separators, names
+another, unambiguous skill, or has nothing but skills and filler words. So
+"Go and Rust" is two skills, while "let me express my concern" is none.
+"""
+
+import json
+import re
+import threading
+from functools import lru_cache
+
+from config import SKILL_TAXONOMY_PATH
+
+# Runs of characters between hard separators; other punctuation is trimmed
+_TOKEN_RE = re.compile(r"[^\s,;/|()\[\]{}\"]+")
+# Separators between stack entries
+_SEGMENT_RE = re.compile(r"[,;|\n]+")
+_FOLD_RE = re.compile(r"(?<=[0-9a-z])[._-](?=[0-9a-z])")
+_TRIM_END = ".:!?'`*_-"
+_TRIM_START = ":!?'`*_-"
+_NUMBER_RE = re.compile(r"\d+\+?")
+
+# Trie key marking the end of an alias
+_END = ""
+
+# Words that do not make leftover, unrecognised text worth keeping
+FILLER_WORDS = frozenset("""
+    a an and also as at basic basics beginner by etc exp experience experienced expert expertise
+    familiar familiarity for from good have has i i'm im in intermediate knowledge know
+    little mainly months my of on or plus proficient proficiency skills some strong
+    the to using use used with work worked working year years yr yrs advanced
+""".split())
+
+_NORMALIZE_CACHE_SIZE = 4096
+# Distinct raw tokens remembered before the fold memo is reset
+_KEY_CACHE_SIZE = 50000
+
+
+def _fold(token):
+    return _FOLD_RE.sub("", token.lower())
+
+
+def _tokens(text):
+    """(folded key, start, end) for each token of `text`; offsets index the original string."""
+    tokens = []
+    for match in _TOKEN_RE.finditer(text):
+        raw = match.group()
+        lead = len(raw) - len(raw.lstrip(_TRIM_START))
+        token = raw[lead:].rstrip(_TRIM_END)
+        if token:
+            start = match.start() + lead
+            tokens.append((_fold(token), start, start + len(token)))
+    return tokens
+
+
+class _FoldedKeys(dict):
+    """Memo of raw token -> folded key ("" if nothing is left after trimming)."""
+
+    def __missing__(self, raw):
+        if len(self) >= _KEY_CACHE_SIZE:
+            self.clear()
+        self[raw] = key = _fold(raw.lstrip(_TRIM_START).rstrip(_TRIM_END))
+        return key
+
+
+_folded_keys = _FoldedKeys()
+
+
+def _keys(text):
+    """Folded keys of `text`, as _tokens() would produce, without offsets."""
+    return [key for key in map(_folded_keys.__getitem__, _TOKEN_RE.findall(text)) if key]
+
+
+def _is_filler(key):
+    return key in FILLER_WORDS or _NUMBER_RE.fullmatch(key) is not None
+
+
+class SkillTaxonomy:
+    """Canonical skills plus a token trie of every name and alias."""
+
+    def __init__(self, skills):
+        self._names = {}
+        self._terms = {}
+        self._trie = {}
+        for skill in skills:
+            skill_id = skill["id"]
+            self._names[skill_id] = skill["name"]
+            surfaces = [skill["name"], *skill.get("aliases", ())]
+            self._terms[skill_id] = frozenset(s.lower() for s in [skill_id, *surfaces])
+            ambiguous = {s.lower() for s in skill.get("ambiguous", ())}
+            for surface in surfaces:
+                keys = [key for key, _, _ in _tokens(surface)]
+                self._insert(keys, skill_id, surface.lower() in ambiguous)
+                if len(keys) == 1 and len(keys[0]) > 2 and keys[0].endswith("js"):
+                    self._insert([keys[0][:-2], "js"], skill_id)
+
+    def _insert(self, keys, skill_id, ambiguous=False):
+        if not keys:
+            return
+        node = self._trie
+        for key in keys:
+            node = node.setdefault(key, {})
+        # The first skill to claim an alias keeps it
+        node.setdefault(_END, (skill_id, ambiguous))
+
+    def __len__(self):
+        return len(self._names)
+
+    def _longest(self, keys, i, ambiguous=True):
+        """
+        (skill ID, end index, ambiguous) of the longest alias starting at
+        keys[i], or (None, i, False). Ambiguous aliases are skipped unless
+        `ambiguous` is true.
+        """
+        node, found, end, found_ambiguous = self._trie, None, i, False
+        for j in range(i, len(keys)):
+            node = node.get(keys[j])
+            if node is None:
+                break
+            if _END in node:
+                skill_id, is_ambiguous = node[_END]
+                if ambiguous or not is_ambiguous:
+                    found, end, found_ambiguous = skill_id, j + 1, is_ambiguous
+        return found, end, found_ambiguous
+
+    def _walk(self, keys):
+        """Yield (start, end, ambiguous) for each alias in `keys`, longest first, left to right."""
+        trie = self._trie
+        i = 0
+        while i < len(keys):
+            # Only keys that start some alias are worth a walk
+            if keys[i] in trie:
+                skill_id, end, ambiguous = self._longest(keys, i)
+                if skill_id is not None:
+                    yield i, end, ambiguous
+                    i = end
+                    continue
+            i += 1
+
+    def _reads_as_list(self, text, keys=None):
+        """
+        True if ambiguous aliases in `text` should count as skills: it has
+        entry separators, names an unambiguous skill, or is nothing but
+        skills and filler words.
+        """
+        if _SEGMENT_RE.search(text):
+            return True
+        keys = _keys(text) if keys is None else keys
+        only_filler = True
+        i = 0
+        for start, end, ambiguous in self._walk(keys):
+            if not ambiguous:
+                return True
+            only_filler = only_filler and all(map(_is_filler, keys[i:start]))
+            i = end
+        return only_filler and all(map(_is_filler, keys[i:]))
+
+    def normalize(self, stack):
+        """
+        Canonical skill IDs for a free-text stack, in order of first mention.
+
+        Entries may be separated by commas, semicolons, pipes, newlines or
+        nothing at all. Text that names no known skill is kept as a raw
+        entry (original case, stripped) unless it is only filler words such
+        as "and", "with" or "5 years", so unknown skills are never lost.
+        Ambiguous aliases are left as text unless the stack reads like a list.
+        """
+        ambiguous = self._reads_as_list(stack)
+        result = []
+        for segment in _SEGMENT_RE.split(stack):
+            stripped = segment.strip()
+            if stripped.lower() in self._names:
+                # Already a canonical ID, e.g. a stored stack being re-normalized
+                result.append(stripped.lower())
+                continue
+            tokens = _tokens(segment)
+            keys = [key for key, _, _ in tokens]
+            i = unmatched = 0
+            while i < len(keys):
+                skill_id, end, _ = self._longest(keys, i, ambiguous)
+                if skill_id is None:
+                    i += 1
+                    continue
+                self._keep_unmatched(segment, tokens[unmatched:i], result)
+                result.append(skill_id)
+                i = unmatched = end
+            self._keep_unmatched(segment, tokens[unmatched:], result)
+        return list(dict.fromkeys(result))
+
+    @staticmethod
+    def _keep_unmatched(segment, tokens, result):
+        """Append the span of `tokens` without leading/trailing filler, if anything remains."""
+        start, end = 0, len(tokens)
+        while start < end and _is_filler(tokens[start][0]):
+            start += 1
+        while end > start and _is_filler(tokens[end - 1][0]):
+            end -= 1
+        if start < end:
+            result.append(segment[tokens[start][1]:tokens[end - 1][2]])
+
+    def canonical(self, skill):
+        """Canonical ID for one skill name, alias or ID; unknown skills come back lowercased and space-normalized."""
+        text = " ".join(str(skill).lower().split())
+        if text in self._names:
+            return text
+        keys = _keys(text)
+        skill_id, end, _ = self._longest(keys, 0)
+        if skill_id is not None and end == len(keys):
+            return skill_id
+        return text
+
+    def contains_skill(self, text):
+        """True if `text` mentions any known skill (ambiguous aliases only in a list)."""
+        keys = _keys(text)
+        first = next(self._walk(keys), None)
+        if first is None:
+            return False
+        # An ambiguous first match still counts if the rest names another skill
+        return not first[2] or self._reads_as_list(text, keys)
+
+    def name(self, skill):
+        """Display name for a canonical ID; anything else is returned unchanged."""
+        return self._names.get(skill, skill)
+
+    def terms(self, skill):
+        """Lowercase ID, name and aliases of the skill `skill` resolves to (just itself if unknown)."""
+        skill_id = self.canonical(skill)
+        return self._terms.get(skill_id, frozenset([skill_id]))
+
+
+def load_taxonomy(path):
+    with open(path, encoding="utf-8") as f:
+        return SkillTaxonomy(json.load(f)["skills"])
+
+
+_lock = threading.Lock()
+_taxonomy = None
+
+
+def get_taxonomy():
+    """The bundled taxonomy (SKILL_TAXONOMY_PATH), loaded on first use."""
+    global _taxonomy
+    if _taxonomy is None:
+        with _lock:
+            if _taxonomy is None:
+                _taxonomy = load_taxonomy(SKILL_TAXONOMY_PATH)
+    return _taxonomy
+
+
+@lru_cache(maxsize=_NORMALIZE_CACHE_SIZE)
+def _normalize_text(text):
+    return tuple(get_taxonomy().normalize(text))
+
+
+def normalize_stack(stack):
+    """
+    Canonical skill IDs (plus unrecognised entries) for a tech stack.
+
+    Args:
+        stack: Free text as typed by the candidate, or a list of entries
+
+    Returns:
+        list: IDs such as ["react", "nextjs"], in order of first mention
+    """
+    if not isinstance(stack, str):
+        stack = ",".join(str(entry) for entry in stack)
+    return list(_normalize_text(stack))
+
+
+@lru_cache(maxsize=_NORMALIZE_CACHE_SIZE)
+def canonical_skill(skill):
+    """Canonical ID for a single skill, e.g. "React.js" -> "react"."""
+    return get_taxonomy().canonical(skill)
+
+
+@lru_cache(maxsize=_NORMALIZE_CACHE_SIZE)
+def mentions_skill(text):
+    """True if free text names at least one known skill."""
+    return get_taxonomy().contains_skill(text)
+
+
+def skill_names(skill_ids):
+    """Display names for canonical IDs, e.g. for prompts and summaries."""
+    taxonomy = get_taxonomy()
+    return [taxonomy.name(skill_id) for skill_id in skill_ids]
+
+
+def skill_terms(skill):
+    """Every lowercase spelling of `skill` in the taxonomy, for raw-text prefilters."""
+    return get_taxonomy().terms(skill)
@@ -1,18 +1,390 @@
+"""
+Candidate persistence.
+
+Candidates are stored as an append-only JSON Lines log: one record per line,
+written under an inter-process file lock and fsync'd, so saving a candidate
+costs O(record) regardless of how many interviews have already been stored,
+and concurrent sessions finishing together cannot lose each other's records.
+
+Setting STORAGE_BACKEND=sqlite routes the same entry points to the indexed,
+email-deduplicated repository in candidate_repository.py instead.
+
+With WRITE_BEHIND enabled (the default), save_candidate only enqueues the
+record; a background worker batches pending records into a single write.
+Batches that keep failing are kept in candidates.jsonl.unsaved and retried.
+"""
+
 import json
+import logging
 import os
+import re
+import threading
+from array import array
+from contextlib import contextmanager
+from functools import partial
+from itertools import islice
 
-SAVE_PATH = "candidates.json"
+from config import STORAGE_BACKEND, WRITE_BEHIND
+from write_behind import WriteBehindQueue
+from metrics import timed
+from skill_taxonomy import canonical_skill, skill_terms
+from logging_setup import get_logger, log_event
 
-def save_candidate(data):
-    existing = []
-    if os.path.exists(SAVE_PATH):
+log = get_logger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+SAVE_PATH = "candidates.jsonl"
+LEGACY_PATH = "candidates.json"
+LOCK_PATH = SAVE_PATH + ".lock"
+INDEX_PATH = SAVE_PATH + ".idx"
+INDEX_LOCK_PATH = INDEX_PATH + ".lock"
+UNSAVED_PATH = SAVE_PATH + ".unsaved"
+UNSAVED_LOCK_PATH = UNSAVED_PATH + ".lock"
+
+
+@contextmanager
+def _file_lock(path=LOCK_PATH):
+    """Hold an exclusive inter-process lock for the duration of the block."""
+    with open(path, "a+b") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _append_lines(lines):
+    """Append already-serialized lines to the log and fsync them."""
+    with open(SAVE_PATH, "a", encoding="utf-8") as f:
+        f.write("".join(lines))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def _serialize(data):
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+# Set once this process has failed to read the legacy store
+_legacy_unreadable = False
+# Set once this process has run the SQLite migration
+_sqlite_ready = False
+_sqlite_lock = threading.Lock()
+
+
+def migrate_legacy_store():
+    """
+    One-time migration of the old candidates.json array into the JSON Lines log.
+
+    The legacy file is renamed to candidates.json.migrated afterwards so the
+    migration never runs twice. A file that cannot be read or parsed is left
+    in place (and not retried by this process) so no records are lost.
+    Returns the number of records migrated.
+    """
+    global _legacy_unreadable
+    if _legacy_unreadable or not os.path.exists(LEGACY_PATH):
+        return 0
+    with _file_lock():
+        # Another process may have migrated while we waited for the lock
+        if not os.path.exists(LEGACY_PATH):
+            return 0
         try:
-            with open(SAVE_PATH, "r") as f:
+            with open(LEGACY_PATH, "r", encoding="utf-8") as f:
                 content = f.read().strip()
-                if content:
-                    existing = json.loads(content)
-        except Exception:
-            existing = []
-    existing.append(data)
-    with open(SAVE_PATH, "w") as f:
-        json.dump(existing, f, indent=2)
+            records = json.loads(content) if content else []
+        except (OSError, ValueError) as e:
+            _legacy_unreadable = True
+            log_event(
+                log, logging.ERROR, "storage.legacy_migration_failed",
+                "Legacy candidate store could not be read; left in place", path=LEGACY_PATH, error=str(e)
+            )
+            return 0
+        if not isinstance(records, list):
+            records = [records]
+        if records:
+            _append_lines([_serialize(record) for record in records])
+        os.replace(LEGACY_PATH, LEGACY_PATH + ".migrated")
+        return len(records)
+
+
+def migrate_to_sqlite():
+    """
+    Import the JSON Lines log into an empty SQLite repository.
+
+    Records are upserted by email, so repeated interviews collapse into the
+    most recent record for each candidate. Returns the number imported.
+    """
+    import candidate_repository
+
+    migrate_legacy_store()
+    if candidate_repository.count_candidates() or not os.path.exists(SAVE_PATH):
+        return 0
+    imported = 0
+    records = (candidate for _, candidate in _scan_log())
+    while True:
+        batch = list(islice(records, 1000))
+        if not batch:
+            return imported
+        candidate_repository.save_candidates(batch)
+        imported += len(batch)
+
+
+def _ensure_sqlite():
+    """Run migrate_to_sqlite() once per process, before the first SQLite read or write."""
+    global _sqlite_ready
+    if _sqlite_ready:
+        return
+    with _sqlite_lock:
+        if not _sqlite_ready:
+            migrate_to_sqlite()
+            _sqlite_ready = True
+
+
+@timed("save_write")
+def _write_records(records):
+    """Durably write a batch of candidate records to the configured backend."""
+    if STORAGE_BACKEND == "sqlite":
+        import candidate_repository
+
+        _ensure_sqlite()
+        candidate_repository.save_candidates(records)
+        return
+    migrate_legacy_store()
+    lines = [_serialize(data) for data in records]
+    with _file_lock():
+        _append_lines(lines)
+
+
+def _replay_records(records, queued_at):
+    """
+    Write dead-lettered records, oldest first.
+
+    SQLite skips any record whose candidate was saved again after it was
+    queued, so a late replay never overwrites a newer interview. The JSON
+    Lines log keeps every record anyway.
+    """
+    if STORAGE_BACKEND == "sqlite":
+        import candidate_repository
+
+        _ensure_sqlite()
+        candidate_repository.save_candidates(records, saved_at=queued_at)
+        return
+    _write_records(records)
+
+
+_writer = WriteBehindQueue(
+    _write_records,
+    name="candidate-writer",
+    dead_letter_path=UNSAVED_PATH,
+    dead_letter_lock=partial(_file_lock, UNSAVED_LOCK_PATH),
+    replay_fn=_replay_records,
+)
+
+
+@timed("save")
+def save_candidate(data):
+    """Persist a single candidate record in the configured backend."""
+    if WRITE_BEHIND:
+        # Snapshot the record so later session mutations can't leak into it
+        _writer.put(json.loads(json.dumps(data)))
+        return
+    _write_records([data])
+
+
+def flush(timeout=None):
+    """
+    Wait for queued candidate records to reach disk.
+
+    Returns False if `timeout` expired or some records could not be written;
+    those stay in UNSAVED_PATH and are retried on the next flush.
+    """
+    return _writer.flush(timeout)
+
+
+def get_write_stats():
+    """Queue depth and flush latency of the background candidate writer."""
+    return _writer.stats()
+
+
+def load_candidates():
+    """Return every stored candidate as a list, oldest first."""
+    return list(iter_candidates())
+
+
+def iter_candidates(skill=None, min_experience=None, max_experience=None, location=None):
+    """
+    Yield stored candidates one at a time, oldest first, without loading the store.
+
+    Filters are pushed down to the backend: SQLite evaluates them in SQL, and
+    the JSON Lines reader rejects lines on their raw bytes before paying for
+    json.loads. Matching is case-insensitive on whole location values, and
+    skills match by canonical ID, so any alias finds them ("k8s" finds
+    "Kubernetes").
+
+    Args:
+        skill: Only candidates listing this skill in their tech stack
+        min_experience: Minimum years of experience (inclusive)
+        max_experience: Maximum years of experience (inclusive)
+        location: Only candidates in this location
+    """
+    _writer.flush()
+    if STORAGE_BACKEND == "sqlite":
+        import candidate_repository
+
+        _ensure_sqlite()
+        yield from candidate_repository.iter_candidates(skill, min_experience, max_experience, location)
+        return
+    migrate_legacy_store()
+    for _, candidate in _scan_log(skill, min_experience, max_experience, location):
+        yield candidate
+
+
+_EXPERIENCE_RE = re.compile(rb'"experience_years":\s*(-?\d+)\s*[,}]')
+
+
+def _normalize(value):
+    return " ".join(str(value).lower().split())
+
+
+def _matches(candidate, skill, min_experience, max_experience, location):
+    if skill is not None:
+        stack = candidate.get("tech_stack") or []
+        if isinstance(stack, str):
+            stack = stack.split(",")
+        if canonical_skill(skill) not in {canonical_skill(s) for s in stack}:
+            return False
+    if min_experience is not None or max_experience is not None:
+        try:
+            years = int(candidate.get("experience_years"))
+        except (TypeError, ValueError):
+            return False
+        if min_experience is not None and years < min_experience:
+            return False
+        if max_experience is not None and years > max_experience:
+            return False
+    if location is not None and _normalize(candidate.get("location", "")) != _normalize(location):
+        return False
+    return True
+
+
+def _scan_log(skill=None, min_experience=None, max_experience=None, location=None, start=0):
+    """Yield (byte offset, candidate) for every log line passing the filters."""
+    if not os.path.exists(SAVE_PATH):
+        return
+    # Cheap byte-level prefilters; every survivor is still checked exactly
+    needles = [
+        token.encode("ascii")
+        for token in (_normalize(location).split() if location is not None else ())
+        if token.isascii() and '"' not in token and "\\" not in token
+    ]
+    # A skill may be stored under any of its spellings, so any one will do;
+    # skip this prefilter if some spelling cannot be matched on raw bytes
+    terms = skill_terms(skill) if skill is not None else ()
+    skill_needles = [
+        tuple(token.encode("ascii") for token in term.split())
+        for term in terms
+        if term.isascii() and '"' not in term and "\\" not in term
+    ]
+    if len(skill_needles) < len(terms):
+        skill_needles = []
+    check_experience = min_experience is not None or max_experience is not None
+    with open(SAVE_PATH, "rb") as f:
+        f.seek(start)
+        offset = start
+        for line in f:
+            line_offset = offset
+            offset += len(line)
+            if not line.strip():
+                continue
+            if needles or skill_needles:
+                lowered = line.lower()
+                if not all(needle in lowered for needle in needles):
+                    continue
+                if skill_needles and not any(
+                    all(token in lowered for token in tokens) for tokens in skill_needles
+                ):
+                    continue
+            if check_experience:
+                match = _EXPERIENCE_RE.search(line)
+                if match:
+                    years = int(match.group(1))
+                    if (min_experience is not None and years < min_experience) or (
+                        max_experience is not None and years > max_experience
+                    ):
+                        continue
+            try:
+                candidate = json.loads(line)
+            except ValueError:
+                # Skip a torn trailing line left by a crash mid-write
+                continue
+            if _matches(candidate, skill, min_experience, max_experience, location):
+                yield line_offset, candidate
+
+
+def build_offset_index():
+    """
+    Bring the byte-offset index of the JSON Lines log up to date.
+
+    The index is a sidecar file of unsigned 64-bit line offsets, extended
+    incrementally from the last indexed record. Returns the record count.
+    """
+    flush()
+    migrate_legacy_store()
+    # Another process extending the index at the same time would append the same offsets
+    with _file_lock(INDEX_LOCK_PATH):
+        offsets = _load_offset_index()
+        start = 0
+        if offsets:
+            with open(SAVE_PATH, "rb") as f:
+                f.seek(offsets[-1])
+                start = offsets[-1] + len(f.readline())
+        new_offsets = array("Q", (offset for offset, _ in _scan_log(start=start)))
+        if new_offsets:
+            with open(INDEX_PATH, "ab") as f:
+                new_offsets.tofile(f)
+        return len(offsets) + len(new_offsets)
+
+
+def _load_offset_index():
+    offsets = array("Q")
+    if os.path.exists(INDEX_PATH) and os.path.exists(SAVE_PATH):
+        with open(INDEX_PATH, "rb") as f:
+            data = f.read()
+        offsets.frombytes(data[: len(data) - len(data) % offsets.itemsize])
+    return offsets
+
+
+def get_candidate(position):
+    """
+    Fetch the candidate at `position` (0-based, oldest first) by seeking to it.
+
+    Only the requested line is parsed. Raises IndexError if out of range.
+    """
+    if STORAGE_BACKEND == "sqlite":
+        import candidate_repository
+
+        return candidate_repository.get_candidate(position)
+    if position < 0:
+        raise IndexError(position)
+    offsets = _load_offset_index()
+    if position >= len(offsets):
+        build_offset_index()
+        offsets = _load_offset_index()
+        if position >= len(offsets):
+            raise IndexError(position)
+    with open(SAVE_PATH, "rb") as f:
+        f.seek(offsets[position])
+        return json.loads(f.readline())
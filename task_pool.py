@@ -0,0 +1,46 @@
+"""
+Shared thread pool for running blocking work (mostly LLM calls) off the
+request path or concurrently with other calls.
+
+Tasks run in a copy of the submitter's contextvars context, so per-interview
+state such as the LLM usage ledger follows the work onto the pool.
+
+Asyncio code awaits blocking calls with run_blocking(), which uses a
+separate pool: those calls may themselves submit() and wait on the shared
+pool, and must not be able to starve it.
+"""
+
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from config import BACKGROUND_WORKERS, ASYNC_BLOCKING_WORKERS
+
+_executor = ThreadPoolExecutor(max_workers=BACKGROUND_WORKERS, thread_name_prefix="talentscout-worker")
+_blocking_executor = ThreadPoolExecutor(max_workers=ASYNC_BLOCKING_WORKERS, thread_name_prefix="talentscout-async")
+
+
+def submit(fn, *args, **kwargs):
+    """Run fn(*args, **kwargs) on the shared pool and return its Future."""
+    return _executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+async def run_blocking(fn, *args, **kwargs):
+    """Await fn(*args, **kwargs) run on a worker thread, so it never blocks the event loop."""
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, fn, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(_blocking_executor, call)
+
+
+def threadsafe_callback(callback):
+    """
+    Wrap a callback so calls from worker threads run on the current event loop.
+
+    Lets streaming callbacks (on_text) passed to run_blocking() work touch
+    asyncio objects such as queues. Returns None for a None callback.
+    """
+    if callback is None:
+        return None
+    loop = asyncio.get_running_loop()
+    return lambda *args: loop.call_soon_threadsafe(callback, *args)
@@ -0,0 +1,10 @@
+import os
+import sys
+
+# Offline defaults; must be set before the app modules read config
+os.environ.setdefault("LLM_BACKEND", "synthetic")
+os.environ.setdefault("CONTEXT_CACHE_PATH", "")
+os.environ.setdefault("GEMINI_REQUESTS_PER_MINUTE", "1000000")
+os.environ.setdefault("GEMINI_BURST", "1000")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,42 @@
+import pytest
+
+import ai_context
+from ai_context import local_context_analysis, LOCAL_CONFIDENCE_THRESHOLD
+
+QUESTION = "How does Python's GIL affect multithreaded programs?"
+
+
+@pytest.mark.parametrize("answer, stage, field, question", [
+    ("The GIL lets only one thread run Python bytecode at a time, so CPU-bound threads do not scale.",
+     "QA", None, QUESTION),
+    ("yes", "QA", None, QUESTION),
+    ("Bangalore, India", "GATHERING_INFO", "location", None),
+    ("I am looking for a senior backend engineer role", "GATHERING_INFO", "desired_positions", None),
+    ("about 5 years in total", "GATHERING_INFO", "experience_years", None),
+])
+def test_answers_with_evidence_resolve_locally(answer, stage, field, question):
+    result = local_context_analysis(answer, stage, field, question)
+    assert result["on_topic"]
+    assert result["confidence"] >= LOCAL_CONFIDENCE_THRESHOLD
+
+
+@pytest.mark.parametrize("answer, field", [
+    ("I would rather talk about football with my friends tonight", None),
+    ("What exactly do you mean by that?", None),
+    ("let me express my concern about this", "tech_stack"),
+])
+def test_unconfirmed_answers_escalate(answer, field):
+    result = local_context_analysis(answer, "QA" if field is None else "GATHERING_INFO", field, QUESTION)
+    assert result["confidence"] < LOCAL_CONFIDENCE_THRESHOLD
+
+
+def test_short_answers_are_counted_as_local(monkeypatch):
+    def no_llm(*args, **kwargs):
+        raise AssertionError("short answers must not reach the LLM tier")
+
+    monkeypatch.setattr(ai_context, "analyze_response_context_with_gemini", no_llm)
+    before = ai_context.get_cascade_stats()
+    ai_context.analyze_response_context(QUESTION, "not really sure", "QA")
+    after = ai_context.get_cascade_stats()
+    assert after["resolved_locally"] == before["resolved_locally"] + 1
+    assert after["escalated"] == before["escalated"]
@@ -0,0 +1,28 @@
+import time
+
+import pytest
+
+import candidate_repository
+
+
+@pytest.fixture
+def db(tmp_path):
+    return str(tmp_path / "candidates.db")
+
+
+def test_find_by_skill_puts_reinterviewed_candidates_first(db):
+    candidate_repository.save_candidate({"email": "old@example.com", "tech_stack": ["python"]}, path=db)
+    candidate_repository.save_candidate({"email": "new@example.com", "tech_stack": ["python"]}, path=db)
+    time.sleep(0.01)
+    # Re-interviewing keeps the row id but makes the candidate the newest
+    candidate_repository.save_candidate({"email": "old@example.com", "tech_stack": ["python", "go"]}, path=db)
+
+    emails = [c["email"] for c in candidate_repository.find_by_skill("Python", path=db)]
+    assert emails == ["old@example.com", "new@example.com"]
+
+
+@pytest.mark.parametrize("position", [-1, 1])
+def test_get_candidate_out_of_range_raises_index_error(db, position):
+    candidate_repository.save_candidate({"email": "a@example.com"}, path=db)
+    with pytest.raises(IndexError):
+        candidate_repository.get_candidate(position, path=db)
@@ -0,0 +1,58 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import conversation_manager
+from conversation_manager import (
+    _LatestText, _should_speculate, _speculative_result, _speculative_result_async
+)
+
+QUESTIONS = "1. What is a Python decorator?\n2. Explain the GIL."
+
+
+def slow_questions(on_text, release):
+    on_text("1. What is a Python")
+    release.wait(5)
+    return QUESTIONS
+
+
+def test_speculation_only_for_a_stack_naming_a_skill():
+    assert _should_speculate("tech_stack", "Python, Django and PostgreSQL")
+    assert not _should_speculate("tech_stack", "what does this job pay?")
+    assert not _should_speculate("location", "Python")
+
+
+def test_speculative_preview_reaches_on_text(monkeypatch):
+    monkeypatch.setattr(conversation_manager, "PREVIEW_POLL_SECONDS", 0.01)
+    latest, release, shown = _LatestText(), threading.Event(), []
+    callers = set()
+
+    def on_text(text):
+        callers.add(threading.get_ident())
+        shown.append(text)
+        release.set()
+
+    with ThreadPoolExecutor(1) as pool:
+        future = pool.submit(slow_questions, latest, release)
+        assert _speculative_result(future, latest, on_text) == QUESTIONS
+
+    assert shown == ["1. What is a Python", "1. What is a Python decorator?"]
+    assert callers == {threading.get_ident()}
+
+
+def test_speculative_preview_reaches_on_text_async(monkeypatch):
+    monkeypatch.setattr(conversation_manager, "PREVIEW_POLL_SECONDS", 0.01)
+
+    async def main():
+        latest, shown = _LatestText(), []
+
+        async def questions():
+            latest("1. What is a Python")
+            await asyncio.sleep(0.05)
+            return QUESTIONS
+
+        task = asyncio.ensure_future(questions())
+        assert await _speculative_result_async(task, latest, shown.append) == QUESTIONS
+        return shown
+
+    assert asyncio.run(main()) == ["1. What is a Python", "1. What is a Python decorator?"]
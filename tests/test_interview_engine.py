@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+import interview_engine
+from interview_engine import (
+    CONCLUDED, GATHERING_INFO, QA, InterviewEngine, InterviewSession, InvalidTransition,
+)
+
+PROFILE = {
+    "full_name": "Asha Rao",
+    "email": "asha@example.com",
+    "phone": "9876543210",
+    "experience_years": "4",
+    "desired_positions": "backend developer",
+    "location": "Bangalore",
+    "tech_stack": "python, django, postgresql",
+}
+
+ANSWER = (
+    "I would start by profiling the code to find the hot path, then use a hash map "
+    "to cache intermediate results and add tests around the edge cases."
+)
+
+MAX_TURNS = 40
+
+
+@pytest.mark.parametrize("path", [[QA, CONCLUDED], [CONCLUDED]])
+def test_allowed_transitions(path):
+    session = InterviewSession()
+    for stage in path:
+        session.advance(stage)
+    assert session.stage == CONCLUDED and session.concluded
+
+
+@pytest.mark.parametrize("path, stage", [
+    ([], GATHERING_INFO),
+    ([QA], GATHERING_INFO),
+    ([QA], QA),
+    ([QA, CONCLUDED], QA),
+    ([CONCLUDED], GATHERING_INFO),
+    ([CONCLUDED], CONCLUDED),
+])
+def test_invalid_transitions_raise(path, stage):
+    session = InterviewSession()
+    for step in path:
+        session.advance(step)
+    before = session.stage
+    with pytest.raises(InvalidTransition):
+        session.advance(stage)
+    assert session.stage == before
+
+
+def run_interview(engine):
+    session = engine.start()
+    stages = [session.stage]
+    turns = 0
+    while not session.concluded and turns < MAX_TURNS:
+        message = PROFILE[session.current_field()] if session.stage == GATHERING_INFO else ANSWER
+        engine.submit(session, message)
+        if session.stage != stages[-1]:
+            stages.append(session.stage)
+        turns += 1
+    return session, stages
+
+
+def test_synthetic_interview_reaches_concluded():
+    saved, emailed = [], []
+    engine = InterviewEngine(send_email=lambda email, name: emailed.append((email, name)) or True, save=saved.append)
+
+    session, stages = run_interview(engine)
+
+    assert stages == [GATHERING_INFO, QA, CONCLUDED]
+    assert session.progress() == 100
+    assert session.qa_pairs and isinstance(session.report, list)
+    assert len(session.report) == len(session.qa_pairs)
+    assert emailed == [("asha@example.com", "Asha Rao")] and session.email_sent
+    assert len(saved) == 1 and saved[0]["email"] == "asha@example.com"
+    assert "llm_usage" in saved[0]
+    # A concluded session ignores further messages
+    assert engine.submit(session, ANSWER) == []
+
+
+def test_synthetic_interview_reaches_concluded_async():
+    engine = InterviewEngine()
+
+    async def main():
+        session = engine.start()
+        turns = 0
+        while not session.concluded and turns < MAX_TURNS:
+            message = PROFILE[session.current_field()] if session.stage == GATHERING_INFO else ANSWER
+            await engine.submit_async(session, message)
+            turns += 1
+        return session
+
+    session = asyncio.run(main())
+    assert session.concluded and isinstance(session.report, list)
+
+
+def test_no_questions_concludes_from_gathering_info(monkeypatch):
+    monkeypatch.setattr(interview_engine, "get_fallback_questions", lambda: [])
+    monkeypatch.setattr(interview_engine, "handle_profile_answer", lambda session, message, on_text=None: (
+        session.candidate_info.update({field: PROFILE[field] for field in PROFILE}) or "tech_stack"
+    ))
+    engine = InterviewEngine()
+    session = engine.start()
+
+    responses = engine.submit(session, PROFILE["full_name"])
+
+    assert session.stage == CONCLUDED
+    assert responses == [interview_engine.NO_QUESTIONS_MESSAGE]
@@ -0,0 +1,192 @@
+import asyncio
+import base64
+import json
+import os
+import struct
+
+import interview_server
+from interview_engine import InterviewEngine
+from llm_gateway import LLMError
+
+
+async def start(server):
+    listener = await asyncio.start_server(server.handle_connection, "127.0.0.1", 0)
+    return listener, listener.sockets[0].getsockname()[1]
+
+
+async def http(port, method, path, body=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    data = b"" if body is None else json.dumps(body).encode("utf-8")
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode()
+        + data
+    )
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+    payload = json.loads(await reader.readexactly(length)) if length else None
+    writer.close()
+    return status, payload
+
+
+class WebSocket:
+    """Just enough of a WebSocket client for the server's stream endpoint."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, port, path):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        writer.write(
+            f"GET {path} HTTP/1.1\r\nHost: test\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode()
+        )
+        await writer.drain()
+        assert b" 101 " in await reader.readline()
+        while await reader.readline() not in (b"\r\n", b""):
+            pass
+        return cls(reader, writer)
+
+    async def send(self, event):
+        payload = json.dumps(event).encode("utf-8")
+        mask = os.urandom(4)
+        masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        header = struct.pack("!BB", 0x81, 0x80 | len(payload)) if len(payload) < 126 else \
+            struct.pack("!BBH", 0x81, 0x80 | 126, len(payload))
+        self.writer.write(header + mask + masked)
+        await self.writer.drain()
+
+    async def recv(self):
+        """The next event, or None once the server closes the stream."""
+        first, second = await asyncio.wait_for(self.reader.readexactly(2), 10)
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack("!H", await self.reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack("!Q", await self.reader.readexactly(8))[0]
+        payload = await self.reader.readexactly(length)
+        if first & 0x0F == 0x8:
+            return None
+        return json.loads(payload)
+
+    async def until(self, event_type):
+        events = []
+        while True:
+            event = await self.recv()
+            events.append(event)
+            if event is None or event["type"] == event_type:
+                return events
+
+    def close(self):
+        self.writer.close()
+
+
+class FailingEngine(InterviewEngine):
+    async def submit_async(self, session, message, on_text=None):
+        raise LLMError("provider down")
+
+
+def test_failed_socket_turn_sends_an_error_event():
+    async def scenario():
+        server = interview_server.InterviewServer(engine=FailingEngine())
+        listener, port = await start(server)
+        async with listener:
+            _, created = await http(port, "POST", "/sessions")
+            socket = await WebSocket.connect(port, f"/sessions/{created['session_id']}/stream")
+            await socket.send({"message": "Jane Doe"})
+            events = await socket.until("error")
+            socket.close()
+            return events[-1]
+
+    assert asyncio.run(scenario()) == {"type": "error", "status": 500, "error": "internal error"}
+
+
+def test_idle_sessions_with_open_streams_expire():
+    async def scenario():
+        server = interview_server.InterviewServer(engine=InterviewEngine(), session_ttl=0)
+        listener, port = await start(server)
+        async with listener:
+            _, created = await http(port, "POST", "/sessions")
+            socket = await WebSocket.connect(port, f"/sessions/{created['session_id']}/stream")
+            await socket.recv()  # the replayed greeting
+            expired = server.expire_idle()
+            events = await socket.until("expired")
+            closed = await socket.recv()
+            socket.close()
+            status, _ = await http(port, "GET", f"/sessions/{created['session_id']}")
+            return expired, events[-1], closed, status
+
+    expired, last_event, closed, status = asyncio.run(scenario())
+    assert expired == 1
+    assert last_event == {"type": "expired"}
+    assert closed is None
+    assert status == 404
+
+
+PROFILE = [
+    "Asha Rao", "asha@example.com", "9876543210", "4", "backend developer", "Bangalore",
+    "python, django, postgresql",
+]
+
+ANSWER = (
+    "I would start by profiling the code to find the hot path, then use a hash map "
+    "to cache intermediate results and add tests around the edge cases."
+)
+
+
+def test_interview_round_trip_over_http_and_websocket():
+    async def scenario():
+        server = interview_server.InterviewServer(engine=InterviewEngine())
+        listener, port = await start(server)
+        async with listener:
+            status, created = await http(port, "POST", "/sessions")
+            assert status == 201 and created["stage"] == "GATHERING_INFO"
+            session_id = created["session_id"]
+            socket = await WebSocket.connect(port, f"/sessions/{session_id}/stream")
+            greeting = await socket.recv()
+            assert greeting == {"type": "message", **created["messages"][0]}
+
+            # The profile over HTTP; every turn is mirrored on the stream
+            for answer in PROFILE:
+                status, turn = await http(port, "POST", f"/sessions/{session_id}/messages", {"message": answer})
+                assert status == 200 and turn["responses"]
+                events = await socket.until("turn")
+                assert events[0] == {"type": "message", "role": "user", "content": answer}
+                assert [e["content"] for e in events if e["type"] == "message"][1:] == turn["responses"]
+                assert events[-1] == {"type": "turn", "stage": turn["stage"], "progress": turn["progress"]}
+            assert turn["stage"] == "QA"
+
+            status, _ = await http(port, "GET", f"/sessions/{session_id}/report")
+            assert status == 409
+
+            # The answers over the socket until the interview concludes
+            stage = "QA"
+            for _ in range(20):
+                await socket.send({"message": ANSWER})
+                events = await socket.until("turn")
+                stage = events[-1]["stage"]
+                if stage == "CONCLUDED":
+                    break
+            assert stage == "CONCLUDED" and events[-1]["progress"] == 100
+            socket.close()
+
+            status, state = await http(port, "GET", f"/sessions/{session_id}")
+            assert status == 200 and state["stage"] == "CONCLUDED"
+            status, report = await http(port, "GET", f"/sessions/{session_id}/report")
+            assert status == 200 and isinstance(report["report"], list) and report["report"]
+            status, _ = await http(port, "DELETE", f"/sessions/{session_id}")
+            assert status == 204
+            status, _ = await http(port, "GET", f"/sessions/{session_id}")
+            return status
+
+    assert asyncio.run(scenario()) == 404
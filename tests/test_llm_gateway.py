@@ -0,0 +1,165 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import llm_gateway
+from circuit_breaker import CircuitBreaker
+from llm_accounting import LLMUsageLedger, bind_ledger, unbind_ledger
+from llm_backends import SyntheticBackend
+from single_flight import SingleFlight
+from rate_limiter import PriorityRateLimiter, BATCH, INTERACTIVE
+
+
+@pytest.fixture
+def saturated_gateway(monkeypatch):
+    """A gateway with 60 requests/minute, burst 1 and two provider slots."""
+    max_concurrency = 2
+    monkeypatch.setattr(llm_gateway, "_limiter", PriorityRateLimiter(60, burst=1))
+    monkeypatch.setattr(llm_gateway, "_slots", threading.BoundedSemaphore(max_concurrency))
+    monkeypatch.setattr(llm_gateway, "_breaker", CircuitBreaker(1000, 60, 30))
+    executor = ThreadPoolExecutor(max_workers=max_concurrency * 2)
+    monkeypatch.setattr(llm_gateway, "_call_executor", executor)
+    previous = llm_gateway.set_backend(SyntheticBackend())
+    yield
+    llm_gateway.set_backend(previous)
+    executor.shutdown(wait=False)
+
+
+def test_batch_calls_waiting_for_quota_do_not_delay_interactive_calls(saturated_gateway):
+    def batch_call(i):
+        try:
+            llm_gateway.generate_text(f"score batch {i}", purpose="scoring", priority=BATCH, deadline=4)
+        except llm_gateway.LLMError:
+            pass
+
+    batch_threads = [threading.Thread(target=batch_call, args=(i,)) for i in range(20)]
+    for thread in batch_threads:
+        thread.start()
+    # Let the batch calls take the burst token and queue for the rest
+    time.sleep(0.3)
+
+    start = time.monotonic()
+    text = llm_gateway.generate_text(
+        "Please provide your tech stack", purpose="context_check", priority=INTERACTIVE, deadline=5
+    )
+    elapsed = time.monotonic() - start
+
+    assert text
+    # The next token (one per second) goes to the interactive call
+    assert elapsed < 2.0
+    for thread in batch_threads:
+        thread.join()
+
+
+def test_waiting_for_quota_does_not_trip_the_circuit(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, slow_call_seconds=60, cooldown_seconds=30)
+    limiter = PriorityRateLimiter(60, burst=1)
+    assert limiter.acquire(INTERACTIVE, timeout=0)
+    monkeypatch.setattr(llm_gateway, "_limiter", limiter)
+    monkeypatch.setattr(llm_gateway, "_breaker", breaker)
+
+    with pytest.raises(llm_gateway.QuotaTimeout):
+        llm_gateway.generate_text("queued prompt", purpose="context_check", deadline=0.2)
+    assert breaker.stats()["state"] == "closed"
+    assert breaker.allow()
+
+
+def test_abandoned_stream_releases_the_half_open_trial(monkeypatch):
+    breaker = CircuitBreaker(failure_threshold=1, slow_call_seconds=60, cooldown_seconds=0)
+    breaker.record_failure()
+    monkeypatch.setattr(llm_gateway, "_breaker", breaker)
+    monkeypatch.setattr(llm_gateway, "_limiter", PriorityRateLimiter(6000, burst=10))
+
+    # The stream is the half-open trial; the consumer stops after one chunk
+    stream = llm_gateway.stream_text("trial prompt", purpose="question_generation")
+    next(stream)
+    stream.close()
+
+    assert breaker.allow()
+
+
+class StallingBackend(SyntheticBackend):
+    """Streams one chunk, then stalls."""
+
+    def stream(self, prompt, purpose, model_name, timeout):
+        yield "first "
+        time.sleep(3)
+        yield "late"
+
+
+def test_stalled_stream_is_cut_off_at_the_deadline(monkeypatch):
+    monkeypatch.setattr(llm_gateway, "_limiter", PriorityRateLimiter(6000, burst=10))
+    monkeypatch.setattr(llm_gateway, "_breaker", CircuitBreaker(1000, 60, 30))
+    previous = llm_gateway.set_backend(StallingBackend())
+    try:
+        start = time.monotonic()
+        stream = llm_gateway.stream_text("stalling prompt", purpose="question_generation", deadline=0.5)
+        assert next(stream) == "first "
+        with pytest.raises(llm_gateway.LLMTimeout):
+            next(stream)
+        assert time.monotonic() - start < 1.5
+    finally:
+        llm_gateway.set_backend(previous)
+
+
+def test_stream_does_not_hold_a_concurrency_slot_between_chunks(monkeypatch):
+    slots = threading.BoundedSemaphore(1)
+    monkeypatch.setattr(llm_gateway, "_slots", slots)
+    monkeypatch.setattr(llm_gateway, "_limiter", PriorityRateLimiter(6000, burst=10))
+    monkeypatch.setattr(llm_gateway, "_breaker", CircuitBreaker(1000, 60, 30))
+    previous = llm_gateway.set_backend(SyntheticBackend())
+    try:
+        stream = llm_gateway.stream_text("slot prompt", purpose="question_generation")
+        next(stream)
+        # While the consumer sits on a chunk, another call can still use the only slot
+        assert llm_gateway.generate_text("other prompt", purpose="context_check", deadline=2)
+        stream.close()
+    finally:
+        llm_gateway.set_backend(previous)
+
+
+class CountingBackend(SyntheticBackend):
+    def __init__(self, latency_ms):
+        super().__init__(latency_ms)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def generate(self, prompt, purpose, model_name, timeout):
+        with self._lock:
+            self.calls += 1
+        return super().generate(prompt, purpose, model_name, timeout)
+
+
+def test_coalesced_waiters_share_one_call_and_are_not_charged_for_it(monkeypatch):
+    monkeypatch.setattr(llm_gateway, "_limiter", PriorityRateLimiter(6000, burst=10))
+    monkeypatch.setattr(llm_gateway, "_breaker", CircuitBreaker(1000, 60, 30))
+    monkeypatch.setattr(llm_gateway, "_in_flight", SingleFlight())
+    backend = CountingBackend(latency_ms=300)
+    previous = llm_gateway.set_backend(backend)
+    ledgers = [LLMUsageLedger() for _ in range(5)]
+    results = []
+
+    def interview(ledger):
+        token = bind_ledger(ledger)
+        try:
+            results.append(llm_gateway.generate_text("shared prompt", purpose="question_generation"))
+        finally:
+            unbind_ledger(token)
+
+    try:
+        threads = [threading.Thread(target=interview, args=(ledger,)) for ledger in ledgers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        llm_gateway.set_backend(previous)
+
+    assert backend.calls == 1
+    assert len(set(results)) == 1 and len(results) == 5
+    summaries = [ledger.summary() for ledger in ledgers]
+    assert sorted(s["calls"] for s in summaries) == [0, 0, 0, 0, 1]
+    assert sum(s["outcomes"].get("coalesced", 0) for s in summaries) == 4
+    assert all(s["est_tokens"] == 0 for s in summaries if s["calls"] == 0)
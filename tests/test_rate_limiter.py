@@ -0,0 +1,52 @@
+import threading
+import time
+
+from rate_limiter import BATCH, INTERACTIVE, PRIORITY_NAMES, PriorityRateLimiter
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def queue_waiters(limiter, priorities):
+    """Queue one acquire per priority, in order, and return (threads, grant order)."""
+    order, threads = [], []
+    for name, priority in priorities:
+        queued = limiter.stats().get(PRIORITY_NAMES[priority], {}).get("queued", 0)
+        thread = threading.Thread(target=lambda n=name, p=priority: limiter.acquire(p) and order.append(n))
+        thread.start()
+        threads.append(thread)
+        wait_for(lambda p=priority, q=queued: limiter.stats()[PRIORITY_NAMES[p]]["queued"] == q + 1)
+    return threads, order
+
+
+def test_interactive_waiters_are_served_before_batch():
+    # One token every 200ms: all four are queued long before the first refill
+    limiter = PriorityRateLimiter(requests_per_minute=300, burst=1)
+    assert limiter.acquire(BATCH)
+
+    threads, order = queue_waiters(limiter, [
+        ("batch-1", BATCH), ("batch-2", BATCH), ("interactive-1", INTERACTIVE), ("interactive-2", INTERACTIVE),
+    ])
+    for thread in threads:
+        thread.join(5)
+
+    assert order == ["interactive-1", "interactive-2", "batch-1", "batch-2"]
+    stats = limiter.stats()
+    assert stats["interactive"]["acquired"] == 2
+    assert stats["batch"]["acquired"] == 3
+
+
+def test_timed_out_waiter_leaves_the_queue():
+    limiter = PriorityRateLimiter(requests_per_minute=1, burst=1)
+    assert limiter.acquire(INTERACTIVE)
+    assert not limiter.acquire(BATCH, timeout=0.05)
+    stats = limiter.stats()
+    assert stats["batch"] == {
+        "queued": 0, "acquired": 0, "timed_out": 1,
+        "avg_wait_ms": stats["batch"]["avg_wait_ms"], "max_wait_ms": stats["batch"]["max_wait_ms"],
+    }
+    assert stats["batch"]["max_wait_ms"] >= 50
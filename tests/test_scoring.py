@@ -0,0 +1,95 @@
+import json
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+import scoring
+
+QUESTIONS = [f"Question {i}?" for i in range(6)]
+ANSWERS = [f"Answer {i}." for i in range(6)]
+
+
+class FakeScorer:
+    """Scores each answer by its index; answers in `broken` make their whole chunk unparseable."""
+
+    def __init__(self, broken=(), broken_times=None):
+        self.broken = set(broken)
+        self.broken_times = broken_times
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, questions, answers):
+        with self._lock:
+            self.calls.append(list(answers))
+            failing = self.broken & set(answers)
+            if failing and self.broken_times is not None:
+                self.broken_times -= 1
+                if self.broken_times < 0:
+                    failing = set()
+        if failing:
+            return "Sorry, I can't score these."
+        return "```json\n" + json.dumps([
+            {"question": q, "answer": a, "overall": int(a.split()[1][:-1])} for q, a in zip(questions, answers)
+        ]) + "\n```"
+
+
+@pytest.fixture
+def scorer(monkeypatch):
+    def install(**kwargs):
+        fake = FakeScorer(**kwargs)
+        monkeypatch.setattr(scoring, "score_answers_with_gemini", fake)
+        return fake
+    return install
+
+
+def chunk_chars(pairs):
+    return sum(len(q) + len(a) for q, a in zip(QUESTIONS[:pairs], ANSWERS[:pairs]))
+
+
+def test_chunks_merge_back_in_question_order(scorer):
+    fake = scorer()
+    report = json.loads(scoring.score_answers_chunked(QUESTIONS, ANSWERS, max_chunk_chars=chunk_chars(2)))
+
+    assert [entry["overall"] for entry in report] == list(range(6))
+    assert [entry["question"] for entry in report] == QUESTIONS
+    assert sorted(fake.calls) == [ANSWERS[0:2], ANSWERS[2:4], ANSWERS[4:6]]
+
+
+def test_only_the_failed_chunk_is_retried(scorer):
+    fake = scorer(broken={ANSWERS[3]}, broken_times=1)
+    report = json.loads(scoring.score_answers_chunked(QUESTIONS, ANSWERS, max_chunk_chars=chunk_chars(2)))
+
+    assert [entry["overall"] for entry in report] == list(range(6))
+    assert len(fake.calls) == 4
+    assert fake.calls[-1] == ANSWERS[2:4]
+
+
+def test_a_chunk_that_never_parses_becomes_unscored_placeholders(scorer):
+    fake = scorer(broken={ANSWERS[3]})
+    report = json.loads(scoring.score_answers_chunked(QUESTIONS, ANSWERS, max_chunk_chars=chunk_chars(2)))
+
+    assert [entry["overall"] for entry in report] == [0, 1, None, None, 4, 5]
+    for i in (2, 3):
+        assert report[i] == scoring._unscored(QUESTIONS[i], ANSWERS[i])
+        assert set(report[i]) == set(scoring.SCORE_KEYS)
+    assert fake.calls.count(ANSWERS[2:4]) == scoring.SCORING_CHUNK_ATTEMPTS
+
+
+def test_collect_scores_rescores_only_failed_background_results(scorer):
+    fake = scorer()
+    futures = []
+    for i in range(4):
+        future = Future()
+        if i == 1:
+            future.set_exception(RuntimeError("worker died"))
+        elif i == 2:
+            future.set_result("not json")
+        else:
+            future.set_result(json.dumps({"question": QUESTIONS[i], "answer": ANSWERS[i], "overall": i}))
+        futures.append(future)
+
+    report = json.loads(scoring.collect_scores(futures, QUESTIONS[:4], ANSWERS[:4]))
+
+    assert [entry["overall"] for entry in report] == [0, 1, 2, 3]
+    assert fake.calls == [ANSWERS[1:3]]
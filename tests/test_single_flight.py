@@ -0,0 +1,76 @@
+import threading
+import time
+
+import pytest
+
+from single_flight import SingleFlight
+
+WAITERS = 8
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def run_together(flight, fn):
+    results, errors = [], []
+
+    def call():
+        try:
+            results.append(flight.do("key", fn))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(WAITERS)]
+    for thread in threads:
+        thread.start()
+    return threads, results, errors
+
+
+def test_concurrent_callers_share_one_call():
+    flight, release, calls = SingleFlight(), threading.Event(), []
+
+    def fn():
+        calls.append(1)
+        release.wait(5)
+        return "answer"
+
+    threads, results, _ = run_together(flight, fn)
+    wait_for(lambda: flight.stats()["deduplicated"] == WAITERS - 1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False] + [True] * (WAITERS - 1)
+    assert {result for result, _ in results} == {"answer"}
+    assert flight.stats() == {"in_flight": 0, "executed": 1, "deduplicated": WAITERS - 1}
+
+
+def test_waiters_receive_the_leaders_exception():
+    flight, release = SingleFlight(), threading.Event()
+
+    def fn():
+        release.wait(5)
+        raise ValueError("provider down")
+
+    threads, results, errors = run_together(flight, fn)
+    wait_for(lambda: flight.stats()["deduplicated"] == WAITERS - 1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == []
+    assert len(errors) == WAITERS and all(isinstance(e, ValueError) for e in errors)
+
+
+def test_a_finished_key_runs_again():
+    flight = SingleFlight()
+    assert flight.do("key", lambda: 1) == (1, False)
+    assert flight.do("key", lambda: 2) == (2, False)
+    with pytest.raises(KeyError):
+        flight.do("key", lambda: {}["missing"])
+    assert flight.stats()["in_flight"] == 0
@@ -0,0 +1,26 @@
+import pytest
+
+from skill_taxonomy import mentions_skill, normalize_stack
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("let me express my concern about this", ["let me express my concern about this"]),
+    ("I would rather go home", ["would rather go home"]),
+    ("I excel at teamwork", ["excel at teamwork"]),
+])
+def test_ambiguous_aliases_in_prose_are_not_skills(text, expected):
+    assert not mentions_skill(text)
+    # Kept as unrecognised text, minus leading filler
+    assert normalize_stack(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("Go and Rust", ["go", "rust"]),
+    ("python, express, mongodb", ["python", "express", "mongodb"]),
+    ("I know python and go", ["python", "go"]),
+    ("Swift", ["swift"]),
+    ("expressjs", ["express"]),
+])
+def test_ambiguous_aliases_count_in_lists(text, expected):
+    assert mentions_skill(text)
+    assert normalize_stack(text) == expected
@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+
+import storage
+
+
+@pytest.fixture
+def log_dir(tmp_path, monkeypatch):
+    """Run against a fresh JSON Lines log in a temporary directory."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(storage, "STORAGE_BACKEND", "jsonl")
+    return tmp_path
+
+
+def test_get_candidate_without_a_log_raises_index_error(log_dir):
+    with pytest.raises(IndexError):
+        storage.get_candidate(0)
+
+
+@pytest.mark.parametrize("position", [-1, 2, 10])
+def test_get_candidate_out_of_range_raises_index_error(log_dir, position):
+    storage.save_candidate({"full_name": "A"})
+    storage.save_candidate({"full_name": "B"})
+    with pytest.raises(IndexError):
+        storage.get_candidate(position)
+    assert storage.get_candidate(1) == {"full_name": "B"}
+
+
+def test_concurrent_index_builds_do_not_duplicate_offsets(log_dir):
+    for i in range(200):
+        storage.save_candidate({"full_name": f"Candidate {i}"})
+    storage.flush()
+
+    threads = [threading.Thread(target=storage.build_offset_index) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(storage._load_offset_index()) == 200
+    assert storage.get_candidate(199) == {"full_name": "Candidate 199"}
+
+
+def test_unparseable_legacy_store_is_left_in_place(log_dir, monkeypatch):
+    monkeypatch.setattr(storage, "_legacy_unreadable", False)
+    (log_dir / storage.LEGACY_PATH).write_text('[{"full_name": "A"}, {"full_name": ')
+
+    assert storage.migrate_legacy_store() == 0
+    assert (log_dir / storage.LEGACY_PATH).exists()
+    assert not (log_dir / (storage.LEGACY_PATH + ".migrated")).exists()
+
+
+def test_legacy_store_is_migrated_once(log_dir, monkeypatch):
+    monkeypatch.setattr(storage, "_legacy_unreadable", False)
+    (log_dir / storage.LEGACY_PATH).write_text('[{"full_name": "A"}, {"full_name": "B"}]')
+
+    assert storage.migrate_legacy_store() == 2
+    assert storage.load_candidates() == [{"full_name": "A"}, {"full_name": "B"}]
+    assert (log_dir / (storage.LEGACY_PATH + ".migrated")).exists()
+
+
+def test_sqlite_migration_runs_once_per_process(log_dir, monkeypatch):
+    import candidate_repository
+
+    calls = []
+    monkeypatch.setattr(storage, "STORAGE_BACKEND", "sqlite")
+    monkeypatch.setattr(storage, "_sqlite_ready", False)
+    monkeypatch.setattr(storage, "migrate_to_sqlite", lambda: calls.append(1))
+    monkeypatch.setattr(candidate_repository, "DB_PATH", str(log_dir / "candidates.db"))
+
+    for i in range(3):
+        storage.save_candidate({"email": f"c{i}@example.com"})
+    assert len(storage.load_candidates()) == 3
+    assert len(calls) == 1
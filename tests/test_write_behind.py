@@ -0,0 +1,99 @@
+import json
+import threading
+from contextlib import contextmanager
+
+import candidate_repository
+from write_behind import WriteBehindQueue
+
+
+class FlakyTarget:
+    def __init__(self):
+        self.failing = True
+        self.written = []
+
+    def __call__(self, records):
+        if self.failing:
+            raise OSError("disk full")
+        self.written.extend(records)
+
+
+def test_failed_batches_are_dead_lettered_and_replayed_on_flush(tmp_path):
+    target = FlakyTarget()
+    path = tmp_path / "records.unsaved"
+    writer = WriteBehindQueue(target, max_retries=1, dead_letter_path=str(path))
+
+    writer.put({"id": 1})
+    assert writer.flush(timeout=5) is False
+    assert writer.stats()["records_unsaved"] == 1
+    assert path.exists()
+
+    target.failing = False
+    assert writer.flush(timeout=5) is True
+    assert target.written == [{"id": 1}]
+    assert writer.stats()["records_unsaved"] == 0
+    assert not path.exists()
+
+
+def test_dead_letters_are_replayed_at_startup_before_newer_records(tmp_path):
+    path = tmp_path / "records.unsaved"
+    path.write_text(
+        json.dumps({"queued_at": 2.0, "record": {"id": 2}}) + "\n"
+        + json.dumps({"queued_at": 1.0, "record": {"id": 1}}) + "\n"
+    )
+    target = FlakyTarget()
+    target.failing = False
+    writer = WriteBehindQueue(target, dead_letter_path=str(path))
+    assert writer.stats()["records_unsaved"] == 2
+
+    writer.put({"id": 3})
+    assert writer.flush(timeout=5) is True
+    assert [r["id"] for r in target.written] == [1, 2, 3]
+    assert not path.exists()
+
+
+def test_queues_sharing_a_dead_letter_file_replay_each_record_once(tmp_path):
+    path = tmp_path / "records.unsaved"
+    path.write_text("".join(
+        json.dumps({"queued_at": float(i), "record": {"id": i}}) + "\n" for i in range(50)
+    ))
+    target = FlakyTarget()
+    target.failing = False
+    shared = threading.Lock()
+
+    @contextmanager
+    def lock():
+        with shared:
+            yield
+
+    writers = [WriteBehindQueue(target, dead_letter_path=str(path), dead_letter_lock=lock) for _ in range(4)]
+    threads = [threading.Thread(target=writer.flush, args=(5,)) for writer in writers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(r["id"] for r in target.written) == list(range(50))
+    assert all(writer.flush(timeout=5) for writer in writers)
+
+
+def test_missing_dead_letter_file_does_not_stop_the_worker(tmp_path):
+    path = tmp_path / "records.unsaved"
+    path.write_text(json.dumps({"queued_at": 1.0, "record": {"id": 1}}) + "\n")
+    target = FlakyTarget()
+    target.failing = False
+    writer = WriteBehindQueue(target, dead_letter_path=str(path))
+    # Another process replays and removes the file first
+    path.unlink()
+
+    writer.put({"id": 2})
+    assert writer.flush(timeout=5) is True
+    assert target.written == [{"id": 2}]
+
+
+def test_stale_replay_does_not_overwrite_a_newer_save(tmp_path):
+    db = str(tmp_path / "candidates.db")
+    candidate_repository.save_candidates([{"email": "a@example.com", "location": "Berlin"}], path=db)
+    candidate_repository.save_candidates(
+        [{"email": "a@example.com", "location": "Paris"}], path=db, saved_at=[1.0]
+    )
+    assert candidate_repository.all_candidates(path=db)[0]["location"] == "Berlin"
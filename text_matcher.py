@@ -0,0 +1,185 @@
+"""
+Single-pass keyword matcher shared by intent_analyzer and context_handler.
+
+A message is lowercased, padded with a space on each side (as
+context_handler always did) and split on spaces exactly once. Every keyword
+category both analyzers use is then resolved from those tokens, with
+results identical to running `keyword in text` for every keyword:
+
+- Keywords without spaces (e.g. "please", "?") cannot span a space, so they
+  occur in the text exactly when they occur in some token. Each distinct
+  token is matched once against a prefix-trie regex of all such keywords
+  and the result is memoised, so a message costs one dict lookup per token.
+- Standalone-word keywords such as " quit " or " tell me a joke " can only
+  occur on token boundaries and are looked up in an index keyed on their
+  first word.
+- The few remaining keywords ("can you", "tell me", ...) contain a space
+  but may start or end inside a word, and are checked with `in`.
+
+Keywords without surrounding spaces match the padded text exactly when they
+match the unpadded one. scan() is memoised as well, so the two analyzers
+looking at the same message share one pass.
+"""
+
+import re
+from functools import lru_cache
+
+# intent_analyzer: prefixes (and "?") marking a question
+QUESTION_INDICATORS = ["?", "what", "how", "why", "where", "when", "who", "can you", "could you"]
+# intent_analyzer: phrases marking a command
+COMMAND_INDICATORS = ["tell me", "show me", "give me", "i want", "please"]
+# intent_analyzer: talk about the conversation itself
+META_INDICATORS = ["this interview", "this conversation", "talking", "chat", "ask", "question"]
+
+# context_handler: standalone words and phrases (hence the spaces)
+END_KEYWORDS = [" quit ", " exit ", " stop ", " end ", " terminate ", " bye ", " goodbye "]
+HELP_KEYWORDS = [" help ", " confused ", " don't understand ", " what is this ", " what's this "]
+IRRELEVANT_PATTERNS = [
+    " weather ", " joke ", " tell me a joke ", " who are you ", " what can you do ",
+    " what's your name ", " how are you ", " what is your ",
+]
+
+CATEGORIES = {
+    "question": QUESTION_INDICATORS,
+    "command": COMMAND_INDICATORS,
+    "meta": META_INDICATORS,
+    "end": END_KEYWORDS,
+    "help": HELP_KEYWORDS,
+    "irrelevant": IRRELEVANT_PATTERNS,
+}
+
+_SCAN_CACHE_SIZE = 1024
+# Distinct tokens remembered before the token memo is reset
+_TOKEN_CACHE_SIZE = 50000
+
+
+def _trie_pattern(keywords):
+    """Regex alternation shaped like a prefix trie; greedy, so the longest keyword wins."""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def build(node):
+        terminal = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        if len(branches) == 1 and not terminal:
+            return branches[0]
+        group = "(?:" + "|".join(branches) + ")"
+        return group + "?" if terminal else group
+
+    return build(trie)
+
+
+def _is_phrase(keyword):
+    """True for " word " / " several words " keywords that can only match whole tokens."""
+    words = keyword[1:-1].split(" ")
+    return (
+        len(keyword) > 2 and keyword[0] == " " and keyword[-1] == " "
+        and all(words) and not any(char.isspace() for word in words for char in word)
+    )
+
+
+def _prefix_closure(keywords):
+    """Map each keyword to itself plus every other keyword that is a prefix of it."""
+    return {keyword: tuple(other for other in keywords if keyword.startswith(other)) for keyword in keywords}
+
+
+def _phrase_index(phrases):
+    """First word -> [(words, keyword)] for standalone-word keywords."""
+    index = {}
+    for keyword in phrases:
+        words = tuple(keyword[1:-1].split(" "))
+        index.setdefault(words[0], []).append((words, keyword))
+    return index
+
+
+_KEYWORDS = list(dict.fromkeys(keyword for keywords in CATEGORIES.values() for keyword in keywords))
+_PHRASES = _phrase_index([keyword for keyword in _KEYWORDS if _is_phrase(keyword)])
+_PHRASE_FIRST_WORDS = frozenset(_PHRASES)
+_SPACED = tuple(keyword for keyword in _KEYWORDS if " " in keyword and not _is_phrase(keyword))
+_CLOSURE = _prefix_closure([keyword for keyword in _KEYWORDS if " " not in keyword])
+_PATTERN = re.compile(_trie_pattern(_CLOSURE))
+_CATEGORY_SETS = {category: frozenset(keywords) for category, keywords in CATEGORIES.items()}
+_CATEGORY_PREFIXES = {category: tuple(keywords) for category, keywords in CATEGORIES.items()}
+
+
+class _TokenKeywords(dict):
+    """Memo of token -> space-free keywords occurring in it, filled on first lookup."""
+
+    def __missing__(self, token):
+        found = set()
+        search = _PATTERN.search
+        match = search(token)
+        while match:
+            # Overlapping hits: resume one character after each match start
+            found.update(_CLOSURE[match.group()])
+            match = search(token, match.start() + 1)
+        if len(self) >= _TOKEN_CACHE_SIZE:
+            self.clear()
+        self[token] = found = frozenset(found)
+        return found
+
+
+_token_keywords = _TokenKeywords()
+
+
+def token_keywords(token):
+    """Keywords without spaces that occur in `token` (a lowercase, space-free string)."""
+    return _token_keywords[token]
+
+
+class TextMatches:
+    """Keyword hits for one message, grouped by category on demand."""
+
+    __slots__ = ("text", "word_count", "_found")
+
+    def __init__(self, text, word_count, found):
+        self.text = text
+        self.word_count = word_count
+        self._found = found
+
+    def has(self, category):
+        """True if any keyword of `category` occurs (same as any(k in text ...))."""
+        return not _CATEGORY_SETS[category].isdisjoint(self._found)
+
+    def starts_with(self, category):
+        """True if the stripped message starts with a keyword of `category`."""
+        return self.text.strip().startswith(_CATEGORY_PREFIXES[category])
+
+    def keywords(self, category):
+        """Keywords of `category` found in the message, in the category's list order."""
+        return [keyword for keyword in CATEGORIES[category] if keyword in self._found]
+
+    def first(self, category, default=""):
+        """First keyword of `category` in list order that occurs, as next(...) over the list would return."""
+        return next((keyword for keyword in CATEGORIES[category] if keyword in self._found), default)
+
+
+@lru_cache(maxsize=_SCAN_CACHE_SIZE)
+def scan(user_input):
+    """Lowercase, pad and tokenize `user_input` once, and find every keyword it contains."""
+    text = " " + user_input.lower() + " "
+    # Tokens between single spaces; the padding makes the first and last empty
+    tokens = text.split(" ")
+    found = set()
+    for hits in map(_token_keywords.__getitem__, tokens):
+        if hits:
+            found |= hits
+
+    first_words = _PHRASE_FIRST_WORDS.intersection(tokens)
+    if first_words:
+        last = len(tokens) - 1
+        for i, token in enumerate(tokens):
+            if token in first_words:
+                for words, keyword in _PHRASES[token]:
+                    end = i + len(words)
+                    if end <= last and (len(words) == 1 or tuple(tokens[i:end]) == words):
+                        found.add(keyword)
+
+    found.update(keyword for keyword in _SPACED if keyword in text)
+    return TextMatches(text, len(user_input.split()), found)
@@ -0,0 +1,259 @@
+"""
+Background write-behind queue used to keep disk I/O off the request path.
+
+Records are handed to a single daemon worker that drains whatever is pending
+into one batch per flush, so bursts of saves cost one write (and one fsync)
+instead of many. Pending records are flushed at interpreter shutdown.
+
+A batch that still fails after its retries is not dropped: it is appended to
+a dead-letter file (or kept in memory without one) and replayed before the
+next batch is written, on flush(), and when a new worker starts, so records
+left over from a previous run are retried too. Every record keeps the time
+it was queued, and replays hand those times to `replay_fn` so the target can
+skip records that a newer save has superseded. The dead-letter file may be
+shared by several processes; `dead_letter_lock` serializes access to it.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import nullcontext
+
+from logging_setup import get_logger, log_event
+
+log = get_logger(__name__)
+
+
+class WriteBehindQueue:
+    def __init__(self, flush_fn, max_batch=100, max_retries=3, name="write-behind", dead_letter_path=None,
+                 dead_letter_lock=None, replay_fn=None, shutdown_timeout=10.0):
+        """
+        Args:
+            flush_fn: Callable that durably writes a list of records
+            max_batch: Upper bound on records written per flush
+            max_retries: Attempts per batch before it is dead-lettered
+            name: Worker thread name
+            dead_letter_path: JSON Lines file keeping batches that exhausted
+                their retries (records must be JSON-serializable); None keeps
+                them in memory only
+            dead_letter_lock: Callable returning a context manager that
+                excludes other processes from the dead-letter file
+            replay_fn: Callable (records, queued_at) writing replayed records,
+                given the time.time() each was queued; defaults to flush_fn
+            shutdown_timeout: Seconds the interpreter-exit flush may wait
+        """
+        self._flush_fn = flush_fn
+        self._max_batch = max_batch
+        self._max_retries = max_retries
+        self._name = name
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._flushes = 0
+        self._records_written = 0
+        self._records_failed = 0
+        self._last_flush_ms = 0.0
+        self._max_flush_ms = 0.0
+        self._total_flush_ms = 0.0
+        self._dead_letter_path = dead_letter_path
+        self._dead_letter_lock = dead_letter_lock or nullcontext
+        self._replay_fn = replay_fn or (lambda records, queued_at: flush_fn(records))
+        self._shutdown_timeout = shutdown_timeout
+        self._unsaved_lock = threading.Lock()
+        # (queued_at, record) entries that could not be dead-lettered to disk
+        self._unsaved = []
+
+    def put(self, record):
+        """Enqueue a record and return immediately."""
+        self._ensure_worker()
+        self._queue.put((time.time(), record))
+
+    def flush(self, timeout=None):
+        """
+        Block until every record enqueued so far has been written.
+
+        Dead-lettered records are replayed once the queue drains. Returns
+        True if everything was written, False if `timeout` expired first or
+        records are still unsaved.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return self._replay() == 0
+
+    def stats(self):
+        """Queue depth and flush latency figures for monitoring backlog."""
+        unsaved = len(self._unsaved) + self._count_dead_letters()
+        with self._stats_lock:
+            return {
+                "queue_depth": self._queue.unfinished_tasks,
+                "flushes": self._flushes,
+                "records_written": self._records_written,
+                "records_failed": self._records_failed,
+                "records_unsaved": unsaved,
+                "last_flush_ms": round(self._last_flush_ms, 3),
+                "max_flush_ms": round(self._max_flush_ms, 3),
+                "avg_flush_ms": round(self._total_flush_ms / self._flushes, 3) if self._flushes else 0.0,
+            }
+
+    def _ensure_worker(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self._name, daemon=True)
+                self._thread.start()
+                atexit.register(self.flush, self._shutdown_timeout)
+
+    def _run(self):
+        # Records left unsaved by a previous run
+        self._replay()
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self._max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                # Older, failed records go first so they never land after a newer save
+                self._replay()
+                self._write(batch)
+            except Exception as e:
+                # Keep the worker alive; flush() would otherwise wait forever
+                log_event(
+                    log, logging.ERROR, "write_behind.worker_error", "Write-behind worker error",
+                    queue=self._name, error=str(e)
+                )
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def _write(self, batch):
+        """Write a batch of (queued_at, record) entries with retries; dead-letters it if they run out."""
+        records = [record for _, record in batch]
+        for attempt in range(1, self._max_retries + 1):
+            start = time.perf_counter()
+            try:
+                self._flush_fn(records)
+            except Exception as e:
+                log_event(
+                    log, logging.WARNING, "write_behind.flush_failed", "Write-behind flush failed",
+                    queue=self._name, attempt=attempt, max_retries=self._max_retries, error=str(e)
+                )
+                time.sleep(0.1 * attempt)
+                continue
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._stats_lock:
+                self._flushes += 1
+                self._records_written += len(records)
+                self._last_flush_ms = elapsed_ms
+                self._max_flush_ms = max(self._max_flush_ms, elapsed_ms)
+                self._total_flush_ms += elapsed_ms
+            return
+        with self._stats_lock:
+            self._records_failed += len(records)
+        self._dead_letter(batch)
+
+    def _dead_letter(self, batch):
+        """Keep a batch that exhausted its retries for a later replay."""
+        with self._unsaved_lock:
+            if self._dead_letter_path is not None:
+                try:
+                    lines = "".join(
+                        json.dumps({"queued_at": queued_at, "record": record}) + "\n" for queued_at, record in batch
+                    )
+                    with self._dead_letter_lock():
+                        with open(self._dead_letter_path, "a", encoding="utf-8") as f:
+                            f.write(lines)
+                            f.flush()
+                            os.fsync(f.fileno())
+                    log_event(
+                        log, logging.ERROR, "write_behind.dead_lettered", "Write-behind batch dead-lettered",
+                        queue=self._name, records=len(batch), path=self._dead_letter_path
+                    )
+                    return
+                except (OSError, TypeError, ValueError) as e:
+                    log_event(
+                        log, logging.ERROR, "write_behind.dead_letter_failed", "Dead-letter write failed",
+                        queue=self._name, records=len(batch), error=str(e)
+                    )
+            self._unsaved.extend(batch)
+
+    def _replay(self):
+        """Try once to write every unsaved record, oldest first; returns how many are still unsaved."""
+        with self._unsaved_lock:
+            if not self._unsaved and not self._has_dead_letters():
+                return 0
+            try:
+                with self._dead_letter_lock():
+                    # Another process may have replayed the file since the check
+                    entries = sorted(self._read_dead_letters() + self._unsaved, key=lambda entry: entry[0])
+                    if not entries:
+                        return 0
+                    try:
+                        self._replay_fn([record for _, record in entries], [queued_at for queued_at, _ in entries])
+                    except Exception as e:
+                        log_event(
+                            log, logging.WARNING, "write_behind.replay_failed", "Write-behind replay failed",
+                            queue=self._name, records=len(entries), error=str(e)
+                        )
+                        return len(entries)
+                    if self._dead_letter_path is not None:
+                        try:
+                            os.remove(self._dead_letter_path)
+                        except FileNotFoundError:
+                            pass
+                    self._unsaved = []
+            except OSError as e:
+                log_event(
+                    log, logging.WARNING, "write_behind.replay_failed", "Write-behind replay failed",
+                    queue=self._name, error=str(e)
+                )
+                return len(self._unsaved) + self._count_dead_letters()
+        with self._stats_lock:
+            self._records_written += len(entries)
+        log_event(
+            log, logging.INFO, "write_behind.replayed", "Unsaved records written",
+            queue=self._name, records=len(entries)
+        )
+        return 0
+
+    def _has_dead_letters(self):
+        return self._dead_letter_path is not None and os.path.exists(self._dead_letter_path)
+
+    def _read_dead_letters(self):
+        """(queued_at, record) entries in the dead-letter file; call with the dead-letter lock held."""
+        if self._dead_letter_path is None:
+            return []
+        entries = []
+        try:
+            with open(self._dead_letter_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        entries.append((entry["queued_at"], entry["record"]))
+                    except (ValueError, KeyError, TypeError):
+                        # A line torn by a crash mid-append
+                        continue
+        except FileNotFoundError:
+            return []
+        return entries
+
+    def _count_dead_letters(self):
+        if self._dead_letter_path is None:
+            return 0
+        try:
+            with open(self._dead_letter_path, "rb") as f:
+                return sum(1 for _ in f)
+        except FileNotFoundError:
+            return 0